@@ -1,17 +1,44 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 import sys
 import os
 import json
+import hmac
+import html
+import math
 
 sys.path.append(os.path.dirname(__file__))
 
 # Import database manager
+from database.command_profiler import init_mongo_profiling
 from database.mongo_manager import (
     insert_user, find_user_by_email, get_users_collection,
     get_all_stocks, get_stock_by_symbol,
     get_stock_analysis, get_all_analysis_types, get_all_popular_stocks
 )
+from services.analytics import get_history, get_rollups, start_rollups_if_enabled
+from services.amortization import get_amortization_report, invalidate_amortization_cache
+from services.compression import init_compression
+from services.financial_summary import write_section
+from services.health import get_health_snapshot, is_ready, start_health_monitor
+from services.json_provider import FastJSONProvider
+from services.metrics import init_metrics, render_prometheus
+from services.nav_store import get_nav_store, start_nav_watch_if_enabled
+from services.password_hashing import HashingBusyError, hash_password, needs_rehash, verify_password
+from services.performance import portfolio_performance
+from services.price_ingest import get_price_ingest, start_price_ingest_if_enabled
+from services.price_stream import (
+    TooManySubscribersError, event_stream, get_price_broadcaster, parse_symbols, release_on_close,
+)
+from services.rebalancing import (
+    BAND as REBALANCE_BAND, MAX_BAND as MAX_REBALANCE_BAND, compute_rebalancing, store_rebalancing, valid_band,
+)
+from services.sessions import (
+    InvalidSessionError, SESSION_TTL_SECONDS, SUMMARY_PROJECTION, bearer_token,
+    get_user_summary, invalidate_user_summary, issue_session_token, read_session_token
+)
+from services.stock_search import SHORT_PREFIX_TOP, search_stocks
+from services.valuation import get_valuation_engine
 
 try:
     from gemini_fin_path import get_gemini_response
@@ -25,10 +52,33 @@ except Exception as e:
         return f"Demo response for {demo_scenario}: This is a placeholder financial path response."
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 CORS(app)
+init_metrics(app)
+init_mongo_profiling(app)
+init_compression(app)
+start_health_monitor()  # first probe runs now, not on the first /health request
+get_price_ingest().add_subscriber(get_price_broadcaster().publish)
 
 # --- Custom Authentication Endpoints ---
-from werkzeug.security import generate_password_hash, check_password_hash
+
+def _load_user_summary(email):
+    return get_users_collection().find_one({"email": email}, SUMMARY_PROJECTION)
+
+
+def _request_user():
+    """(email, user) for a read request.
+
+    A valid ``Authorization: Bearer`` session token identifies the user and the
+    document comes from the per-process summary cache; otherwise the ``email``
+    query parameter is looked up directly. ``user`` is None when not found.
+    """
+    token = bearer_token(request.headers)
+    if token:
+        email = read_session_token(token)
+        return email, get_user_summary(email, _load_user_summary)
+    email = request.args.get('email')
+    return email, (find_user_by_email(email) if email else None)
 
 # No need for duplicate agent endpoint - the main one is below
 
@@ -42,7 +92,7 @@ def hello():
         <div style="background: #f3f4f6; padding: 20px; border-radius: 8px; margin: 20px 0;">
             <h2 style="color: #1f2937;">📊 Available Endpoints:</h2>
             <ul style="line-height: 1.8;">
-                <li><strong>/health</strong> - API health check</li>
+                <li><strong>/health</strong> - API health check (<strong>/health/live</strong>, <strong>/health/ready</strong> for probes)</li>
                 <li><strong>/ai-financial-path</strong> - Get AI-powered investment recommendations</li>
                 <li><strong>/agent</strong> - Chat with financial AI assistant</li>
                 <li><strong>/auto-bank-data</strong> - Get demo bank account data</li>
@@ -81,12 +131,33 @@ def update_user_liabilities():
                 "maturity_date": liab.get('maturity_date') or liab.get('endDate') or None,
             })
 
-        from database.mongo_manager import get_users_collection
-        users = get_users_collection()
-        res = users.update_one({"email": user_email}, {"$set": {"liabilities": normalized}})
-        if res.matched_count == 0:
+        summary = write_section(user_email, {"liabilities": normalized})
+        if summary is None:
+            return jsonify({"error": "User not found"}), 404
+        invalidate_user_summary(user_email)
+        invalidate_amortization_cache(user_email)
+        return jsonify({"ok": True, "summary": summary})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/user/liabilities/amortization', methods=['GET'])
+def get_liability_amortization():
+    """Payoff schedules plus avalanche vs snowball prepayment comparison for a user's loans"""
+    try:
+        user_email = (request.args.get('email') or '').strip().lower()
+        if not user_email:
+            return jsonify({"error": "Missing user email"}), 400
+        try:
+            extra_payment = float(request.args.get('extra_payment') or 0)
+            if not math.isfinite(extra_payment):
+                raise ValueError(extra_payment)
+        except ValueError:
+            return jsonify({"error": "extra_payment must be a finite number"}), 400
+        user = get_users_collection().find_one({"email": user_email}, {"_id": 0, "liabilities": 1})
+        if not user:
             return jsonify({"error": "User not found"}), 404
-        return jsonify({"ok": True})
+        report = get_amortization_report(user_email, user.get('liabilities') or [], extra_payment)
+        return jsonify(report)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -100,22 +171,39 @@ def update_user_assets():
         assets = data.get('assets') or []
         if not user_email:
             return jsonify({"error": "Missing email"}), 400
+        # The UI doesn't carry symbols or purchase history, so keep the stored ones for holdings it resends.
+        stored = {}
+        user = get_users_collection().find_one({"email": user_email}, {"_id": 0, "assets": 1})
+        for old in (user or {}).get('assets') or []:
+            stored.setdefault(old.get('name'), []).append(old)
         normalized = []
         for a in assets:
-            normalized.append({
+            matches = stored.get(a.get('name'))
+            previous = matches.pop(0) if matches else {}
+            asset = {
                 "name": a.get('name'),
                 "type": a.get('type'),
                 "category": a.get('category') or 'investments',
                 "current_value": a.get('current_value') or a.get('value') or 0,
                 "quantity": a.get('quantity') or 0,
-                "date_updated": a.get('date_updated') or None,
-            })
-        from database.mongo_manager import get_users_collection
-        users = get_users_collection()
-        res = users.update_one({"email": user_email}, {"$set": {"assets": normalized}})
-        if res.matched_count == 0:
+                "date_updated": a.get('date_updated') or previous.get('date_updated'),
+            }
+            symbol = a.get('symbol') or previous.get('symbol')
+            if symbol:
+                asset["symbol"] = str(symbol).strip().upper()
+            for key in ('transactions', 'invested_amount', 'purchase_date'):
+                if a.get(key):
+                    asset[key] = a[key]
+                elif previous.get(key):
+                    asset[key] = previous[key]
+            normalized.append(asset)
+        summary = write_section(user_email, {"assets": normalized})
+        if summary is None:
             return jsonify({"error": "User not found"}), 404
-        return jsonify({"ok": True})
+        get_valuation_engine().reindex_user(user_email)
+        store_rebalancing(user_email)
+        invalidate_user_summary(user_email)
+        return jsonify({"ok": True, "summary": summary})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -137,12 +225,11 @@ def update_user_incomes():
                 "frequency": i.get('frequency') or 'monthly',
                 "income_type": i.get('income_type') or i.get('category') or 'other',
             })
-        from database.mongo_manager import get_users_collection
-        users = get_users_collection()
-        res = users.update_one({"email": user_email}, {"$set": {"income_sources": normalized}})
-        if res.matched_count == 0:
+        summary = write_section(user_email, {"income_sources": normalized})
+        if summary is None:
             return jsonify({"error": "User not found"}), 404
-        return jsonify({"ok": True})
+        invalidate_user_summary(user_email)
+        return jsonify({"ok": True, "summary": summary})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -164,12 +251,11 @@ def update_user_expenses():
                 "frequency": e.get('frequency') or 'monthly',
                 "expense_type": e.get('expense_type') or e.get('type') or 'variable',
             })
-        from database.mongo_manager import get_users_collection
-        users = get_users_collection()
-        res = users.update_one({"email": user_email}, {"$set": {"expenses": normalized}})
-        if res.matched_count == 0:
+        summary = write_section(user_email, {"expenses": normalized})
+        if summary is None:
             return jsonify({"error": "User not found"}), 404
-        return jsonify({"ok": True})
+        invalidate_user_summary(user_email)
+        return jsonify({"ok": True, "summary": summary})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -195,12 +281,11 @@ def update_user_goals():
                 "priority": g.get('priority') or 'medium',
                 "is_completed": g.get('is_completed') or False,
             })
-        from database.mongo_manager import get_users_collection
-        users = get_users_collection()
-        res = users.update_one({"email": user_email}, {"$set": {"financial_goals": normalized}})
-        if res.matched_count == 0:
+        summary = write_section(user_email, {"financial_goals": normalized})
+        if summary is None:
             return jsonify({"error": "User not found"}), 404
-        return jsonify({"ok": True})
+        invalidate_user_summary(user_email)
+        return jsonify({"ok": True, "summary": summary})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -221,12 +306,11 @@ def update_user_risk():
             "investment_experience": risk.get('investment_experience') or 'intermediate',
             "financial_goals": risk.get('financial_goals') or None,
         }
-        from database.mongo_manager import get_users_collection
-        users = get_users_collection()
-        res = users.update_one({"email": user_email}, {"$set": {"risk_profile": normalized}})
-        if res.matched_count == 0:
+        summary = write_section(user_email, {"risk_profile": normalized})
+        if summary is None:
             return jsonify({"error": "User not found"}), 404
-        return jsonify({"ok": True})
+        invalidate_user_summary(user_email)
+        return jsonify({"ok": True, "summary": summary})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -247,7 +331,7 @@ def register():
         # Prevent duplicate registration
         if users.find_one({"email": email}):
             return jsonify({"error": "User already exists. Please sign in."}), 409
-        password_hash = generate_password_hash(password)
+        password_hash = hash_password(password)
         user_doc = {
             "email": email,
             "name": f"{first_name} {last_name}".strip() or email,
@@ -257,6 +341,8 @@ def register():
         users.update_one({"email": email}, {"$set": user_doc}, upsert=True)
         saved = users.find_one({"email": email}, {"_id": 0, "password_hash": 0})
         return jsonify({"user": saved}), 200
+    except HashingBusyError as e:
+        return jsonify({"error": str(e)}), 503
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -276,29 +362,87 @@ def login():
         if not user:
             return jsonify({"error": "User not found. Please sign up."}), 404
         stored = user.get('password_hash')
-        if stored and not check_password_hash(stored, password):
+        if not stored:
+            # Seeded and migrated accounts have no password; never open a session for them.
+            return jsonify({"error": "No password is set for this account"}), 401
+        if not verify_password(stored, password):
             return jsonify({"error": "Invalid credentials"}), 401
+        if needs_rehash(stored):
+            # Upgrade hashes made with an older method/cost while we have the password.
+            users.update_one({"email": email, "password_hash": stored},
+                             {"$set": {"password_hash": hash_password(password)}})
 
         safe_user = {k: v for k, v in user.items() if k not in ("_id", "password_hash")}
-        return jsonify({"user": safe_user}), 200
+        return jsonify({
+            "user": safe_user,
+            "token": issue_session_token(email),
+            "token_type": "Bearer",
+            "expires_in": SESSION_TTL_SECONDS,
+        }), 200
+    except HashingBusyError as e:
+        return jsonify({"error": str(e)}), 503
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/metrics')
+def metrics():
+    """Prometheus scrape endpoint"""
+    return Response(render_prometheus(), mimetype="text/plain; version=0.0.4")
+
 @app.route('/health')
 def health():
+    """Health summary served from the background snapshot"""
+    snapshot = get_health_snapshot()
+    return jsonify(snapshot), (200 if is_ready(snapshot) else 503)
+
+@app.route('/health/live')
+def health_live():
+    """Liveness: the process is up and serving requests"""
+    return jsonify({"status": "alive"})
+
+@app.route('/health/ready')
+def health_ready():
+    """Readiness: the last background database check succeeded and is recent"""
+    snapshot = get_health_snapshot()
+    ready = is_ready(snapshot)
+    return jsonify({"status": "ready" if ready else "not_ready", "database": snapshot.get("database"),
+                    "age_seconds": snapshot.get("age_seconds")}), (200 if ready else 503)
+
+def _admin_denied():
+    """Error response unless the request carries ADMIN_TOKEN in ``X-Admin-Token``."""
+    expected = os.getenv('ADMIN_TOKEN')
+    if not expected:
+        return jsonify({"error": "Admin API is disabled (ADMIN_TOKEN not set)"}), 403
+    if not hmac.compare_digest(request.headers.get('X-Admin-Token', ''), expected):
+        return jsonify({"error": "Invalid admin token"}), 401
+    return None
+
+@app.route('/admin/analytics', methods=['GET'])
+def get_admin_analytics():
+    """Cross-user rollups for one dimension and day: ?dimension=all|risk_category|time_horizon&day=<YYYY-MM-DD>"""
+    denied = _admin_denied()
+    if denied:
+        return denied
     try:
-        # Test MongoDB connection
-        from database.mongo_manager import get_users_collection, get_stocks_collection
-        user_count = get_users_collection().count_documents({})
-        stock_count = get_stocks_collection().count_documents({})
-        return jsonify({
-            "status": "healthy", 
-            "database": "connected",
-            "demo_users": user_count,
-            "stocks_available": stock_count
-        })
+        return jsonify(get_rollups(request.args.get('dimension', 'all'), request.args.get('day')))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
-        return jsonify({"status": "error", "message": str(e)}), 500
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/admin/analytics/history', methods=['GET'])
+def get_admin_analytics_history():
+    """Daily rollups of one group: ?dimension=risk_category&value=moderate&days=30"""
+    denied = _admin_denied()
+    if denied:
+        return denied
+    try:
+        return jsonify(get_history(request.args.get('dimension', 'all'), request.args.get('value', 'all'),
+                                   int(request.args.get('days', 30))))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
 @app.route('/ai-financial-path', methods=['POST'])
 def ai_financial_path():
@@ -331,6 +475,60 @@ def ai_financial_path():
         print(f"Error in ai-financial-path: {str(e)}")
         return jsonify({"error": "Unable to generate financial path"}), 500
 
+def _agent_user(data):
+    """User for an /agent request from a bearer token or an ``email`` field; None when unknown."""
+    try:
+        token = bearer_token(request.headers)
+        email = read_session_token(token) if token else (data.get('email') or '').strip().lower()
+    except InvalidSessionError:
+        return None
+    return find_user_by_email(email) if email else None
+
+def _format_inr(value):
+    if abs(value) >= 1e7:
+        return f"₹{value / 1e7:.2f}Cr"
+    if abs(value) >= 1e5:
+        return f"₹{value / 1e5:.2f}L"
+    return f"₹{value:,.0f}"
+
+def _format_pct(value):
+    return "—" if value is None else f"{value * 100:+.1f}%"
+
+def _portfolio_performance_html(performance):
+    p = performance["portfolio"]
+    color = "#059669" if (p["xirr"] or 0) >= 0 else "#dc2626"
+    rows = "".join(
+        f"""<div style="display: flex; justify-content: space-between; margin-bottom: 6px;">
+<span style="color: #374151; font-size: 13px;">{html.escape(str(h['name']))}</span>
+<span style="color: #111; font-weight: 600; font-size: 13px;">{html.escape(_format_pct(h['xirr']))} XIRR · {html.escape(_format_pct(h['absolute_return']))}</span>
+</div>"""
+        for h in sorted(performance["holdings"], key=lambda h: h["current_value"], reverse=True)[:5]
+    )
+    untracked = len(performance["untracked"])
+    note = f"{untracked} holding(s) have no purchase history and are not included." if untracked else "All holdings included."
+    return f"""<div style="font-family: system-ui, sans-serif; background: white; color: #111; padding: 16px; border-radius: 6px; border: 1px solid #e5e7eb; max-width: 520px;">
+<h3 style="margin: 0 0 12px 0; color: #111; font-size: 16px; font-weight: 600;">📈 Portfolio Performance (as of {html.escape(str(performance['as_of']))})</h3>
+
+<div style="display: grid; grid-template-columns: 1fr 1fr; gap: 8px; margin-bottom: 12px;">
+  <div style="background:#f8fafc; padding:12px; border-radius:6px;">
+    <div style="color:#6b7280; font-size:12px;">Current Value</div>
+    <div style="font-weight:700; font-size:18px;">{html.escape(_format_inr(p['current_value']))}</div>
+    <div style="color:#6b7280; font-size:12px;">Invested {html.escape(_format_inr(p['invested']))}</div>
+  </div>
+  <div style="background:#f0fdf4; padding:12px; border-radius:6px; border:1px solid #bbf7d0;">
+    <div style="color:#065f46; font-size:12px;">XIRR</div>
+    <div style="font-weight:700; color:{color}; font-size:18px;">{html.escape(_format_pct(p['xirr']))}</div>
+    <div style="color:#065f46; font-size:12px;">CAGR {html.escape(_format_pct(p['cagr']))} · Total {html.escape(_format_pct(p['absolute_return']))}</div>
+  </div>
+</div>
+
+<div style="background: #f8fafc; padding: 12px; border-radius: 4px; margin-bottom: 12px;">
+{rows}
+</div>
+
+<div style="color:#6b7280; font-size:12px;">{html.escape(note)}</div>
+</div>"""
+
 @app.route('/agent', methods=['POST'])
 def agent():
     try:
@@ -460,6 +658,10 @@ def agent():
             (('how is' in normalized or 'how\'s' in normalized or 'hows' in normalized) and 'portfolio' in normalized)
         ):
             print("[AGENT] Matched: Portfolio performance demo")
+            user = _agent_user(data)
+            performance = portfolio_performance(user.get('assets') or []) if user else None
+            if performance and performance["portfolio"]:
+                return jsonify({"response": _portfolio_performance_html(performance), "performance": performance})
             response = """<div style="font-family: system-ui, sans-serif; background: white; color: #111; padding: 16px; border-radius: 6px; border: 1px solid #e5e7eb; max-width: 520px;">
 <h3 style="margin: 0 0 12px 0; color: #111; font-size: 16px; font-weight: 600;">📈 Portfolio Performance (Last 30 days)</h3>
 
@@ -538,12 +740,10 @@ Try these stock analysis queries:
 @app.route('/auto-bank-data', methods=['GET'])
 def auto_bank_data():
     """Get user bank account data from MongoDB using email"""
-    from database.mongo_manager import find_user_by_email
     try:
-        user_email = request.args.get('email')
+        user_email, user = _request_user()
         if not user_email:
             return jsonify({"error": "Missing user email"}), 400
-        user = find_user_by_email(user_email)
         if not user:
             return jsonify({"error": "User not found"}), 404
         bank_accounts = user.get('bank_accounts', [])
@@ -559,6 +759,8 @@ def auto_bank_data():
             ]
         }
         return jsonify(demo_data)
+    except InvalidSessionError as e:
+        return jsonify({"error": str(e)}), 401
     except Exception as e:
         print(f"Error in auto-bank-data: {str(e)}")
         # Fallback to static data
@@ -569,32 +771,41 @@ def auto_bank_data():
             ]
         })
 
+def _mf_nav_fields(name):
+    """SchemeCode / NAV / NAVDate from the local NAV store, when the fund name resolves."""
+    store = get_nav_store()
+    code = store.resolve_scheme(name)
+    latest = store.nav_on(code) if code else None
+    if not latest:
+        return {}
+    return {"SchemeCode": code, "NAV": str(latest[1]), "NAVDate": latest[0]}
+
 @app.route('/auto-mf-data', methods=['GET'])
 def auto_mf_data():
     """Get user mutual fund data from MongoDB using email"""
-    from database.mongo_manager import find_user_by_email
     try:
-        user_email = request.args.get('email')
+        user_email, user = _request_user()
         if not user_email:
             return jsonify({"error": "Missing user email"}), 400
-        user = find_user_by_email(user_email)
         if not user:
             return jsonify({"error": "User not found"}), 404
         assets = user.get('assets', [])
         mf_assets = [asset for asset in assets if asset.get('type') == 'Mutual Fund']
         demo_data = {
             "assets": [
-                {
+                dict({
                     "Name": asset.get('name', ''),
                     "Type": "Mutual Fund",
                     "Value": str(int(asset.get('current_value', 0))),
                     "DateUpdated": asset.get('date_updated', "2024-01-01"),
                     "Quantity": str(asset.get('quantity', 0))
-                }
+                }, **_mf_nav_fields(asset.get('name', '')))
                 for asset in mf_assets
             ]
         }
         return jsonify(demo_data)
+    except InvalidSessionError as e:
+        return jsonify({"error": str(e)}), 401
     except Exception as e:
         print(f"Error in auto-mf-data: {str(e)}")
         # Fallback to static data
@@ -607,17 +818,93 @@ def auto_mf_data():
         })
 
 # MongoDB-powered stock endpoints
-from database.mongo_manager import get_all_stocks, get_stock_by_symbol
+from database.mongo_manager import (
+    get_all_stocks, get_stock_by_symbol, get_stocks_page, iter_stocks,
+    get_demo_users_page, iter_demo_users
+)
+
+MAX_PAGE_SIZE = 1000
+NDJSON_BATCH_SIZE = 500
+
+def _page_args():
+    """(limit, after) from the query string; limit is None when not paginating."""
+    limit = request.args.get('limit')
+    if limit is None:
+        return None, None
+    limit = int(limit)
+    if limit < 1:
+        raise ValueError("limit must be positive")
+    return min(limit, MAX_PAGE_SIZE), request.args.get('after')
+
+def _wants_ndjson():
+    if request.args.get('format') == 'ndjson':
+        return True
+    return request.accept_mimetypes.best_match(['application/json', 'application/x-ndjson']) == 'application/x-ndjson'
+
+def _ndjson_response(cursor):
+    """Stream a cursor as newline-delimited JSON, one write per batch of documents."""
+    def generate():
+        try:
+            batch = []
+            for doc in cursor:
+                batch.append(app.json.dumps(doc))
+                if len(batch) >= NDJSON_BATCH_SIZE:
+                    yield "\n".join(batch) + "\n"
+                    batch = []
+            if batch:
+                yield "\n".join(batch) + "\n"
+        finally:
+            cursor.close()
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
 
 @app.route('/stocks', methods=['GET'])
 def get_all_stocks_endpoint():
-    """Get all available stocks"""
+    """Get all available stocks
+
+    ?limit=N[&after=SYMBOL] returns one page ordered by symbol plus ``next_after``;
+    ?format=ndjson (or Accept: application/x-ndjson) streams every stock.
+    """
+    try:
+        if _wants_ndjson():
+            return _ndjson_response(iter_stocks(NDJSON_BATCH_SIZE))
+        limit, after = _page_args()
+        if limit is None:
+            return jsonify({"stocks": get_all_stocks()})
+        stocks = get_stocks_page(limit, after)
+        next_after = stocks[-1]["symbol"] if len(stocks) == limit else None
+        return jsonify({"stocks": stocks, "next_after": next_after})
+    except ValueError as e:
+        return jsonify({"error": f"Invalid pagination parameters: {e}"}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/stocks/search', methods=['GET'])
+def search_stocks_endpoint():
+    """Ranked prefix search over symbol, company name and sector: ?q=<text>&k=<count>"""
     try:
-        stocks = get_all_stocks()
-        return jsonify({"stocks": stocks})
+        query = request.args.get('q') or ''
+        k = max(1, min(int(request.args.get('k', 10)), SHORT_PREFIX_TOP))
+        return jsonify({"query": query, "results": search_stocks(query, k)})
+    except ValueError:
+        return jsonify({"error": "k must be an integer"}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/stream/prices', methods=['GET'])
+def stream_prices_endpoint():
+    """Server-sent price updates: ?symbols=<SYM1,SYM2,...> (omit to receive every symbol)"""
+    try:
+        broadcaster = get_price_broadcaster()
+        sub = broadcaster.subscribe(parse_symbols(request.args.get('symbols')))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except TooManySubscribersError as e:
+        return jsonify({"error": str(e)}), 503
+    response = Response(stream_with_context(event_stream(broadcaster, sub)), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return release_on_close(response, broadcaster, sub)
+
 @app.route('/stock/<symbol>', methods=['GET'])
 def get_stock_endpoint(symbol):
     """Get specific stock by symbol"""
@@ -630,12 +917,63 @@ def get_stock_endpoint(symbol):
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/portfolio-performance', methods=['GET'])
+def get_portfolio_performance():
+    """XIRR, CAGR and absolute return per holding and for the whole portfolio: ?email=<email>&as_of=<YYYY-MM-DD>"""
+    try:
+        user_email, user = _request_user()
+        if not user_email:
+            return jsonify({"error": "Missing user email"}), 400
+        if not user:
+            return jsonify({"error": "User not found"}), 404
+        return jsonify(portfolio_performance(user.get('assets') or [], request.args.get('as_of')))
+    except InvalidSessionError as e:
+        return jsonify({"error": str(e)}), 401
+    except ValueError:
+        return jsonify({"error": "as_of must be a YYYY-MM-DD date"}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/rebalancing', methods=['GET'])
+def get_rebalancing():
+    """Drift against portfolio_allocation and proposed trades: ?email=<email>&refresh=1&band=<points>
+
+    Serves the result stored by the batch run unless ``refresh`` or a custom ``band`` is given.
+    Only default-band results are stored; a custom band is computed for this response alone.
+    """
+    try:
+        user_email, user = _request_user()
+        if not user_email:
+            return jsonify({"error": "Missing user email"}), 400
+        if not user:
+            return jsonify({"error": "User not found"}), 404
+        band = float(request.args.get('band', REBALANCE_BAND))
+        if not valid_band(band):
+            return jsonify({"error": f"band must be greater than 0 and at most {MAX_REBALANCE_BAND:g}"}), 400
+        email = user.get('email') or user_email
+        if band != REBALANCE_BAND:
+            result = compute_rebalancing(email, band)
+        else:
+            stored = user.get('rebalancing')
+            if stored and not request.args.get('refresh') and band == stored.get('band'):
+                return jsonify(stored)
+            result = store_rebalancing(email)
+            invalidate_user_summary(email)
+        if result is None:
+            return jsonify({"error": "No portfolio_allocation targets set"}), 404
+        return jsonify(result)
+    except InvalidSessionError as e:
+        return jsonify({"error": str(e)}), 401
+    except ValueError:
+        return jsonify({"error": "band must be a number"}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/user-portfolio', methods=['GET'])
 def get_user_portfolio():
     """Get comprehensive user portfolio data from MongoDB using email"""
-    from database.mongo_manager import find_user_by_email
     try:
-        user_email = request.args.get('email')
+        user_email, user = _request_user()
         if not user_email:
             return jsonify({"error": "Missing user email"}), 400
         # Only the demo user email should surface portfolio data
@@ -649,12 +987,17 @@ def get_user_portfolio():
                 "goals": [],
                 "risk_profile": {},
                 "bank_accounts": [],
-                "portfolio_allocation": {}
+                "portfolio_allocation": {},
+                "summary": {}
             })
 
-        user = find_user_by_email(user_email)
         if not user:
             return jsonify({"error": "User not found"}), 404
+        summary = user.get('summary')
+        if not summary:
+            # Users written before summaries were materialized get one on first read.
+            summary = write_section(user.get('email') or user_email, {})
+            invalidate_user_summary(user.get('email') or user_email)
         portfolio = {
             "user": {
                 "email": user.get('email'),
@@ -667,23 +1010,32 @@ def get_user_portfolio():
             "goals": user.get('financial_goals', user.get('goals', [])),
             "risk_profile": user.get('risk_profile', {}),
             "bank_accounts": user.get('bank_accounts', []),
-            "portfolio_allocation": user.get('portfolio_allocation', {})
+            "portfolio_allocation": user.get('portfolio_allocation', {}),
+            "summary": summary or {}
         }
         return jsonify(portfolio)
+    except InvalidSessionError as e:
+        return jsonify({"error": str(e)}), 401
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @app.route('/demo-users', methods=['GET'])
 def get_demo_users():
-    """Get all demo users for testing"""
-    from database.mongo_manager import get_users_collection
+    """Get all demo users for testing
+
+    Supports the same ?limit=&after= (by email) and NDJSON modes as /stocks.
+    """
     try:
-        # Find all users with is_demo_user flag set to true
-        users = get_users_collection().find(
-            {"is_demo_user": True}, 
-            {"_id": 0, "password_hash": 0}  # Exclude sensitive fields
-        )
-        return jsonify({"demo_users": list(users)})
+        if _wants_ndjson():
+            return _ndjson_response(iter_demo_users(NDJSON_BATCH_SIZE))
+        limit, after = _page_args()
+        if limit is None:
+            return jsonify({"demo_users": list(iter_demo_users())})
+        users = get_demo_users_page(limit, after)
+        next_after = users[-1]["email"] if len(users) == limit else None
+        return jsonify({"demo_users": users, "next_after": next_after})
+    except ValueError as e:
+        return jsonify({"error": f"Invalid pagination parameters: {e}"}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -806,4 +1158,7 @@ if __name__ == '__main__':
     print("🚀 Starting WealthWise Backend with Database Integration...")
     print("📊 Database: MongoDB Atlas with comprehensive demo data")
     print("🔗 Available at: http://localhost:5000")
+    start_price_ingest_if_enabled()
+    start_rollups_if_enabled()
+    start_nav_watch_if_enabled()
     app.run(debug=False, port=5000)
\ No newline at end of file
@@ -0,0 +1,249 @@
+"""
+Endpoint benchmark suite.
+
+Starts the Flask app on a local port against either a local mongod or an
+in-memory stand-in (mongomock), seeds it with synthetic data, then drives
+each route at a fixed concurrency and reports p50/p95/p99 latency and req/s.
+Results are written as JSON tagged with the git commit so runs can be
+compared across commits with ``--compare``.
+
+    python bench/bench_endpoints.py --mongo-uri mongodb://localhost:27017 --concurrency 16
+    python bench/bench_endpoints.py --in-memory --requests 300
+    python bench/bench_endpoints.py --compare bench/results/<previous>.json
+
+The in-memory mode needs ``pip install mongomock``; its numbers are only
+comparable with other in-memory runs.
+"""
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import http.client
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+RESULTS_DIR = os.path.join(BACKEND_DIR, "bench", "results")
+DEMO_EMAIL = "vedehi@gmail.com"
+DEMO_PASSWORD = "bench-password"
+
+
+def _connect_database(args):
+    """Point database.mongo_manager at the benchmark database before the app is imported."""
+    os.environ["MONGODB_URI"] = args.mongo_uri or "mongodb://localhost:27017"
+    import database.mongo_manager as mongo_manager
+
+    if args.in_memory:
+        import mongomock
+        mongo_manager.client = mongomock.MongoClient()
+    else:
+        from pymongo import MongoClient
+        mongo_manager.client = MongoClient(args.mongo_uri, event_listeners=[mongo_manager.command_profiler])
+    mongo_manager.db = mongo_manager.client[args.db_name]
+    return mongo_manager.db
+
+
+def _seed(db, users: int, stocks: int) -> Tuple[List[str], List[str]]:
+    from pymongo import ASCENDING
+    from werkzeug.security import generate_password_hash
+    from database.synthetic_data import generate_analysis_history, generate_stock, generate_users
+
+    for name in ("users", "stocks", "stock_analysis", "popular_stocks", "analysis_types"):
+        db[name].drop()
+    db["users"].create_index([("email", ASCENDING)], unique=True)
+    db["stocks"].create_index([("symbol", ASCENDING)], unique=True)
+    db["stock_analysis"].create_index([("symbol", ASCENDING), ("type", ASCENDING)])
+
+    user_docs = generate_users(0, users)
+    demo = dict(user_docs[0], email=DEMO_EMAIL, is_demo_user=True,
+                password_hash=generate_password_hash(DEMO_PASSWORD))
+    user_docs = [demo] + user_docs[1:]
+    for i in range(0, len(user_docs), 1000):
+        db["users"].insert_many(user_docs[i:i + 1000], ordered=False)
+
+    stock_docs = [generate_stock(i) for i in range(stocks)]
+    db["stocks"].insert_many(stock_docs, ordered=False)
+    latest = []
+    for stock in stock_docs:
+        latest.extend(generate_analysis_history(stock, 1))
+    db["stock_analysis"].insert_many(latest, ordered=False)
+    db["popular_stocks"].insert_many([
+        {"symbol": s["symbol"], "display_order": i + 1, "is_featured": i < 5, "category": s["sector"]}
+        for i, s in enumerate(stock_docs[:20])
+    ])
+    return [u["email"] for u in user_docs], [s["symbol"] for s in stock_docs]
+
+
+def _scenarios(emails: List[str], symbols: List[str]) -> Dict[str, Callable[[int], Tuple[str, str, Optional[dict]]]]:
+    """name -> fn(i) returning (method, path, json body) for the i-th request."""
+    def user(i):
+        return emails[i % len(emails)]
+
+    return {
+        "GET /user-portfolio": lambda i: ("GET", f"/user-portfolio?email={DEMO_EMAIL}", None),
+        "GET /stocks": lambda i: ("GET", "/stocks", None),
+        "GET /stock-analysis/<symbol>": lambda i: ("GET", f"/stock-analysis/{symbols[i % len(symbols)]}", None),
+        "GET /popular-stocks": lambda i: ("GET", "/popular-stocks", None),
+        "POST /agent": lambda i: ("POST", "/agent", {"user_input": "How is my portfolio performing?"}),
+        "POST /login": lambda i: ("POST", "/login", {"email": DEMO_EMAIL, "password": DEMO_PASSWORD}),
+        "PUT /user/assets": lambda i: ("PUT", "/user/assets", {"email": user(i), "assets": [
+            {"name": "Axis Bluechip Fund Direct Growth", "type": "Mutual Fund", "current_value": 150000 + i, "quantity": 2000}]}),
+        "PUT /user/liabilities": lambda i: ("PUT", "/user/liabilities", {"email": user(i), "liabilities": [
+            {"name": "Car Loan", "type": "auto", "current_balance": 500000 - i, "interest_rate": 9.1, "monthly_payment": 12000}]}),
+        "PUT /user/incomes": lambda i: ("PUT", "/user/incomes", {"email": user(i), "incomes": [
+            {"source_name": "Salary", "amount": 90000, "frequency": "monthly", "income_type": "salary"}]}),
+        "PUT /user/expenses": lambda i: ("PUT", "/user/expenses", {"email": user(i), "expenses": [
+            {"category": "Rent", "amount": 25000, "frequency": "monthly", "expense_type": "fixed"}]}),
+        "PUT /user/goals": lambda i: ("PUT", "/user/goals", {"email": user(i), "goals": [
+            {"title": "Home Purchase", "target_amount": 5000000, "current_amount": 800000, "target_date": "2031-01-01"}]}),
+        "PUT /user/risk": lambda i: ("PUT", "/user/risk", {"email": user(i), "risk": {"score": 55, "timeHorizon": "long"}}),
+    }
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def _run_scenario(port: int, make_request, total: int, concurrency: int, warmup: int) -> Dict[str, float]:
+    local = threading.local()
+
+    def one(i: int) -> Tuple[float, int, int]:
+        conn = getattr(local, "conn", None)
+        if conn is None:
+            conn = local.conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        method, path, body = make_request(i)
+        payload = json.dumps(body) if body is not None else None
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        started = time.perf_counter()
+        try:
+            conn.request(method, path, body=payload, headers=headers)
+            resp = conn.getresponse()
+            data = resp.read()
+            status = resp.status
+        except (http.client.HTTPException, OSError):
+            local.conn = None
+            return time.perf_counter() - started, 599, 0
+        if resp.getheader("Connection", "").lower() == "close":
+            conn.close()
+            local.conn = None
+        return time.perf_counter() - started, status, len(data)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(warmup)))
+        started = time.perf_counter()
+        samples = list(pool.map(one, range(warmup, warmup + total)))
+        wall = time.perf_counter() - started
+
+    latencies = sorted(s[0] * 1000 for s in samples)
+    errors = sum(1 for s in samples if s[1] >= 400)
+    return {
+        "requests": total,
+        "errors": errors,
+        "p50_ms": round(_percentile(latencies, 50), 2),
+        "p95_ms": round(_percentile(latencies, 95), 2),
+        "p99_ms": round(_percentile(latencies, 99), 2),
+        "mean_ms": round(sum(latencies) / len(latencies), 2),
+        "req_per_s": round(total / wall, 1),
+        "avg_bytes": round(sum(s[2] for s in samples) / len(samples)),
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _print_table(results: Dict[str, Dict], baseline: Optional[Dict[str, Dict]] = None) -> None:
+    header = f"  {'route':<30}{'p50':>9}{'p95':>9}{'p99':>9}{'req/s':>9}{'errors':>8}"
+    print(header + ("   Δp95    Δreq/s" if baseline else ""))
+    for name, r in results.items():
+        line = f"  {name:<30}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}{r['p99_ms']:>9.2f}{r['req_per_s']:>9.1f}{r['errors']:>8}"
+        prev = (baseline or {}).get(name)
+        if prev:
+            d95 = (r["p95_ms"] / prev["p95_ms"] - 1) * 100 if prev["p95_ms"] else 0.0
+            drps = (r["req_per_s"] / prev["req_per_s"] - 1) * 100 if prev["req_per_s"] else 0.0
+            line += f"  {d95:+6.1f}%  {drps:+6.1f}%"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark WealthWise API routes")
+    parser.add_argument("--mongo-uri", default=os.getenv("BENCH_MONGODB_URI", "mongodb://localhost:27017"))
+    parser.add_argument("--in-memory", action="store_true", help="Use mongomock instead of a local mongod")
+    parser.add_argument("--db-name", default="wealthwise_bench", help="Database the benchmark seeds and uses")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--stocks", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=500, help="Measured requests per route")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--only", help="Comma separated substrings of route names to run")
+    parser.add_argument("--output", help="Result file (default bench/results/<commit>-<timestamp>.json)")
+    parser.add_argument("--compare", help="Previous result file to diff against")
+    args = parser.parse_args()
+
+    db = _connect_database(args)
+    print(f"🌱 Seeding {args.users} users / {args.stocks} stocks into "
+          f"{'mongomock' if args.in_memory else args.mongo_uri}/{args.db_name}...")
+    emails, symbols = _seed(db, args.users, args.stocks)
+
+    from werkzeug.serving import WSGIRequestHandler, make_server
+    from app import app
+
+    WSGIRequestHandler.protocol_version = "HTTP/1.1"  # keep-alive between requests
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"🚀 App listening on 127.0.0.1:{server.server_port}, concurrency {args.concurrency}\n")
+
+    scenarios = _scenarios(emails, symbols)
+    if args.only:
+        wanted = [w.strip() for w in args.only.split(",")]
+        scenarios = {k: v for k, v in scenarios.items() if any(w in k for w in wanted)}
+
+    results = {}
+    for name, make_request in scenarios.items():
+        results[name] = _run_scenario(server.server_port, make_request, args.requests, args.concurrency, args.warmup)
+        print(f"  ✅ {name}: p95 {results[name]['p95_ms']} ms, {results[name]['req_per_s']} req/s")
+    server.shutdown()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            baseline = json.load(fh)["results"]
+    print()
+    _print_table(results, baseline)
+
+    commit = _git_commit()
+    report = {
+        "commit": commit,
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        "results": results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit}-{datetime.utcnow():%Y%m%dT%H%M%S}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2)
+    print(f"\n📄 Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
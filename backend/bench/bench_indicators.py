@@ -0,0 +1,69 @@
+"""
+Benchmark for the technical indicator engine.
+
+Generates synthetic random-walk OHLC series for thousands of symbols and
+times a full-history batch computation, a per-symbol loop, and the
+incremental one-new-bar update that the nightly refresh relies on.
+
+    python bench/bench_indicators.py --symbols 5000 --bars 500
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.indicators import advance, compute
+
+
+def synthetic_ohlc(n_symbols: int, n_bars: int, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.015, (n_symbols, n_bars)), axis=1))
+    spread = np.abs(rng.normal(0, 0.01, (n_symbols, n_bars)))
+    return close, close * (1 + spread), close * (1 - spread)
+
+
+def timed(fn, repeat: int = 3):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the vectorized indicator engine")
+    parser.add_argument("--symbols", type=int, default=5000)
+    parser.add_argument("--bars", type=int, default=500)
+    parser.add_argument("--loop-sample", type=int, default=200, help="Symbols timed in the per-symbol loop")
+    args = parser.parse_args()
+
+    close, high, low = synthetic_ohlc(args.symbols, args.bars + 1)
+    hist = (close[:, :-1], high[:, :-1], low[:, :-1])
+    new_bar = (close[:, -1:], high[:, -1:], low[:, -1:])
+    print(f"📊 Indicator benchmark: {args.symbols} symbols x {args.bars} bars")
+
+    batch_s, (_, state) = timed(lambda: compute(*hist))
+    print(f"  - batch full history:      {batch_s * 1000:9.1f} ms  ({batch_s / args.symbols * 1e6:7.1f} µs/symbol)")
+
+    sample = min(args.loop_sample, args.symbols)
+    loop_s, _ = timed(lambda: [compute(hist[0][i], hist[1][i], hist[2][i]) for i in range(sample)], repeat=1)
+    per_symbol = loop_s / sample
+    print(f"  - per-symbol loop:         {per_symbol * args.symbols * 1000:9.1f} ms  ({per_symbol * 1e6:7.1f} µs/symbol, extrapolated)")
+
+    inc_s, _ = timed(lambda: advance(state, *new_bar))
+    print(f"  - incremental +1 bar:      {inc_s * 1000:9.1f} ms  ({inc_s / args.symbols * 1e6:7.1f} µs/symbol)")
+
+    full_s, (full, _) = timed(lambda: compute(close, high, low), repeat=1)
+    inc, _ = advance(state, *new_bar)
+    assert all(np.allclose(full[k][:, -1], inc[k][:, -1], equal_nan=True) for k in full)
+    print(f"  - full recompute +1 bar:   {full_s * 1000:9.1f} ms  (incremental is {full_s / inc_s:,.0f}x faster, results identical)")
+
+
+if __name__ == "__main__":
+    main()
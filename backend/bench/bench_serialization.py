@@ -0,0 +1,84 @@
+"""
+Benchmark for JSON serialization and response compression.
+
+Builds payloads shaped like the larger API responses from the synthetic
+data generators and compares Flask's stock JSON provider with
+FastJSONProvider, then the size and CPU cost of gzip and brotli on the
+encoded body.
+
+    python bench/bench_serialization.py --stocks 2000 --users 200
+"""
+
+import argparse
+import gzip
+import os
+import sys
+import time
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.synthetic_data import generate_analysis_history, generate_stock, generate_user, generate_users
+from services import compression, json_provider
+from services.compression import compress
+from services.json_provider import FastJSONProvider
+
+
+def build_payloads(n_stocks: int, n_users: int):
+    user = generate_user(0)
+    stocks = [generate_stock(i) for i in range(n_stocks)]
+    history = generate_analysis_history(stocks[0], 90)
+    return {
+        "/user-portfolio": {
+            "user": {"email": user["email"], "name": user["name"]},
+            "assets": user["assets"], "liabilities": user["liabilities"], "income": user["income_sources"],
+            "expenses": user["expenses"], "goals": user["financial_goals"], "risk_profile": user["risk_profile"],
+            "bank_accounts": user["bank_accounts"], "portfolio_allocation": user["portfolio_allocation"],
+        },
+        "/stocks": {"stocks": stocks},
+        "/demo-users": {"demo_users": generate_users(0, n_users)},
+        "/stock-analysis/<symbol>": {"symbol": stocks[0]["symbol"], "history": history},
+    }
+
+
+def timed(fn, repeat: int):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark JSON encoding and compression of API payloads")
+    parser.add_argument("--stocks", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    stock_provider, fast_provider = DefaultJSONProvider(app), FastJSONProvider(app)
+    print(f"📦 Serialization benchmark (orjson {'on' if json_provider.orjson else 'off'}, "
+          f"brotli {'on' if compression.brotli else 'off'})\n")
+    print(f"  {'route':<26}{'stdlib ms':>10}{'fast ms':>9}{'speedup':>9}{'bytes':>10}"
+          f"{'gzip':>9}{'gzip ms':>9}{'br':>9}{'br ms':>8}")
+
+    with app.app_context():
+        for route, payload in build_payloads(args.stocks, args.users).items():
+            stock_s, _ = timed(lambda: stock_provider.response(payload).get_data(), args.repeat)
+            fast_s, body = timed(lambda: fast_provider.response(payload).get_data(), args.repeat)
+            gzip_s, gz = timed(lambda: compress(body, "gzip"), args.repeat)
+            line = (f"  {route:<26}{stock_s * 1000:>10.2f}{fast_s * 1000:>9.2f}{stock_s / fast_s:>8.1f}x"
+                    f"{len(body):>10,}{len(gz):>9,}{gzip_s * 1000:>9.2f}")
+            if compression.brotli:
+                br_s, br = timed(lambda: compress(body, "br"), args.repeat)
+                line += f"{len(br):>9,}{br_s * 1000:>8.2f}"
+            print(line)
+            assert gzip.decompress(gz) == body
+
+
+if __name__ == "__main__":
+    main()
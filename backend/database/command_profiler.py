@@ -0,0 +1,163 @@
+"""
+pymongo command monitoring attributed to the current request.
+
+``command_profiler`` is registered on the MongoClient in mongo_manager.
+Synchronous pymongo publishes command events on the thread that issued the
+command, so a contextvar set at the start of each Flask request is enough
+to tie every command to it. Per request we count commands, their total
+duration and documents returned; ``init_mongo_profiling(app)`` adds these as
+a ``Server-Timing`` header.
+
+Any single command slower than MONGO_SLOW_MS (default 100) is written as one
+JSON line to the ``wealthwise.mongo.slow`` logger (stderr, or the file named
+by MONGO_SLOW_LOG), with its reply size. Measuring a reply means encoding it
+to BSON again, so sizes of other commands are only added to the per-request
+totals with MONGO_PROFILE_SIZES=1.
+"""
+
+from contextvars import ContextVar
+from datetime import datetime
+import json
+import logging
+import os
+import sys
+import threading
+from typing import Any, Dict, Optional
+
+import bson
+from pymongo import monitoring
+
+SLOW_MS = float(os.getenv("MONGO_SLOW_MS", "100"))
+MEASURE_SIZES = os.getenv("MONGO_PROFILE_SIZES", "0") == "1"
+
+slow_log = logging.getLogger("wealthwise.mongo.slow")
+if not slow_log.handlers:
+    _handler = logging.FileHandler(os.environ["MONGO_SLOW_LOG"]) if os.getenv("MONGO_SLOW_LOG") \
+        else logging.StreamHandler(sys.stderr)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    slow_log.addHandler(_handler)
+    slow_log.setLevel(logging.INFO)
+    slow_log.propagate = False
+
+
+class RequestProfile:
+    __slots__ = ("route", "commands", "duration_ms", "documents", "bytes", "by_command")
+
+    def __init__(self, route: str):
+        self.route = route
+        self.commands = 0
+        self.duration_ms = 0.0
+        self.documents = 0
+        self.bytes = 0
+        self.by_command: Dict[str, int] = {}
+
+    def server_timing(self) -> str:
+        desc = " ".join([f"{self.commands} cmds"] + [f"{name}x{n}" for name, n in self.by_command.items()])
+        returned = f"{self.documents} docs {self.bytes} B" if MEASURE_SIZES else f"{self.documents} docs"
+        return f'mongo;dur={self.duration_ms:.2f};desc="{desc}", mongo-docs;desc="{returned}"'
+
+
+_current: ContextVar[Optional[RequestProfile]] = ContextVar("mongo_request_profile", default=None)
+
+
+def _returned_documents(reply: Dict[str, Any]) -> int:
+    cursor = reply.get("cursor")
+    if isinstance(cursor, dict):
+        return len(cursor.get("firstBatch") or cursor.get("nextBatch") or [])
+    return int(reply.get("n", 0)) if "n" in reply else 0
+
+
+def _command_shape(name: str, command: Dict[str, Any]) -> Dict[str, Any]:
+    """Small, JSON-safe summary of a command for the slow log."""
+    shape: Dict[str, Any] = {"collection": command.get(name)}
+    for key in ("filter", "pipeline", "sort", "projection", "limit", "updates", "deletes"):
+        if key in command:
+            value = command[key]
+            shape[key] = json.loads(json.dumps(value[:5] if isinstance(value, list) else value, default=str))
+    return shape
+
+
+class CommandProfiler(monitoring.CommandListener):
+    def __init__(self):
+        # Commands by request id, only kept until they finish; the slow-log
+        # summary is built from them only when a command turns out to be slow.
+        self._pending: Dict[int, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        with self._lock:
+            self._pending[event.request_id] = event.command
+
+    def _finish(self, event, reply: Optional[Dict[str, Any]], failure: Optional[Any] = None):
+        with self._lock:
+            command = self._pending.pop(event.request_id, None)
+        duration_ms = event.duration_micros / 1000.0
+        documents = _returned_documents(reply) if reply else 0
+        slow = duration_ms >= SLOW_MS
+        size = len(bson.encode(reply)) if reply and (MEASURE_SIZES or slow) else 0
+
+        profile = _current.get()
+        if profile is not None:
+            profile.commands += 1
+            profile.duration_ms += duration_ms
+            profile.documents += documents
+            profile.bytes += size
+            profile.by_command[event.command_name] = profile.by_command.get(event.command_name, 0) + 1
+
+        if slow:
+            slow_log.info(json.dumps({
+                "ts": datetime.utcnow().isoformat(),
+                "command": event.command_name,
+                "database": event.database_name,
+                "duration_ms": round(duration_ms, 2),
+                "documents": documents,
+                "reply_bytes": size,
+                "route": profile.route if profile else None,
+                "failed": failure is not None,
+                "failure": str(failure) if failure is not None else None,
+                **(_command_shape(event.command_name, command) if command else {}),
+            }, default=str))
+
+    def succeeded(self, event):
+        self._finish(event, event.reply)
+
+    def failed(self, event):
+        self._finish(event, None, event.failure)
+
+
+command_profiler = CommandProfiler()
+
+
+def start_request_profile(route: str):
+    return _current.set(RequestProfile(route))
+
+
+def current_profile() -> Optional[RequestProfile]:
+    return _current.get()
+
+
+def end_request_profile(token) -> None:
+    _current.reset(token)
+
+
+def init_mongo_profiling(app) -> None:
+    """Attribute Mongo commands to Flask requests and report them in Server-Timing."""
+    from flask import g, request
+
+    @app.before_request
+    def _start_mongo_profile():
+        rule = request.url_rule
+        g._mongo_profile_token = start_request_profile(rule.rule if rule is not None else request.path)
+
+    @app.after_request
+    def _add_server_timing(response):
+        profile = current_profile()
+        if profile is not None:
+            response.headers.add("Server-Timing", profile.server_timing())
+        return response
+
+    @app.teardown_request
+    def _end_mongo_profile(exc):
+        token = g.pop("_mongo_profile_token", None)
+        if token is not None:
+            end_request_profile(token)
@@ -1,25 +1,17 @@
 from datetime import datetime
 import os
-from typing import List, Dict
+import sys
+import time
+from typing import Any, List, Dict
 
 from dotenv import load_dotenv
 from pymongo import MongoClient
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.financial_summary import asset_category, asset_category_expr, refresh_assets_stages, write_section
 
-def normalize_asset_category(asset: Dict) -> str:
-    t = (asset.get("type") or "").lower()
-    n = (asset.get("name") or "").lower()
-    if "mutual" in t or "fund" in n:
-        return "investments"
-    if "stock" in t or "equity" in t:
-        return "investments"
-    if "ppf" in t or "fd" in t or "ppf" in n or "fixed" in t:
-        return "bank"
-    if "gold" in t or "gold" in n:
-        return "other"
-    if "real" in t or "apartment" in n or "property" in n:
-        return "realestate"
-    return asset.get("category") or "investments"
+# The summary's category rules, so the stored ``category`` and summary.allocation agree.
+normalize_asset_category = asset_category
 
 
 def build_demo_liabilities() -> List[Dict]:
@@ -100,15 +92,13 @@ def enrich_user(email: str) -> Dict:
         ]
         incomes = incomes + extra_incomes
 
-    users.update_one(
-        {"email": email},
-        {"$set": {
-            "assets": normalized_assets,
-            "liabilities": liabilities,
-            "income_sources": incomes,
-            "migrated_at": datetime.utcnow(),
-        }}
-    )
+    # Sections and the recomputed summary go out in one versioned update.
+    write_section(email, {
+        "assets": normalized_assets,
+        "liabilities": liabilities,
+        "income_sources": incomes,
+        "migrated_at": datetime.utcnow(),
+    }, users)
 
     updated = users.find_one({"email": email}, {"_id": 0})
     return {
@@ -118,13 +108,89 @@ def enrich_user(email: str) -> Dict:
     }
 
 
+# Sections every user document is expected to carry; legacy ``income`` arrays
+# are carried over into ``income_sources``.
+SECTION_DEFAULTS: Dict[str, Any] = {
+    "liabilities": {"$ifNull": ["$liabilities", []]},
+    "income_sources": {"$ifNull": ["$income_sources", {"$ifNull": ["$income", []]}]},
+    "expenses": {"$ifNull": ["$expenses", []]},
+    "financial_goals": {"$ifNull": ["$financial_goals", []]},
+    "bank_accounts": {"$ifNull": ["$bank_accounts", []]},
+    "risk_profile": {"$ifNull": ["$risk_profile", None]},
+    "portfolio_allocation": {"$ifNull": ["$portfolio_allocation", None]},
+}
+
+
+def build_enrich_pipeline(now: datetime = None) -> List[Dict]:
+    """Update pipeline that normalizes asset categories, backfills missing sections
+    and refreshes the asset totals and allocation of a stored summary (bumping its version)."""
+    now = now or datetime.utcnow()
+    return [{"$set": {
+        "assets": {"$map": {
+            "input": {"$ifNull": ["$assets", []]},
+            "as": "a",
+            "in": {"$mergeObjects": ["$$a", {"category": asset_category_expr("$$a")}]},
+        }},
+        **SECTION_DEFAULTS,
+        "enriched_at": now,
+    }}] + refresh_assets_stages(now)
+
+
+def enrich_all_users(batch_size: int = 5000, query: Dict = None) -> Dict:
+    """
+    Bulk variant of ``enrich_user`` for every user, run entirely inside Mongo.
+
+    Users are processed in ``_id`` ranges of ``batch_size``; each range is one
+    ``update_many`` with an aggregation pipeline, so no user documents are
+    read back by the client. The demo-only extras (sample real estate, demo
+    liabilities and incomes) are not added here.
+    """
+    load_dotenv()
+    client = MongoClient(os.getenv("MONGODB_URI"))
+    users = client["wealthwise"]["users"]
+    query = query or {}
+
+    total = users.count_documents(query)
+    totals = {"users": total, "matched": 0, "modified": 0, "batches": 0}
+    started = time.perf_counter()
+    last_id = None
+    while True:
+        range_filter = dict(query, _id={"$gt": last_id}) if last_id is not None else dict(query)
+        # Walk the _id index to the end of the range; only one _id crosses the wire.
+        boundary = list(users.find(range_filter, {"_id": 1}).sort("_id", 1).skip(batch_size - 1).limit(1))
+        if boundary:
+            range_filter["_id"] = dict(range_filter.get("_id", {}), **{"$lte": boundary[0]["_id"]})
+
+        result = users.update_many(range_filter, build_enrich_pipeline())
+        totals["matched"] += result.matched_count
+        totals["modified"] += result.modified_count
+        totals["batches"] += 1
+        elapsed = time.perf_counter() - started
+        print(f"  - {totals['matched']}/{total} users "
+              f"({totals['matched'] / elapsed if elapsed else 0:,.0f} users/s)")
+
+        if not boundary:
+            break
+        last_id = boundary[0]["_id"]
+
+    totals["seconds"] = round(time.perf_counter() - started, 2)
+    return totals
+
+
 if __name__ == "__main__":
     import argparse
     parser = argparse.ArgumentParser(description="Enrich a Mongo user with normalized assets and demo liabilities if missing")
-    parser.add_argument("--email", required=True, help="User email to enrich")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--email", help="User email to enrich")
+    target.add_argument("--all-users", action="store_true", help="Normalize and backfill every user server-side")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Users per update_many (--all-users)")
     args = parser.parse_args()
-    res = enrich_user(args.email)
-    print("✅ Enriched user:")
+    if args.all_users:
+        res = enrich_all_users(args.batch_size)
+        print("✅ Enriched all users:")
+    else:
+        res = enrich_user(args.email)
+        print("✅ Enriched user:")
     for k, v in res.items():
         print(f"  - {k}: {v}")
 
@@ -1,10 +1,14 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import os
 import sys
+import time
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 from dotenv import load_dotenv
+from pymongo import UpdateOne
 import sqlite3
 
 # Ensure project root is on sys.path for imports like backend.database.*
@@ -58,10 +62,116 @@ def _get_or_create_user_doc(email: str, name_parts: Dict[str, str]) -> Dict[str,
     return users.find_one({"email": email})
 
 
-def migrate_demo_data_to_user(target_email: str) -> Dict[str, Any]:
-    load_dotenv()
+def _float(value: Any) -> Optional[float]:
+    return float(value) if value is not None else None
 
-    # Initialize SQLite DB access
+
+def _bank_account_doc(b: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "bank_name": b.get("bank_name"),
+        "account_type": b.get("account_type"),
+        "current_balance": _float(b.get("current_balance")),
+        "date_updated": b.get("last_updated"),
+    }
+
+
+def _asset_doc(a: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "name": a.get("name"),
+        "type": a.get("type"),
+        "category": a.get("category"),
+        "current_value": _float(a.get("current_value")),
+        "quantity": _float(a.get("quantity")),
+        "date_updated": a.get("last_updated"),
+    }
+
+
+def _liability_doc(l: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "name": l.get("name"),
+        "type": l.get("type"),
+        "current_balance": _float(l.get("current_balance")),
+        "interest_rate": _float(l.get("interest_rate")),
+        "monthly_payment": _float(l.get("monthly_payment")),
+        "start_date": l.get("start_date"),
+        "maturity_date": l.get("maturity_date"),
+        "date_updated": l.get("last_updated"),
+    }
+
+
+def _income_doc(i: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "source_name": i.get("source_name"),
+        "amount": _float(i.get("amount")),
+        "frequency": i.get("frequency"),
+        "income_type": i.get("income_type"),
+    }
+
+
+def _expense_doc(e: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "category": e.get("category"),
+        "amount": _float(e.get("amount")),
+        "frequency": e.get("frequency"),
+        "expense_type": e.get("expense_type"),
+    }
+
+
+def _goal_doc(g: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "title": g.get("title"),
+        "description": g.get("description"),
+        "target_amount": _float(g.get("target_amount")),
+        "current_amount": _float(g.get("current_amount")),
+        "target_date": g.get("target_date"),
+        "goal_type": g.get("goal_type"),
+        "priority": g.get("priority"),
+        "is_completed": bool(g.get("is_completed")) if g.get("is_completed") is not None else False,
+    }
+
+
+def _risk_doc(risk: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if not risk:
+        return None
+    return {
+        "risk_score": int(risk.get("risk_score")) if risk.get("risk_score") is not None else None,
+        "time_horizon": risk.get("time_horizon"),
+        "risk_capacity": risk.get("risk_capacity"),
+        "investment_experience": risk.get("investment_experience"),
+        "financial_goals": risk.get("financial_goals"),
+    }
+
+
+def _portfolio_doc(portfolio: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if not portfolio:
+        return None
+    return {
+        "allocation_name": portfolio.get("allocation_name"),
+        "risk_profile": portfolio.get("risk_profile"),
+        "equity_percentage": _float(portfolio.get("equity_percentage")),
+        "debt_percentage": _float(portfolio.get("debt_percentage")),
+        "gold_percentage": _float(portfolio.get("gold_percentage")),
+        "international_percentage": _float(portfolio.get("international_percentage")),
+        "cash_percentage": _float(portfolio.get("cash_percentage")),
+    }
+
+
+def _user_sections(bank_accounts, assets, liabilities, income_sources, expenses, goals,
+                   risk, portfolio) -> Dict[str, Any]:
+    """Mongo user document sections from the SQLite rows of one user."""
+    return {
+        "bank_accounts": [_bank_account_doc(b) for b in bank_accounts],
+        "assets": [_asset_doc(a) for a in assets],
+        "liabilities": [_liability_doc(l) for l in liabilities],
+        "income_sources": [_income_doc(i) for i in income_sources],
+        "expenses": [_expense_doc(e) for e in expenses],
+        "financial_goals": [_goal_doc(g) for g in goals],
+        "risk_profile": _risk_doc(risk),
+        "portfolio_allocation": _portfolio_doc(portfolio),
+    }
+
+
+def _connect_sqlite(**kwargs) -> sqlite3.Connection:
     default_sqlite = str(PROJECT_ROOT / "backend" / "database" / "wealthwise.db")
     sqlite_path = os.getenv("SQLITE_DB_PATH", default_sqlite)
     if not os.path.exists(sqlite_path):
@@ -69,7 +179,14 @@ def migrate_demo_data_to_user(target_email: str) -> Dict[str, Any]:
         alt_sqlite = str(PROJECT_ROOT / "database" / "wealthwise.db")
         if os.path.exists(alt_sqlite):
             sqlite_path = alt_sqlite
-    conn = sqlite3.connect(sqlite_path)
+    return sqlite3.connect(sqlite_path, **kwargs)
+
+
+def migrate_demo_data_to_user(target_email: str) -> Dict[str, Any]:
+    load_dotenv()
+
+    # Initialize SQLite DB access
+    conn = _connect_sqlite()
 
     # Resolve a source demo user to copy from; prefer 'moderate' scenario if available
     source_user = _fetch_single(
@@ -139,94 +256,7 @@ def migrate_demo_data_to_user(target_email: str) -> Dict[str, Any]:
 
     update_doc: Dict[str, Any] = {
         "name": f"{(source_user.get('first_name') or '').strip()} {(source_user.get('last_name') or '').strip()}".strip() or user_doc.get("name") or target_email,
-        "bank_accounts": [
-            {
-                "bank_name": b.get("bank_name"),
-                "account_type": b.get("account_type"),
-                "current_balance": float(b.get("current_balance")) if b.get("current_balance") is not None else None,
-                "date_updated": b.get("last_updated"),
-            }
-            for b in bank_accounts
-        ],
-        "assets": [
-            {
-                "name": a.get("name"),
-                "type": a.get("type"),
-                "category": a.get("category"),
-                "current_value": float(a.get("current_value")) if a.get("current_value") is not None else None,
-                "quantity": float(a.get("quantity")) if a.get("quantity") is not None else None,
-                "date_updated": a.get("last_updated"),
-            }
-            for a in assets
-        ],
-        "liabilities": [
-            {
-                "name": l.get("name"),
-                "type": l.get("type"),
-                "current_balance": float(l.get("current_balance")) if l.get("current_balance") is not None else None,
-                "interest_rate": float(l.get("interest_rate")) if l.get("interest_rate") is not None else None,
-                "monthly_payment": float(l.get("monthly_payment")) if l.get("monthly_payment") is not None else None,
-                "start_date": l.get("start_date"),
-                "maturity_date": l.get("maturity_date"),
-                "date_updated": l.get("last_updated"),
-            }
-            for l in liabilities
-        ],
-        "income_sources": [
-            {
-                "source_name": i.get("source_name"),
-                "amount": float(i.get("amount")) if i.get("amount") is not None else None,
-                "frequency": i.get("frequency"),
-                "income_type": i.get("income_type"),
-            }
-            for i in income_sources
-        ],
-        "expenses": [
-            {
-                "category": e.get("category"),
-                "amount": float(e.get("amount")) if e.get("amount") is not None else None,
-                "frequency": e.get("frequency"),
-                "expense_type": e.get("expense_type"),
-            }
-            for e in expenses
-        ],
-        "financial_goals": [
-            {
-                "title": g.get("title"),
-                "description": g.get("description"),
-                "target_amount": float(g.get("target_amount")) if g.get("target_amount") is not None else None,
-                "current_amount": float(g.get("current_amount")) if g.get("current_amount") is not None else None,
-                "target_date": g.get("target_date"),
-                "goal_type": g.get("goal_type"),
-                "priority": g.get("priority"),
-                "is_completed": bool(g.get("is_completed")) if g.get("is_completed") is not None else False,
-            }
-            for g in goals
-        ],
-        "risk_profile": (
-            {
-                "risk_score": int(risk.get("risk_score")) if risk and risk.get("risk_score") is not None else None,
-                "time_horizon": risk.get("time_horizon") if risk else None,
-                "risk_capacity": risk.get("risk_capacity") if risk else None,
-                "investment_experience": risk.get("investment_experience") if risk else None,
-                "financial_goals": risk.get("financial_goals") if risk else None,
-            }
-            if risk
-            else None
-        ),
-        "portfolio_allocation": (
-            {
-                "allocation_name": portfolio.get("allocation_name"),
-                "risk_profile": portfolio.get("risk_profile"),
-                "equity_percentage": float(portfolio.get("equity_percentage")) if portfolio.get("equity_percentage") is not None else None,
-                "debt_percentage": float(portfolio.get("debt_percentage")) if portfolio.get("debt_percentage") is not None else None,
-                "gold_percentage": float(portfolio.get("gold_percentage")) if portfolio.get("gold_percentage") is not None else None,
-                "international_percentage": float(portfolio.get("international_percentage")) if portfolio.get("international_percentage") is not None else None,
-                "cash_percentage": float(portfolio.get("cash_percentage")) if portfolio.get("cash_percentage") is not None else None,
-            }
-            if portfolio
-            else None
-        ),
+        **_user_sections(bank_accounts, assets, liabilities, income_sources, expenses, goals, risk, portfolio),
         "migrated_from_sqlite": True,
         "migrated_at": datetime.utcnow(),
     }
@@ -253,14 +283,187 @@ def migrate_demo_data_to_user(target_email: str) -> Dict[str, Any]:
     }
 
 
+# Streamed once per table in user_id order. Within a user, rows keep the
+# ordering the single-user migration uses; for the single-row sections the
+# newest row comes first.
+SECTION_QUERIES: Dict[str, str] = {
+    "bank_accounts": "SELECT * FROM bank_accounts WHERE user_id > ? ORDER BY user_id, current_balance DESC",
+    "assets": "SELECT * FROM assets WHERE user_id > ? ORDER BY user_id, last_updated DESC",
+    "liabilities": "SELECT * FROM liabilities WHERE user_id > ? ORDER BY user_id, last_updated DESC",
+    "income_sources": "SELECT * FROM income_sources WHERE user_id > ? AND is_active = 1 ORDER BY user_id",
+    "expenses": "SELECT * FROM expenses WHERE user_id > ? AND is_active = 1 ORDER BY user_id",
+    "financial_goals": "SELECT * FROM financial_goals WHERE user_id > ? ORDER BY user_id, target_date ASC",
+    "risk_profile": "SELECT * FROM risk_profiles WHERE user_id > ? ORDER BY user_id, created_at DESC",
+    "portfolio_allocation": "SELECT * FROM portfolio_allocations WHERE user_id > ? ORDER BY user_id, created_at DESC",
+}
+CHECKPOINT_TABLE = "mongo_migration_checkpoints"
+
+
+def _stream_rows(conn: sqlite3.Connection, query: str, params: tuple, fetch_size: int) -> Iterator[Dict[str, Any]]:
+    cur = conn.cursor()
+    cur.execute(query, params)
+    columns = [desc[0] for desc in cur.description]
+    while True:
+        rows = cur.fetchmany(fetch_size)
+        if not rows:
+            return
+        for r in rows:
+            yield {columns[i]: r[i] for i in range(len(columns))}
+
+
+class _GroupedRows:
+    """Yields the rows of one user at a time from a stream sorted by user_id."""
+
+    def __init__(self, rows: Iterator[Dict[str, Any]]):
+        self._rows = rows
+        self._head = next(rows, None)
+
+    def take(self, user_id: int) -> List[Dict[str, Any]]:
+        # Rows for user ids that are not in ``users`` are orphans and skipped.
+        while self._head is not None and self._head["user_id"] < user_id:
+            self._head = next(self._rows, None)
+        group = []
+        while self._head is not None and self._head["user_id"] == user_id:
+            group.append(self._head)
+            self._head = next(self._rows, None)
+        return group
+
+
+def _stream_user_docs(conn: sqlite3.Connection, after_user_id: int,
+                      fetch_size: int) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """(user id, $set document) for every SQLite user after ``after_user_id``, in one pass per table."""
+    sections = {
+        name: _GroupedRows(_stream_rows(conn, query, (after_user_id,), fetch_size))
+        for name, query in SECTION_QUERIES.items()
+    }
+    users = _stream_rows(conn, "SELECT * FROM users WHERE id > ? ORDER BY id", (after_user_id,), fetch_size)
+    for user in users:
+        rows = {name: grouped.take(user["id"]) for name, grouped in sections.items()}
+        if not user.get("email"):
+            continue
+        name = f"{(user.get('first_name') or '').strip()} {(user.get('last_name') or '').strip()}".strip()
+        doc = _user_sections(
+            rows["bank_accounts"], rows["assets"], rows["liabilities"], rows["income_sources"],
+            rows["expenses"], rows["financial_goals"],
+            rows["risk_profile"][0] if rows["risk_profile"] else None,
+            rows["portfolio_allocation"][0] if rows["portfolio_allocation"] else None,
+        )
+        doc.update({
+            "email": user["email"],
+            "name": name or user["email"],
+            "migrated_from_sqlite": True,
+            "migrated_at": datetime.utcnow(),
+        })
+        yield user["id"], doc
+
+
+def _write_batch(ops: List[UpdateOne]) -> int:
+    result = get_users_collection().bulk_write(ops, ordered=False)
+    return result.upserted_count + result.modified_count
+
+
+def _ensure_checkpoint_table(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        f"CREATE TABLE IF NOT EXISTS {CHECKPOINT_TABLE} ("
+        "name TEXT PRIMARY KEY, last_user_id INTEGER NOT NULL, users_migrated INTEGER NOT NULL, "
+        "status TEXT NOT NULL, updated_at TEXT NOT NULL)"
+    )
+
+
+def _load_checkpoint(conn: sqlite3.Connection, name: str) -> int:
+    row = conn.execute(
+        f"SELECT last_user_id FROM {CHECKPOINT_TABLE} WHERE name = ? AND status = 'running'", (name,)
+    ).fetchone()
+    return row[0] if row else 0
+
+
+def _save_checkpoint(conn: sqlite3.Connection, name: str, last_user_id: int, users_migrated: int,
+                     status: str = "running") -> None:
+    conn.execute(
+        f"INSERT OR REPLACE INTO {CHECKPOINT_TABLE} (name, last_user_id, users_migrated, status, updated_at) "
+        "VALUES (?, ?, ?, ?, ?)",
+        (name, last_user_id, users_migrated, status, datetime.utcnow().isoformat()),
+    )
+
+
+def migrate_all_users(batch_size: int = 1000, writers: int = 4, fetch_size: int = 5000,
+                      resume: bool = False, checkpoint_name: str = "all_users") -> Dict[str, Any]:
+    """
+    Migrate every SQLite user into its own Mongo user document (matched by email).
+
+    Each table is read once in user_id order and merged per user; documents are
+    upserted in unordered ``bulk_write`` batches by a pool of writer threads.
+    The checkpoint records the last user of the contiguous prefix of batches
+    that have been written, so ``resume`` never skips an unwritten user.
+    """
+    load_dotenv()
+    # Autocommit so checkpoint writes go through while the table cursors are open.
+    conn = _connect_sqlite(isolation_level=None)
+    _ensure_checkpoint_table(conn)
+    after = _load_checkpoint(conn, checkpoint_name) if resume else 0
+    if after:
+        print(f"↻ Resuming after SQLite user id {after}")
+    users_before = conn.execute("SELECT COUNT(*) FROM users WHERE id > ?", (after,)).fetchone()[0]
+
+    totals = {"users": 0, "written": 0}
+    started = time.perf_counter()
+    pending: deque = deque()
+
+    def drain(limit: int) -> None:
+        while len(pending) > limit:
+            last_id, count, future = pending.popleft()
+            totals["written"] += future.result()
+            totals["users"] += count
+            _save_checkpoint(conn, checkpoint_name, last_id, totals["users"])
+            elapsed = time.perf_counter() - started
+            print(f"  - {totals['users']}/{users_before} users "
+                  f"({totals['users'] / elapsed if elapsed else 0:,.0f} users/s)")
+
+    with ThreadPoolExecutor(max_workers=writers) as pool:
+        batch: List[UpdateOne] = []
+        last_id = after
+        for last_id, doc in _stream_user_docs(conn, after, fetch_size):
+            batch.append(UpdateOne(
+                {"email": doc["email"]},
+                {"$set": doc, "$setOnInsert": {"created_at": datetime.utcnow()}},
+                upsert=True,
+            ))
+            if len(batch) >= batch_size:
+                pending.append((last_id, len(batch), pool.submit(_write_batch, batch)))
+                batch = []
+                drain(writers * 2)
+        if batch:
+            pending.append((last_id, len(batch), pool.submit(_write_batch, batch)))
+        drain(0)
+
+    _save_checkpoint(conn, checkpoint_name, last_id, totals["users"], status="completed")
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+    totals["last_user_id"] = last_id
+    totals["seconds"] = round(time.perf_counter() - started, 2)
+    return totals
+
+
 if __name__ == "__main__":
     import argparse
 
     parser = argparse.ArgumentParser(description="Migrate demo SQLite data to a Mongo user doc")
-    parser.add_argument("--email", required=True, help="Target user email in MongoDB")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--email", help="Target user email in MongoDB")
+    target.add_argument("--all-users", action="store_true", help="Migrate every SQLite user to its own Mongo doc")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Users per bulk_write (--all-users)")
+    parser.add_argument("--writers", type=int, default=4, help="Parallel bulk_write threads (--all-users)")
+    parser.add_argument("--fetch-size", type=int, default=5000, help="SQLite rows fetched per round trip (--all-users)")
+    parser.add_argument("--resume", action="store_true", help="Continue an interrupted --all-users run")
     args = parser.parse_args()
 
-    result = migrate_demo_data_to_user(args.email)
+    if args.all_users:
+        result = migrate_all_users(args.batch_size, args.writers, args.fetch_size, args.resume)
+    else:
+        result = migrate_demo_data_to_user(args.email)
     print("✅ Migration complete:")
     for k, v in result.items():
         print(f"  - {k}: {v}")
@@ -4,9 +4,11 @@ import os
 from pymongo import MongoClient
 from datetime import datetime
 
+from .command_profiler import command_profiler
+
 load_dotenv()
 MONGODB_URI = os.getenv("MONGODB_URI")
-client = MongoClient(MONGODB_URI)
+client = MongoClient(MONGODB_URI, event_listeners=[command_profiler])
 db = client["wealthwise"]
 
 # Collection getters
@@ -32,6 +34,9 @@ def get_stock_analysis_collection():
 def get_chatbot_conversations_collection():
     return db["chatbot_conversations"]
 
+def get_analytics_rollups_collection():
+    return db["analytics_rollups"]
+
 # Stock operations
 def insert_stock(stock_data):
     stocks = get_stocks_collection()
@@ -45,6 +50,17 @@ def get_all_stocks():
     stocks = get_stocks_collection()
     return list(stocks.find({}, {"_id": 0}))
 
+def get_stocks_page(limit, after=None):
+    """Keyset page of stocks ordered by symbol, starting after the ``after`` symbol."""
+    stocks = get_stocks_collection()
+    query = {"symbol": {"$gt": after}} if after else {}
+    return list(stocks.find(query, {"_id": 0}).sort("symbol", 1).limit(limit))
+
+def iter_stocks(batch_size=500):
+    """Cursor over all stocks ordered by symbol, fetched ``batch_size`` at a time."""
+    stocks = get_stocks_collection()
+    return stocks.find({}, {"_id": 0}).sort("symbol", 1).batch_size(batch_size)
+
 def get_stock_by_symbol(symbol):
     stocks = get_stocks_collection()
     return stocks.find_one({"symbol": symbol}, {"_id": 0})
@@ -59,9 +75,24 @@ def get_stock_analysis(symbol):
     analysis = get_stock_analysis_collection()
     return list(analysis.find(
         {"symbol": symbol},
-        {"_id": 0}
+        {"_id": 0, "indicator_state": 0, "input_hash": 0}
     ).sort("timestamp", -1))
 
+# Demo user listing
+DEMO_USER_PROJECTION = {"_id": 0, "password_hash": 0}
+
+def get_demo_users_page(limit, after=None):
+    """Keyset page of demo users ordered by email, starting after the ``after`` email."""
+    users = get_users_collection()
+    query = {"is_demo_user": True}
+    if after:
+        query["email"] = {"$gt": after}
+    return list(users.find(query, DEMO_USER_PROJECTION).sort("email", 1).limit(limit))
+
+def iter_demo_users(batch_size=500):
+    users = get_users_collection()
+    return users.find({"is_demo_user": True}, DEMO_USER_PROJECTION).sort("email", 1).batch_size(batch_size)
+
 # Analysis type operations
 def get_analysis_types_collection():
     return db["analysis_types"]
@@ -0,0 +1,184 @@
+"""
+Batch regeneration of ``stock_analysis`` for every symbol in ``stocks``.
+
+Symbols are processed in sorted chunks: analyses are computed across a
+process pool and each chunk is written with one unordered ``bulk_write``.
+Progress is checkpointed in ``analysis_jobs`` so an interrupted run can be
+resumed with the options it was started with; starting a run marks older
+unfinished ones ``abandoned``. ``--incremental`` skips symbols whose inputs (stored prices for
+technical, the stock document plus sector medians for fundamental) have not
+changed since the last run.
+
+    python database/regenerate_analysis.py --workers 8 --incremental
+    python database/regenerate_analysis.py --resume
+"""
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import hashlib
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+
+from dotenv import load_dotenv
+from pymongo import MongoClient, UpdateOne
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.fundamentals import build_fundamental_document, sector_medians
+from services.indicators import TECHNICAL_STATE_PROJECTION, build_technical_document
+from services.price_store import CLOSE, DATE, HIGH, LOW, get_price_store
+
+ANALYSIS_TYPES = ("technical", "fundamental")
+
+
+def _hash(value: Any) -> str:
+    return hashlib.sha1(json.dumps(value, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def _technical_input_hash(data) -> str:
+    return _hash([int(data.shape[1]), float(data[DATE][0]), float(data[DATE][-1]),
+                  float(data[CLOSE][-1]), float(data[HIGH][-1]), float(data[LOW][-1])])
+
+
+def _compute_chunk(stocks: List[Dict], existing: Dict[Tuple[str, str], Dict], medians: Dict,
+                   types: Tuple[str, ...], incremental: bool) -> Tuple[List[Tuple[Dict, Dict]], Dict[str, int]]:
+    """Runs in a worker process; returns (filter, $set document) pairs and counters."""
+    store = get_price_store()
+    writes: List[Tuple[Dict, Dict]] = []
+    stats = {"written": 0, "unchanged": 0, "no_prices": 0}
+
+    for stock in stocks:
+        symbol = stock["symbol"]
+        if "technical" in types:
+            data = store.load(symbol)
+            if data is None or data.shape[1] == 0:
+                stats["no_prices"] += 1
+            else:
+                prev = existing.get((symbol, "technical"))
+                input_hash = _technical_input_hash(data)
+                if incremental and prev and prev.get("input_hash") == input_hash:
+                    stats["unchanged"] += 1
+                else:
+                    doc = build_technical_document(symbol, data, prev if incremental else None)
+                    if doc is None:
+                        stats["unchanged"] += 1
+                    else:
+                        doc["input_hash"] = input_hash
+                        writes.append(({"symbol": symbol, "type": "technical"}, doc))
+
+        if "fundamental" in types:
+            prev = existing.get((symbol, "fundamental"))
+            input_hash = _hash([stock, medians.get(stock.get("sector") or "Other")])
+            if incremental and prev and prev.get("input_hash") == input_hash:
+                stats["unchanged"] += 1
+            else:
+                doc = build_fundamental_document(stock, medians)
+                doc["input_hash"] = input_hash
+                writes.append(({"symbol": symbol, "type": "fundamental"}, doc))
+
+    stats["written"] = len(writes)
+    return writes, stats
+
+
+def _existing_docs(analysis, symbols: List[str], types: Tuple[str, ...]) -> Dict[Tuple[str, str], Dict]:
+    projection = dict(TECHNICAL_STATE_PROJECTION, type=1, input_hash=1)
+    cursor = analysis.find({"symbol": {"$in": symbols}, "type": {"$in": list(types)}}, projection)
+    return {(d["symbol"], d["type"]): d for d in cursor}
+
+
+def regenerate_analyses(workers: int = 4, chunk_size: int = 200, incremental: bool = False,
+                        resume: bool = False, types: Tuple[str, ...] = ANALYSIS_TYPES) -> Dict[str, Any]:
+    load_dotenv()
+    client = MongoClient(os.getenv("MONGODB_URI"))
+    db = client["wealthwise"]
+    analysis, jobs = db["stock_analysis"], db["analysis_jobs"]
+
+    stocks = list(db["stocks"].find({}, {"_id": 0}).sort("symbol", 1))
+    medians = sector_medians(stocks)
+
+    job = jobs.find_one({"status": "running"}, sort=[("started_at", -1)]) if resume else None
+    if job:
+        stocks = [s for s in stocks if s["symbol"] > (job.get("last_symbol") or "")]
+        incremental = job.get("incremental", incremental)
+        types = tuple(job.get("types") or types)
+        print(f"↻ Resuming job {job['_id']} after {job.get('last_symbol')} "
+              f"(types={','.join(types)}, incremental={incremental})")
+    else:
+        if resume:
+            print("⚠️ No interrupted job to resume, starting a new run")
+        job_id = jobs.insert_one({
+            "status": "running",
+            "started_at": datetime.utcnow(),
+            "incremental": incremental,
+            "types": list(types),
+            "last_symbol": None,
+            "total_symbols": len(stocks),
+        }).inserted_id
+        job = jobs.find_one({"_id": job_id})
+    # Runs that died without completing will not be resumed once another one starts.
+    jobs.update_many({"status": "running", "_id": {"$ne": job["_id"]}},
+                     {"$set": {"status": "abandoned", "abandoned_at": datetime.utcnow()}})
+
+    totals = {"symbols": 0, "written": 0, "unchanged": 0, "no_prices": 0}
+    chunks = [stocks[i:i + chunk_size] for i in range(0, len(stocks), chunk_size)]
+    started = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending: deque = deque()
+        next_chunk = 0
+        while next_chunk < len(chunks) or pending:
+            # Keep a bounded window of chunks in flight; results are consumed in
+            # order so the checkpoint always marks a contiguous prefix as done.
+            while next_chunk < len(chunks) and len(pending) < workers * 2:
+                chunk = chunks[next_chunk]
+                existing = _existing_docs(analysis, [s["symbol"] for s in chunk], types)
+                pending.append((chunk, pool.submit(_compute_chunk, chunk, existing, medians, types, incremental)))
+                next_chunk += 1
+
+            chunk, future = pending.popleft()
+            writes, stats = future.result()
+            if writes:
+                analysis.bulk_write([UpdateOne(f, {"$set": d}, upsert=True) for f, d in writes], ordered=False)
+            for k, v in stats.items():
+                totals[k] += v
+            totals["symbols"] += len(chunk)
+            jobs.update_one({"_id": job["_id"]}, {"$set": {
+                "last_symbol": chunk[-1]["symbol"],
+                "updated_at": datetime.utcnow(),
+            }, "$inc": {"processed_symbols": len(chunk), "written": stats["written"]}})
+
+            elapsed = time.perf_counter() - started
+            print(f"  - {totals['symbols']}/{len(stocks)} symbols, {totals['written']} written "
+                  f"({totals['symbols'] / elapsed if elapsed else 0:,.0f} symbols/s)")
+
+    jobs.update_one({"_id": job["_id"]}, {"$set": {"status": "completed", "completed_at": datetime.utcnow()}})
+    totals["seconds"] = round(time.perf_counter() - started, 2)
+    totals["job_id"] = str(job["_id"])
+    return totals
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Regenerate technical and fundamental stock_analysis documents")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4, help="Worker processes")
+    parser.add_argument("--chunk-size", type=int, default=200, help="Symbols per bulk_write")
+    parser.add_argument("--incremental", action="store_true", help="Only recompute symbols whose inputs changed")
+    parser.add_argument("--resume", action="store_true", help="Continue the last interrupted run")
+    parser.add_argument("--types", default=",".join(ANALYSIS_TYPES), help="Comma separated analysis types")
+    args = parser.parse_args()
+
+    types = tuple(t.strip() for t in args.types.split(",") if t.strip())
+    unknown = [t for t in types if t not in ANALYSIS_TYPES]
+    if unknown:
+        parser.error(f"unknown --types {', '.join(unknown)}; choose from {', '.join(ANALYSIS_TYPES)}")
+    if not types:
+        parser.error(f"--types selects nothing; choose from {', '.join(ANALYSIS_TYPES)}")
+    types = tuple(dict.fromkeys(types))
+    result = regenerate_analyses(args.workers, args.chunk_size, args.incremental, args.resume, types)
+    print("✅ Analysis regeneration complete:")
+    for k, v in result.items():
+        print(f"  - {k}: {v}")
@@ -0,0 +1,185 @@
+"""
+Parallel bulk seeder for synthetic users, stocks and analysis histories.
+
+Chunks are generated and written by a pool of worker processes, each with
+its own MongoClient, using batched unordered ``bulk_write`` calls. ``insert``
+mode (the default) is the fast path for empty collections and skips
+documents that already exist; ``upsert`` mode can be re-run over existing data. Analysis
+histories are always upserted on (symbol, timestamp, type), so re-runs never
+duplicate them.
+
+    python database/seed_synthetic.py --users 1000000 --stocks 5000 --history-days 30 --workers 8
+"""
+
+from datetime import datetime
+from multiprocessing import Pool
+import os
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+import numpy as np
+from pymongo import ASCENDING, DESCENDING, InsertOne, MongoClient, UpdateOne
+from pymongo.errors import BulkWriteError, OperationFailure
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.synthetic_data import generate_analysis_history, generate_stock, generate_users
+from services.price_store import get_price_store, to_day
+
+DUPLICATE_KEY = 11000
+# Technical and fundamental snapshots of a day share a timestamp, so the type is part of the key.
+HISTORY_KEY = ("symbol", "timestamp", "type")
+
+_db = None
+
+
+def _init_worker(uri: Optional[str]) -> None:
+    # One client per process: MongoClient must not be shared across a fork.
+    global _db
+    _db = MongoClient(uri)["wealthwise"]
+
+
+def _ops(docs: List[Dict], key: Tuple[str, ...], mode: str) -> List:
+    if mode == "insert":
+        return [InsertOne(d) for d in docs]
+    return [UpdateOne({k: d[k] for k in key}, {"$set": d}, upsert=True) for d in docs]
+
+
+def _bulk(collection, ops: List, batch_size: int) -> int:
+    written = 0
+    for i in range(0, len(ops), batch_size):
+        try:
+            result = collection.bulk_write(ops[i:i + batch_size], ordered=False)
+            written += result.inserted_count + result.upserted_count + result.modified_count
+        except BulkWriteError as e:
+            # Re-seeding in insert mode: existing documents are skipped, anything else is fatal.
+            if any(err.get("code") != DUPLICATE_KEY for err in e.details.get("writeErrors", [])):
+                raise
+            written += e.details.get("nInserted", 0)
+    return written
+
+
+def _seed_users(task: Tuple[int, int, int, int, str]) -> Tuple[str, int, int]:
+    start, count, seed, batch_size, mode = task
+    docs = generate_users(start, count, seed)
+    return "users", count, _bulk(_db["users"], _ops(docs, ("email",), mode), batch_size)
+
+
+def _synthetic_bars(price: float, days: int, rng: np.random.Generator) -> np.ndarray:
+    """Random-walk OHLCV ending at today's ``price``."""
+    end = to_day(datetime.utcnow())
+    returns = rng.normal(0.0003, 0.015, days)
+    close = price * np.exp(np.cumsum(returns) - returns.sum())
+    spread = np.abs(rng.normal(0, 0.008, days))
+    open_ = close * (1 + rng.normal(0, 0.004, days))
+    return np.vstack([
+        np.arange(end - days + 1, end + 1, dtype=np.float64),
+        open_,
+        np.maximum(close, open_) * (1 + spread),
+        np.minimum(close, open_) * (1 - spread),
+        close,
+        rng.integers(10_000, 5_000_000, days).astype(np.float64),
+    ])
+
+
+def _seed_stocks(task: Tuple[int, int, int, int, int, int, str]) -> Tuple[str, int, int]:
+    start, count, seed, history_days, price_days, batch_size, mode = task
+    stocks = [generate_stock(i, seed) for i in range(start, start + count)]
+    written = _bulk(_db["stocks"], _ops(stocks, ("symbol",), mode), batch_size)
+
+    if history_days:
+        history, latest = [], []
+        for stock in stocks:
+            docs = generate_analysis_history(stock, history_days, seed)
+            history.extend(docs)
+            latest.extend(docs[-2:])  # newest technical + fundamental snapshot
+        written += _bulk(_db["stock_analysis_history"], _ops(history, HISTORY_KEY, "upsert"), batch_size)
+        written += _bulk(_db["stock_analysis"], _ops(latest, ("symbol", "type"), "upsert"), batch_size)
+
+    if price_days:
+        store = get_price_store()
+        rng = np.random.default_rng(seed + start)
+        for stock in stocks:
+            store.write(stock["symbol"], _synthetic_bars(stock["current_price"], price_days, rng))
+    return "stocks", count, written
+
+
+def _ensure_indexes(db) -> None:
+    db["users"].create_index([("email", ASCENDING)], unique=True)
+    db["stocks"].create_index([("symbol", ASCENDING)], unique=True)
+    db["stock_analysis"].create_index([("symbol", ASCENDING), ("type", ASCENDING)])
+    history = db["stock_analysis_history"]
+    keys = [("symbol", ASCENDING), ("timestamp", DESCENDING), ("type", ASCENDING)]
+    try:
+        history.create_index(keys, unique=True)
+    except OperationFailure as e:
+        if e.code != DUPLICATE_KEY:
+            raise
+        # Earlier runs inserted snapshots twice: keep one per key, then index.
+        removed = _drop_duplicate_history(history)
+        print(f"⚠️ Removed {removed} duplicate analysis history snapshots")
+        history.create_index(keys, unique=True)
+
+
+def _drop_duplicate_history(history) -> int:
+    removed = 0
+    pipeline = [
+        {"$group": {"_id": {k: f"${k}" for k in HISTORY_KEY}, "ids": {"$push": "$_id"}, "n": {"$sum": 1}}},
+        {"$match": {"n": {"$gt": 1}}},
+    ]
+    for group in history.aggregate(pipeline, allowDiskUse=True):
+        removed += history.delete_many({"_id": {"$in": group["ids"][1:]}}).deleted_count
+    return removed
+
+
+def seed_synthetic(users: int = 0, stocks: int = 0, history_days: int = 0, price_days: int = 0,
+                   workers: int = 4, chunk_size: int = 5000, batch_size: int = 1000,
+                   mode: str = "insert", seed: int = 0) -> Dict[str, float]:
+    load_dotenv()
+    uri = os.getenv("MONGODB_URI")
+    _ensure_indexes(MongoClient(uri)["wealthwise"])
+
+    tasks = [(_seed_users, (s, min(chunk_size, users - s), seed, batch_size, mode))
+             for s in range(0, users, chunk_size)]
+    stock_chunk = max(1, chunk_size // max(1, 2 * history_days + 1))
+    tasks += [(_seed_stocks, (s, min(stock_chunk, stocks - s), seed, history_days, price_days, batch_size, mode))
+              for s in range(0, stocks, stock_chunk)]
+
+    totals = {"users": 0, "stocks": 0, "documents_written": 0}
+    started = time.perf_counter()
+    with Pool(processes=workers, initializer=_init_worker, initargs=(uri,)) as pool:
+        results = [pool.apply_async(fn, (args,)) for fn, args in tasks]
+        for result in results:
+            kind, count, written = result.get()
+            totals[kind] += count
+            totals["documents_written"] += written
+            elapsed = time.perf_counter() - started
+            print(f"  - {totals['users']}/{users} users, {totals['stocks']}/{stocks} stocks "
+                  f"({totals['documents_written'] / elapsed:,.0f} docs/s)")
+
+    totals["seconds"] = round(time.perf_counter() - started, 2)
+    return totals
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Seed synthetic users, stocks and analysis histories")
+    parser.add_argument("--users", type=int, default=10000, help="Synthetic users to generate")
+    parser.add_argument("--stocks", type=int, default=500, help="Synthetic stocks to generate")
+    parser.add_argument("--history-days", type=int, default=30, help="Daily analysis snapshots per stock")
+    parser.add_argument("--price-days", type=int, default=0, help="Daily OHLCV bars per stock for the price store")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--chunk-size", type=int, default=5000, help="Documents generated per task")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Operations per bulk_write")
+    parser.add_argument("--mode", choices=["insert", "upsert"], default="insert")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print("🚀 Seeding synthetic WealthWise data...")
+    result = seed_synthetic(args.users, args.stocks, args.history_days, args.price_days, args.workers,
+                            args.chunk_size, args.batch_size, args.mode, args.seed)
+    print("✅ Synthetic seeding complete:")
+    for k, v in result.items():
+        print(f"  - {k}: {v}")
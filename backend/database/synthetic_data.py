@@ -0,0 +1,205 @@
+"""
+Synthetic data generators for scale and load testing.
+
+Documents follow the same shapes the API writes (see the /user/* endpoints
+and setup_demo_data.py). Every generator is deterministic for a given seed
+so chunks can be produced independently by parallel workers.
+"""
+
+from datetime import date, datetime, timedelta
+import math
+import random
+import zlib
+from typing import Dict, List
+
+FIRST_NAMES = ["Aarav", "Vivaan", "Aditya", "Ananya", "Diya", "Isha", "Kabir", "Meera", "Rohan", "Saanvi",
+               "Arjun", "Priya", "Vikram", "Neha", "Rahul", "Pooja", "Karan", "Sneha", "Aman", "Riya"]
+LAST_NAMES = ["Sharma", "Verma", "Iyer", "Patel", "Reddy", "Nair", "Gupta", "Mehta", "Rao", "Singh",
+              "Das", "Kulkarni", "Joshi", "Menon", "Bose", "Chopra", "Agarwal", "Pillai", "Shah", "Kapoor"]
+BANKS = ["SBI", "HDFC", "ICICI", "Axis", "Kotak", "Yes Bank", "Bank of Baroda", "Canara"]
+MUTUAL_FUNDS = ["Nippon India Large Cap Fund Direct Growth", "Axis Bluechip Fund Direct Growth",
+                "ICICI Prudential Bluechip Fund Direct Growth", "Parag Parikh Flexi Cap Fund Direct Growth",
+                "HDFC Short Term Debt Fund Direct Growth", "SBI Small Cap Fund Direct Growth",
+                "Mirae Asset Emerging Bluechip Fund Direct Growth", "UTI Nifty 50 Index Fund Direct Growth"]
+SECTORS = ["Information Technology", "Banking", "Oil & Gas", "Pharmaceuticals", "FMCG", "Automobile",
+           "Renewable Energy", "Metals", "Telecom", "Infrastructure", "Financial Services", "Consumer Durables"]
+NAME_PARTS = ["Bharat", "Sun", "Apex", "Nova", "Indus", "Global", "Prime", "Vertex", "Lotus", "Shakti",
+              "Tata", "Orient", "Zenith", "Ganga", "Everest", "Pioneer", "Sigma", "Unity", "Royal", "Star"]
+NAME_SUFFIX = ["Industries", "Technologies", "Finance", "Pharma", "Motors", "Energy", "Steel", "Foods",
+               "Infra", "Telecom", "Chemicals", "Holdings"]
+EXPENSE_CATEGORIES = [("Rent", "fixed"), ("Groceries", "variable"), ("Utilities", "fixed"),
+                      ("Transport", "variable"), ("Dining Out", "variable"), ("Insurance", "fixed"),
+                      ("Education", "fixed"), ("Entertainment", "variable"), ("Healthcare", "variable")]
+RISK_PROFILES = {
+    # name: (risk score range, equity, debt, gold, international, cash)
+    "conservative": ((15, 35), 30, 50, 10, 0, 10),
+    "moderate": ((40, 65), 55, 30, 5, 5, 5),
+    "aggressive": ((70, 95), 75, 10, 5, 10, 0),
+}
+
+
+def _money(rng: random.Random, median: float, sigma: float = 0.6, step: int = 500) -> int:
+    return int(round(rng.lognormvariate(math.log(median), sigma) / step) * step)
+
+
+def _date(rng: random.Random, start: date, end: date) -> str:
+    return (start + timedelta(days=rng.randint(0, max((end - start).days, 0)))).isoformat()
+
+
+def generate_user(index: int, seed: int = 0) -> Dict:
+    """One synthetic user; ``index`` makes the email unique."""
+    rng = random.Random(seed * 1_000_003 + index)
+    today = date.today()
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    profile = rng.choices(list(RISK_PROFILES), weights=[3, 5, 2])[0]
+    (lo, hi), equity, debt, gold, intl, cash = RISK_PROFILES[profile]
+    salary = _money(rng, 85000, 0.5, 1000)
+
+    incomes = [{"source_name": "Salary", "amount": salary, "frequency": "monthly", "income_type": "salary"}]
+    if rng.random() < 0.3:
+        incomes.append({"source_name": "Freelance", "amount": _money(rng, 20000), "frequency": "monthly",
+                        "income_type": "business"})
+    if rng.random() < 0.2:
+        incomes.append({"source_name": "Annual Bonus", "amount": _money(rng, salary * 1.5, 0.4, 1000),
+                        "frequency": "yearly", "income_type": "salary"})
+
+    expenses = []
+    for category, kind in rng.sample(EXPENSE_CATEGORIES, rng.randint(4, len(EXPENSE_CATEGORIES))):
+        expenses.append({"category": category, "amount": _money(rng, salary * 0.07, 0.5, 100),
+                         "frequency": "monthly", "expense_type": kind})
+
+    bank_accounts = [{
+        "bank_name": bank,
+        "account_type": rng.choice(["Savings", "Current", "Salary"]),
+        "current_balance": _money(rng, salary * 2, 0.8, 100),
+        "date_updated": _date(rng, today - timedelta(days=60), today),
+    } for bank in rng.sample(BANKS, rng.randint(1, 3))]
+
+    assets = []
+    for fund in rng.sample(MUTUAL_FUNDS, rng.randint(1, 4)):
+        nav = round(rng.uniform(20, 900), 2)
+        units = round(rng.uniform(100, 5000), 2)
+        assets.append({"name": fund, "type": "Mutual Fund", "category": "investments",
+                       "current_value": round(nav * units), "quantity": units,
+                       "date_updated": _date(rng, today - timedelta(days=30), today)})
+    if rng.random() < 0.5:
+        assets.append({"name": "Public Provident Fund", "type": "PPF", "category": "bank",
+                       "current_value": _money(rng, 300000), "quantity": 1, "date_updated": today.isoformat()})
+    if rng.random() < 0.3:
+        grams = rng.randint(10, 200)
+        assets.append({"name": "Sovereign Gold Bond", "type": "Gold", "category": "other",
+                       "current_value": grams * 6500, "quantity": grams, "date_updated": today.isoformat()})
+    if rng.random() < 0.25:
+        assets.append({"name": "Apartment", "type": "Real Estate", "category": "realestate",
+                       "current_value": _money(rng, 6000000, 0.4, 10000), "quantity": 1,
+                       "date_updated": today.isoformat()})
+
+    liabilities = []
+    for name, kind, median, rate, years in (("Home Loan", "mortgage", 3000000, 8.5, 20),
+                                            ("Car Loan", "auto", 600000, 9.2, 5),
+                                            ("Credit Card Outstanding", "credit", 40000, 42.0, 0)):
+        if rng.random() < {"mortgage": 0.3, "auto": 0.3, "credit": 0.4}[kind]:
+            balance = _money(rng, median, 0.5, 1000)
+            r = rate / 1200
+            n = years * 12
+            emi = balance * r / (1 - (1 + r) ** -n) if n else balance * 0.3
+            start = today - timedelta(days=rng.randint(30, 365 * 5))
+            liabilities.append({
+                "name": name, "type": kind, "current_balance": balance,
+                "interest_rate": round(rate + rng.uniform(-0.75, 0.75), 2),
+                "monthly_payment": round(emi), "start_date": start.isoformat(),
+                "maturity_date": (today + timedelta(days=365 * years)).isoformat() if years else None,
+            })
+
+    goals = []
+    for title, goal_type, median, years in (("Emergency Fund", "emergency", salary * 6, 1),
+                                            ("Home Purchase", "home", 5000000, 7),
+                                            ("Child Education", "education", 2500000, 12),
+                                            ("Retirement", "retirement", 30000000, 25)):
+        if rng.random() < 0.5:
+            target = _money(rng, median, 0.3, 10000)
+            goals.append({
+                "title": title, "description": None, "target_amount": target,
+                "current_amount": round(target * rng.uniform(0, 0.6)),
+                "target_date": (today + timedelta(days=365 * years)).isoformat(),
+                "goal_type": goal_type, "priority": rng.choice(["high", "medium", "low"]), "is_completed": False,
+            })
+
+    return {
+        "email": f"synthetic.user{index}@wealthwise.test",
+        "name": f"{first} {last}",
+        "is_demo_user": False,
+        "is_synthetic": True,
+        "created_at": datetime.utcnow(),
+        "assets": assets,
+        "liabilities": liabilities,
+        "income_sources": incomes,
+        "expenses": expenses,
+        "financial_goals": goals,
+        "bank_accounts": bank_accounts,
+        "risk_profile": {
+            "risk_score": rng.randint(lo, hi),
+            "time_horizon": rng.choice(["short", "medium", "long"]),
+            "risk_capacity": profile,
+            "investment_experience": rng.choice(["beginner", "intermediate", "advanced"]),
+            "financial_goals": None,
+        },
+        "portfolio_allocation": {
+            "allocation_name": f"{profile.title()} Portfolio",
+            "risk_profile": profile,
+            "equity_percentage": float(equity),
+            "debt_percentage": float(debt),
+            "gold_percentage": float(gold),
+            "international_percentage": float(intl),
+            "cash_percentage": float(cash),
+        },
+    }
+
+
+def generate_users(start: int, count: int, seed: int = 0) -> List[Dict]:
+    return [generate_user(i, seed) for i in range(start, start + count)]
+
+
+def generate_stock(index: int, seed: int = 0) -> Dict:
+    rng = random.Random(seed * 7_919 + index)
+    price = round(rng.lognormvariate(math.log(800), 0.9), 2)
+    pe = round(rng.uniform(8, 70), 1)
+    return {
+        "symbol": f"SYN{index:05d}.NS",
+        "company_name": f"{rng.choice(NAME_PARTS)} {rng.choice(NAME_PARTS)} {rng.choice(NAME_SUFFIX)}",
+        "current_price": price,
+        "sector": rng.choice(SECTORS),
+        "change_percent": round(rng.gauss(0, 1.5), 2),
+        "pe_ratio": pe,
+        "pb_ratio": round(rng.uniform(0.8, 12), 2),
+        "roe": round(rng.uniform(2, 35), 1),
+        "debt_to_equity": round(rng.uniform(0, 2.5), 2),
+        "dividend_yield": round(rng.uniform(0, 4), 2),
+        "target_price": round(price * rng.uniform(0.85, 1.35), 2),
+        "is_synthetic": True,
+    }
+
+
+def generate_analysis_history(stock: Dict, days: int, seed: int = 0) -> List[Dict]:
+    """``days`` daily technical + fundamental snapshots ending today, newest last."""
+    rng = random.Random(zlib.crc32(stock["symbol"].encode("utf-8")) + seed)
+    now = datetime.utcnow().replace(hour=10, minute=0, second=0, microsecond=0)
+    price = stock["current_price"]
+    docs = []
+    for day in range(days, 0, -1):
+        price_then = round(price * math.exp(rng.gauss(0, 0.015 * math.sqrt(day))), 2)
+        for kind in ("technical", "fundamental"):
+            rec = rng.choices(["BUY", "HOLD", "SELL"], weights=[4, 4, 2])[0]
+            docs.append({
+                "symbol": stock["symbol"],
+                "type": kind,
+                "title": f"{kind.title()} Analysis",
+                "result": f"Synthetic {kind} snapshot: {rec.lower()} bias",
+                "chart_data": [round(price_then * math.exp(rng.gauss(0, 0.01))) for _ in range(7)],
+                "confidence_score": round(rng.uniform(0.55, 0.9), 2),
+                "recommendation": rec,
+                "target_price": round(price_then * rng.uniform(0.9, 1.25), 2),
+                "timestamp": now - timedelta(days=day - 1),
+                "is_synthetic": True,
+            })
+    return docs
@@ -0,0 +1,255 @@
+"""
+Loan amortization and prepayment engine for user liabilities.
+
+Schedules for all of a user's loans are simulated together as NumPy arrays
+(one row per loan, one column per month) so avalanche and snowball
+prepayment strategies can be compared side by side.
+"""
+
+import hashlib
+import json
+import math
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+MAX_MONTHS = 600  # 50 years; anything longer is treated as never paid off
+STRATEGIES = ("baseline", "avalanche", "snowball")
+
+_CACHE_SIZE = 256
+_REPORTS_PER_USER = 8  # distinct extra_payment values kept per user
+_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _to_float(value: Any) -> float:
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _months_until(maturity: Any, today: date) -> Optional[int]:
+    if not maturity:
+        return None
+    try:
+        d = datetime.strptime(str(maturity)[:10], "%Y-%m-%d").date()
+    except ValueError:
+        return None
+    months = (d.year - today.year) * 12 + (d.month - today.month)
+    return months if months > 0 else None
+
+
+def _add_months(start: date, months: int) -> str:
+    total = start.month - 1 + months
+    return date(start.year + total // 12, total % 12 + 1, 1).isoformat()
+
+
+def _loan_arrays(liabilities: List[Dict], today: date) -> Dict[str, np.ndarray]:
+    """Turn liability documents into balance / monthly rate / payment arrays.
+
+    A missing monthly payment is derived from the maturity date with the
+    standard annuity formula when possible.
+    """
+    balances = np.array([_to_float(l.get("current_balance")) for l in liabilities], dtype=np.float64)
+    rates = np.array([_to_float(l.get("interest_rate")) for l in liabilities], dtype=np.float64) / 1200.0
+    payments = np.array([_to_float(l.get("monthly_payment")) for l in liabilities], dtype=np.float64)
+
+    for i, liab in enumerate(liabilities):
+        if payments[i] > 0 or balances[i] <= 0:
+            continue
+        n = _months_until(liab.get("maturity_date"), today)
+        if not n:
+            continue
+        r = rates[i]
+        payments[i] = balances[i] / n if r == 0 else balances[i] * r / (1 - (1 + r) ** -n)
+
+    return {"balance": balances, "rate": rates, "payment": payments}
+
+
+def non_amortizing(arrays: Dict[str, np.ndarray]) -> np.ndarray:
+    """Loans whose scheduled payment does not cover the month's interest, so the balance never falls."""
+    balance = arrays["balance"]
+    return (balance > 0) & (arrays["payment"] <= balance * arrays["rate"])
+
+
+def _priority(arrays: Dict[str, np.ndarray], strategy: str) -> np.ndarray:
+    # Avalanche targets the highest rate first, snowball the smallest balance.
+    if strategy == "avalanche":
+        return np.lexsort((arrays["balance"], -arrays["rate"]))
+    if strategy == "snowball":
+        return np.lexsort((-arrays["rate"], arrays["balance"]))
+    return np.arange(len(arrays["balance"]))
+
+
+def simulate(liabilities: List[Dict], extra_payment: float = 0.0, strategy: str = "baseline",
+             max_months: int = MAX_MONTHS, today: Optional[date] = None) -> Dict[str, Any]:
+    """Simulate month-by-month repayment of every loan at once.
+
+    ``baseline`` pays only the scheduled EMIs. ``avalanche`` and ``snowball``
+    put ``extra_payment`` plus the EMIs freed by loans already paid off into
+    the loans in priority order each month.
+
+    Returns the schedule arrays (shape ``loans x months``) and totals.
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy: {strategy}")
+    today = today or date.today()
+    arrays = _loan_arrays(liabilities, today)
+    balance = arrays["balance"].copy()
+    rate, payment = arrays["rate"], arrays["payment"]
+    n = len(balance)
+
+    order = _priority(arrays, strategy)
+    extra = max(_to_float(extra_payment), 0.0) if strategy != "baseline" else 0.0
+
+    balances = np.zeros((n, max_months))
+    interest = np.zeros((n, max_months))
+    principal = np.zeros((n, max_months))
+    prepaid = np.zeros((n, max_months))
+    payoff = np.full(n, -1, dtype=np.int64)
+    payoff[balance <= 0] = 0
+
+    month = 0
+    while month < max_months and (balance > 0.005).any():
+        due = balance * rate
+        scheduled = np.minimum(payment, balance + due)
+        interest[:, month] = due
+        principal[:, month] = scheduled - due
+        balance = balance + due - scheduled
+
+        if strategy != "baseline":
+            # EMIs of loans that are already closed roll into the prepayment pool.
+            pool = extra + (payment - scheduled).sum()
+            ordered = np.maximum(balance[order], 0.0)
+            before = np.concatenate(([0.0], np.cumsum(ordered)[:-1]))
+            applied = np.clip(pool - before, 0.0, ordered)
+            prepaid[order, month] = applied
+            balance[order] -= applied
+
+        balance[balance < 0.005] = 0.0
+        balances[:, month] = balance
+        just_paid = (balance == 0) & (payoff < 0)
+        payoff[just_paid] = month + 1
+        month += 1
+
+    months = month
+    total_interest = interest[:, :months].sum(axis=1)
+    return {
+        "strategy": strategy,
+        "months": months,
+        "paid_off": bool((payoff >= 0).all()),
+        "total_interest": total_interest,
+        "payoff_month": payoff,
+        "balance": balances[:, :months],
+        "interest": interest[:, :months],
+        "principal": principal[:, :months],
+        "prepayment": prepaid[:, :months],
+        "start": today.replace(day=1),
+    }
+
+
+def _loan_rows(liabilities: List[Dict], result: Dict[str, Any], stuck: np.ndarray) -> List[Dict[str, Any]]:
+    rows = []
+    start = result["start"]
+    for i, liab in enumerate(liabilities):
+        paid = result["payoff_month"][i] >= 0
+        end = int(result["payoff_month"][i]) if paid else result["months"]
+        rows.append({
+            "name": liab.get("name"),
+            "type": liab.get("type"),
+            "amortizing": not bool(stuck[i]),
+            "payoff_month": int(result["payoff_month"][i]) if paid else None,
+            "payoff_date": _add_months(start, end) if paid else None,
+            # Interest over the MAX_MONTHS horizon of a loan that never closes is not a cost anyone pays.
+            "total_interest": round(float(result["total_interest"][i]), 2) if paid else None,
+            "schedule": {
+                "balance": np.round(result["balance"][i, :end], 2).tolist(),
+                "interest": np.round(result["interest"][i, :end], 2).tolist(),
+                "principal": np.round(result["principal"][i, :end], 2).tolist(),
+                "prepayment": np.round(result["prepayment"][i, :end], 2).tolist(),
+            },
+        })
+    return rows
+
+
+def compare_strategies(liabilities: List[Dict], extra_payment: float = 0.0,
+                       today: Optional[date] = None) -> Dict[str, Any]:
+    """Run baseline, avalanche and snowball and report the prepayment impact of each.
+
+    Loans whose EMI does not cover their interest are listed under
+    ``non_amortizing``; a strategy that never clears every loan reports no
+    payoff, total interest or savings.
+    """
+    today = today or date.today()
+    stuck = non_amortizing(_loan_arrays(liabilities, today))
+    results = {s: simulate(liabilities, extra_payment, s, today=today) for s in STRATEGIES}
+    base = results["baseline"]
+    base_interest = float(base["total_interest"].sum())
+
+    report: Dict[str, Any] = {
+        "extra_payment": max(_to_float(extra_payment), 0.0),
+        "non_amortizing": [liabilities[i].get("name") for i in np.flatnonzero(stuck)],
+        "strategies": {},
+    }
+    for name, res in results.items():
+        total = float(res["total_interest"].sum())
+        both_paid = res["paid_off"] and base["paid_off"]
+        report["strategies"][name] = {
+            "months_to_debt_free": res["months"] if res["paid_off"] else None,
+            "debt_free_date": _add_months(res["start"], res["months"]) if res["paid_off"] else None,
+            "total_interest": round(total, 2) if res["paid_off"] else None,
+            "interest_saved": round(base_interest - total, 2) if both_paid else None,
+            "months_saved": (base["months"] - res["months"]) if both_paid else None,
+            "loans": _loan_rows(liabilities, res, stuck),
+        }
+    return report
+
+
+def _fingerprint(liabilities: List[Dict]) -> str:
+    raw = json.dumps(liabilities, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def get_amortization_report(email: str, liabilities: List[Dict], extra_payment: float = 0.0) -> Dict[str, Any]:
+    """Cached ``compare_strategies`` for a user.
+
+    Entries are keyed by email and remember a fingerprint of the liabilities
+    they were built from, so any change to the loans forces a rebuild. Each
+    entry keeps the reports for the last few ``extra_payment`` values only.
+    """
+    extra_payment = _to_float(extra_payment)
+    if not math.isfinite(extra_payment):
+        raise ValueError("extra_payment must be a finite number")
+    fingerprint = _fingerprint(liabilities)
+    extra_key = round(max(extra_payment, 0.0), 2)
+    with _cache_lock:
+        entry = _cache.get(email)
+        if entry and entry["fingerprint"] == fingerprint and extra_key in entry["reports"]:
+            _cache.move_to_end(email)
+            entry["reports"].move_to_end(extra_key)
+            return entry["reports"][extra_key]
+
+    report = compare_strategies(liabilities, extra_key)
+
+    with _cache_lock:
+        entry = _cache.get(email)
+        if not entry or entry["fingerprint"] != fingerprint:
+            entry = {"fingerprint": fingerprint, "reports": OrderedDict()}
+            _cache[email] = entry
+        entry["reports"][extra_key] = report
+        entry["reports"].move_to_end(extra_key)
+        while len(entry["reports"]) > _REPORTS_PER_USER:
+            entry["reports"].popitem(last=False)
+        _cache.move_to_end(email)
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return report
+
+
+def invalidate_amortization_cache(email: str) -> None:
+    with _cache_lock:
+        _cache.pop(email, None)
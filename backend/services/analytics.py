@@ -0,0 +1,202 @@
+"""
+Cross-user analytics rollups for the admin dashboard.
+
+Each run aggregates the materialized user ``summary`` (see
+services/financial_summary.py) into ``analytics_rollups``: one pipeline per
+dimension groups users server-side and ``$merge``s one document per
+(dimension, value, day). Rows of the day that a re-run did not write again
+(a group that has since emptied) are deleted afterwards, so the day always
+matches the latest run, and earlier days stay as history. Rows carry the user count, AUM
+(assets plus bank balances), net worth, monthly income and expenses, average
+savings rate and goal progress, and the allocation mix by category.
+
+The admin API reads only ``analytics_rollups`` through its unique
+(dimension, value, day) index, so dashboard queries cost the same at any
+number of users. Users without a stored summary are left out; those are
+filled once by ``python services/financial_summary.py`` (or ``--backfill``
+below), and every later write keeps the summary current.
+
+    python services/analytics.py                     # one run, e.g. from cron
+    python services/analytics.py --backfill          # store missing summaries first
+    ANALYTICS_ROLLUP_ENABLED=1 python app.py         # or hourly inside the API process
+"""
+
+from datetime import datetime, timedelta
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from pymongo import ASCENDING, DESCENDING
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.financial_summary import CATEGORIES
+
+ROLLUP_SECONDS = float(os.getenv("ANALYTICS_ROLLUP_SECONDS", "3600"))
+MAX_HISTORY_DAYS = 366
+ALL = "all"
+
+# Dimension name -> group key expression over a user document.
+DIMENSIONS: Dict[str, Any] = {
+    ALL: ALL,
+    "risk_category": {"$toLower": {"$ifNull": ["$risk_profile.risk_capacity",
+                                               {"$ifNull": ["$risk_profile.category", "unknown"]}]}},
+    "time_horizon": {"$toLower": {"$ifNull": ["$risk_profile.time_horizon", "unknown"]}},
+}
+ROLLUP_PROJECTION = {"_id": 0, "dimension": 0}
+
+
+def _field(path: str) -> Dict[str, Any]:
+    return {"$ifNull": [f"$summary.{path}", 0]}
+
+
+def _share(part: Any, whole: Any) -> Dict[str, Any]:
+    return {"$cond": [{"$gt": [whole, 0]}, {"$round": [{"$multiply": [{"$divide": [part, whole]}, 100]}, 2]}, 0]}
+
+
+def rollup_pipeline(dimension: str, day: str, into: str = "analytics_rollups",
+                    computed_at: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """Aggregation that groups users by ``dimension`` and merges the day's rows into ``into``."""
+    group: Dict[str, Any] = {
+        "_id": DIMENSIONS[dimension],
+        "users": {"$sum": 1},
+        "aum": {"$sum": {"$add": [_field("totals.assets"), _field("totals.bank")]}},
+        "net_worth": {"$sum": _field("totals.net_worth")},
+        "liabilities": {"$sum": _field("totals.liabilities")},
+        "monthly_income": {"$sum": _field("monthly.income")},
+        "monthly_expenses": {"$sum": _field("monthly.expenses")},
+        # Users without income or goals are left out of those averages ($avg skips nulls).
+        "avg_savings_rate": {"$avg": {"$cond": [{"$gt": [_field("monthly.income"), 0]},
+                                                "$summary.monthly.savings_rate", None]}},
+        "avg_goal_progress": {"$avg": {"$cond": [{"$gt": [_field("goals.count"), 0]},
+                                                 "$summary.goals.progress", None]}},
+    }
+    for category in CATEGORIES:
+        group[category] = {"$sum": _field(f"allocation.{category}.value")}
+    invested = {"$add": [f"${c}" for c in CATEGORIES]}
+    return [
+        {"$match": {"summary.version": {"$exists": True}}},
+        {"$group": group},
+        {"$project": {
+            "_id": 0,
+            "dimension": {"$literal": dimension},
+            "value": {"$ifNull": ["$_id", "unknown"]},
+            "day": {"$literal": day},
+            "users": 1,
+            "aum": {"$round": ["$aum", 2]},
+            "net_worth": {"$round": ["$net_worth", 2]},
+            "liabilities": {"$round": ["$liabilities", 2]},
+            "avg_net_worth": {"$round": [{"$divide": ["$net_worth", "$users"]}, 2]},
+            "monthly_income": {"$round": ["$monthly_income", 2]},
+            "monthly_expenses": {"$round": ["$monthly_expenses", 2]},
+            "avg_savings_rate": {"$round": [{"$ifNull": ["$avg_savings_rate", 0]}, 2]},
+            "avg_goal_progress": {"$round": [{"$ifNull": ["$avg_goal_progress", 0]}, 2]},
+            "allocation": {c: {"value": {"$round": [f"${c}", 2]}, "percentage": _share(f"${c}", invested)}
+                           for c in CATEGORIES},
+            "computed_at": {"$literal": computed_at or datetime.utcnow()},
+        }},
+        {"$merge": {"into": into, "on": ["dimension", "value", "day"],
+                    "whenMatched": "replace", "whenNotMatched": "insert"}},
+    ]
+
+
+def _collections(users=None, rollups=None):
+    from database.mongo_manager import get_analytics_rollups_collection, get_users_collection
+    if users is None:
+        users = get_users_collection()
+    if rollups is None:
+        rollups = get_analytics_rollups_collection()
+    return users, rollups
+
+
+def ensure_indexes(rollups=None) -> None:
+    """The unique key ``$merge`` matches on; it also serves every admin read."""
+    _, rollups = _collections(rollups=rollups)
+    rollups.create_index([("dimension", ASCENDING), ("value", ASCENDING), ("day", DESCENDING)], unique=True)
+
+
+def run_rollups(day: Optional[str] = None, users=None, rollups=None) -> Dict[str, Any]:
+    """Merge every dimension's rows for ``day`` (default today, UTC) and drop the day's stale rows."""
+    users, rollups = _collections(users, rollups)
+    day = day or datetime.utcnow().date().isoformat()
+    started = time.perf_counter()
+    ensure_indexes(rollups)
+    # Mongo keeps millisecond precision; a truncated stamp compares equal once stored.
+    now = datetime.utcnow()
+    computed_at = now.replace(microsecond=now.microsecond // 1000 * 1000)
+    for dimension in DIMENSIONS:
+        users.aggregate(rollup_pipeline(dimension, day, rollups.name, computed_at), allowDiskUse=True)
+    # Deleted only after the merges, so readers never see the day half empty.
+    stale = rollups.delete_many({"day": day, "computed_at": {"$lt": computed_at}}).deleted_count
+    return {"day": day, "dimensions": len(DIMENSIONS), "stale_rows_deleted": stale,
+            "seconds": round(time.perf_counter() - started, 3)}
+
+
+def latest_day(rollups=None) -> Optional[str]:
+    _, rollups = _collections(rollups=rollups)
+    row = rollups.find_one({"dimension": ALL, "value": ALL}, {"_id": 0, "day": 1}, sort=[("day", DESCENDING)])
+    return row["day"] if row else None
+
+
+def get_rollups(dimension: str = ALL, day: Optional[str] = None, rollups=None) -> Dict[str, Any]:
+    """All rows of one dimension for ``day`` (default the latest run), largest AUM first."""
+    if dimension not in DIMENSIONS:
+        raise ValueError(f"dimension must be one of {', '.join(DIMENSIONS)}")
+    _, rollups = _collections(rollups=rollups)
+    day = day or latest_day(rollups)
+    rows = list(rollups.find({"dimension": dimension, "day": day}, ROLLUP_PROJECTION)) if day else []
+    rows.sort(key=lambda r: r.get("aum") or 0, reverse=True)
+    return {"dimension": dimension, "day": day, "rows": rows}
+
+
+def get_history(dimension: str = ALL, value: str = ALL, days: int = 30, rollups=None) -> Dict[str, Any]:
+    """Daily rows of one (dimension, value) over the last ``days`` days, oldest first."""
+    if dimension not in DIMENSIONS:
+        raise ValueError(f"dimension must be one of {', '.join(DIMENSIONS)}")
+    days = max(1, min(int(days), MAX_HISTORY_DAYS))
+    _, rollups = _collections(rollups=rollups)
+    since = (datetime.utcnow().date() - timedelta(days=days - 1)).isoformat()
+    series = list(rollups.find({"dimension": dimension, "value": value, "day": {"$gte": since}},
+                               ROLLUP_PROJECTION).sort("day", ASCENDING))
+    return {"dimension": dimension, "value": value, "days": days, "series": series}
+
+
+_thread: Optional[threading.Thread] = None
+_stop = threading.Event()
+
+
+def _run_forever(interval: float) -> None:
+    while not _stop.is_set():
+        try:
+            stats = run_rollups()
+            print(f"📊 Analytics rollups for {stats['day']} refreshed in {stats['seconds']}s")
+        except Exception as e:
+            print(f"⚠️ Analytics rollup error: {e}")
+        _stop.wait(interval)
+
+
+def start_rollups_if_enabled() -> Optional[threading.Thread]:
+    global _thread
+    if os.getenv("ANALYTICS_ROLLUP_ENABLED", "").lower() not in ("1", "true", "yes"):
+        return None
+    if _thread is None:
+        _thread = threading.Thread(target=_run_forever, args=(ROLLUP_SECONDS,), name="analytics-rollups", daemon=True)
+        _thread.start()
+    return _thread
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Aggregate user summaries into analytics_rollups")
+    parser.add_argument("--day", help="Day to write rows for (YYYY-MM-DD, default today UTC)")
+    parser.add_argument("--backfill", action="store_true", help="First store summaries for users that lack one")
+    args = parser.parse_args()
+
+    if args.backfill:
+        from services.financial_summary import backfill
+        print(f"✅ Stored summaries for {backfill()} users")
+    stats = run_rollups(args.day)
+    print(f"✅ Rolled up {stats['dimensions']} dimensions for {stats['day']} in {stats['seconds']}s "
+          f"({stats['stale_rows_deleted']} stale rows deleted)")
@@ -0,0 +1,61 @@
+"""
+Negotiated response compression.
+
+Responses with a compressible mimetype and a body of at least
+COMPRESS_MIN_BYTES (default 1024) are compressed with brotli when the client
+accepts ``br`` and the brotli package is installed, otherwise with gzip.
+Levels favour speed since bodies are compressed on every request:
+COMPRESS_GZIP_LEVEL (default 5) and COMPRESS_BROTLI_QUALITY (default 4).
+"""
+
+import gzip
+import os
+
+from flask import Flask, request
+
+try:
+    import brotli
+except ImportError:  # optional; gzip is always available
+    brotli = None
+
+MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", "5"))
+BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", "4"))
+COMPRESSIBLE = ("application/json", "text/html", "text/plain", "text/css", "application/javascript",
+                "application/x-ndjson")
+
+
+def choose_encoding(accept_encodings) -> str:
+    """Best supported encoding for an ``Accept-Encoding`` header, or ''."""
+    if brotli is not None and accept_encodings.quality("br") > 0:
+        return "br"
+    if accept_encodings.quality("gzip") > 0:
+        return "gzip"
+    return ""
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _compress_response(response):
+    if (response.direct_passthrough or response.is_streamed or response.status_code < 200
+            or response.status_code in (204, 206, 304) or "Content-Encoding" in response.headers
+            or response.mimetype not in COMPRESSIBLE):
+        return response
+    response.vary.add("Accept-Encoding")
+    encoding = choose_encoding(request.accept_encodings)
+    if not encoding:
+        return response
+    data = response.get_data()
+    if len(data) < MIN_BYTES:
+        return response
+    response.set_data(compress(data, encoding))
+    response.headers["Content-Encoding"] = encoding
+    return response
+
+
+def init_compression(app: Flask) -> None:
+    app.after_request(_compress_response)
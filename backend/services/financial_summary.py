@@ -0,0 +1,263 @@
+"""
+Materialized per-user financial summary.
+
+Net worth, monthly cash flow, allocation and goal progress are derived from
+the raw ``assets`` / ``liabilities`` / ``income_sources`` / ``expenses`` /
+``financial_goals`` arrays once, on write, and stored in the user's
+``summary`` subdocument so readers take them as-is:
+
+    summary.totals      assets, bank, liabilities, net_worth
+    summary.monthly     income, expenses, debt_payments, surplus, savings_rate
+    summary.allocation  {category: {value, percentage}} over assets
+    summary.goals       count, completed, target, saved, progress, items
+    summary.version     bumped by every write
+
+``write_section`` is what the /user/* endpoints use: it reads the user, swaps
+in the new section, recomputes and writes section and summary in a single
+``update_one`` guarded by ``summary.version``, retrying if another write got
+there first. Between writes the valuation engine refreshes ``totals`` and
+``allocation`` from the stored assets with ``refresh_assets_stages`` in the
+same update that reprices them.
+
+    python services/financial_summary.py      # backfill users without a summary
+"""
+
+from datetime import date, datetime
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from pymongo import UpdateOne
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CATEGORIES = ("investments", "bank", "realestate", "other")
+MONTHLY_FACTOR = {"weekly": 52 / 12, "monthly": 1.0, "quarterly": 1 / 3, "half-yearly": 1 / 6,
+                  "yearly": 1 / 12, "annual": 1 / 12, "one-time": 0.0}
+WRITE_RETRIES = 5
+BATCH_SIZE = 1000
+PROJECTION = {"email": 1, "assets.name": 1, "assets.type": 1, "assets.category": 1, "assets.current_value": 1,
+              "bank_accounts.current_balance": 1, "liabilities.current_balance": 1,
+              "liabilities.monthly_payment": 1, "income_sources.amount": 1, "income_sources.frequency": 1,
+              "expenses.amount": 1, "expenses.frequency": 1, "financial_goals.title": 1,
+              "financial_goals.target_amount": 1, "financial_goals.current_amount": 1,
+              "financial_goals.target_date": 1, "financial_goals.is_completed": 1, "summary.version": 1}
+
+
+class SummaryConflictError(RuntimeError):
+    """Concurrent writes kept moving ``summary.version`` underneath us."""
+
+
+def _number(value: Any) -> float:
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+# (category, words in the asset type, words in the name); the first match wins, then the stored category.
+# The one rule table for asset categories: the summary, the stored ``category``
+# written by database/enrich_demo_user_mongo.py and rebalancing all go through it.
+CATEGORY_RULES = (
+    ("investments", ("mutual", "stock", "equity"), ("fund",)),
+    ("bank", ("ppf", "fd", "fixed"), ("ppf",)),
+    ("other", ("gold",), ("gold",)),
+    ("realestate", ("real",), ("apartment", "property")),
+)
+
+
+def asset_category(asset: Dict[str, Any]) -> str:
+    """Allocation category of an asset, matching the dashboard's grouping."""
+    kind = str(asset.get("type") or "").lower()
+    name = str(asset.get("name") or "").lower()
+    for category, type_words, name_words in CATEGORY_RULES:
+        if any(w in kind for w in type_words) or any(w in name for w in name_words):
+            return category
+    category = asset.get("category") or "investments"
+    return category if category in CATEGORIES else "other"
+
+
+def asset_category_expr(asset: str) -> Dict[str, Any]:
+    """``asset_category`` as an aggregation expression over ``asset`` (e.g. ``"$$a"``)."""
+    def contains(text: str, word: str) -> Dict[str, Any]:
+        return {"$gte": [{"$indexOfCP": [text, word]}, 0]}
+
+    branches = [{"case": {"$or": [contains("$$kind", w) for w in type_words] +
+                                 [contains("$$name", w) for w in name_words]},
+                 "then": category}
+                for category, type_words, name_words in CATEGORY_RULES]
+    stored = {"$ifNull": [f"{asset}.category", ""]}
+    fallback = {"$cond": [{"$eq": [stored, ""]}, "investments",
+                          {"$cond": [{"$in": [stored, list(CATEGORIES)]}, stored, "other"]}]}
+    return {"$let": {
+        "vars": {"kind": {"$toLower": {"$ifNull": [f"{asset}.type", ""]}},
+                 "name": {"$toLower": {"$ifNull": [f"{asset}.name", ""]}}},
+        "in": {"$switch": {"branches": branches, "default": fallback}},
+    }}
+
+
+def monthly_amount(item: Dict[str, Any]) -> float:
+    """Amount of an income or expense line normalized to a month (unknown frequencies count as monthly)."""
+    frequency = str(item.get("frequency") or "monthly").lower()
+    return _number(item.get("amount")) * MONTHLY_FACTOR.get(frequency, 1.0)
+
+
+def allocation(values: Dict[str, float]) -> Dict[str, Dict[str, float]]:
+    total = sum(values.values())
+    return {category: {"value": round(value, 2),
+                       "percentage": round(value / total * 100, 2) if total > 0 else 0.0}
+            for category, value in values.items() if value}
+
+
+def _months_until(target: Any, today: date) -> Optional[int]:
+    try:
+        day = datetime.strptime(str(target).split("T")[0], "%Y-%m-%d").date()
+    except ValueError:
+        return None
+    return max(1, (day.year - today.year) * 12 + day.month - today.month)
+
+
+def goal_progress(goals: Any, today: Optional[date] = None) -> Dict[str, Any]:
+    today = today or date.today()
+    items = []
+    for goal in goals or []:
+        target, saved = _number(goal.get("target_amount")), _number(goal.get("current_amount"))
+        remaining = max(target - saved, 0.0)
+        months = _months_until(goal["target_date"], today) if goal.get("target_date") else None
+        items.append({
+            "title": goal.get("title"),
+            "target": round(target, 2),
+            "saved": round(saved, 2),
+            "progress": round(min(saved / target, 1.0) * 100, 2) if target > 0 else 0.0,
+            "remaining": round(remaining, 2),
+            "months_left": months,
+            "monthly_needed": round(remaining / months, 2) if months else None,
+            "completed": bool(goal.get("is_completed")) or (target > 0 and saved >= target),
+        })
+    target = sum((g["target"] for g in items), 0.0)
+    saved = sum((min(g["saved"], g["target"]) for g in items), 0.0)
+    return {
+        "count": len(items),
+        "completed": sum(g["completed"] for g in items),
+        "target": round(target, 2),
+        "saved": round(saved, 2),
+        "progress": round(saved / target * 100, 2) if target > 0 else 0.0,
+        "items": items,
+    }
+
+
+def compute_summary(user: Dict[str, Any], today: Optional[date] = None) -> Dict[str, Any]:
+    """Summary subdocument for a user document (``version`` is left to the writer)."""
+    by_category = dict.fromkeys(CATEGORIES, 0.0)
+    for asset in user.get("assets") or []:
+        by_category[asset_category(asset)] += _number(asset.get("current_value"))
+    assets = sum(by_category.values())
+    bank = sum((_number(a.get("current_balance")) for a in user.get("bank_accounts") or []), 0.0)
+    liabilities = sum((_number(l.get("current_balance")) for l in user.get("liabilities") or []), 0.0)
+    debt_payments = sum((_number(l.get("monthly_payment")) for l in user.get("liabilities") or []), 0.0)
+    income = sum((monthly_amount(i) for i in user.get("income_sources") or []), 0.0)
+    expenses = sum((monthly_amount(e) for e in user.get("expenses") or []), 0.0)
+    surplus = income - expenses
+    return {
+        "totals": {
+            "assets": round(assets, 2),
+            "bank": round(bank, 2),
+            "liabilities": round(liabilities, 2),
+            "net_worth": round(assets + bank - liabilities, 2),
+        },
+        "monthly": {
+            "income": round(income, 2),
+            "expenses": round(expenses, 2),
+            "debt_payments": round(debt_payments, 2),
+            "surplus": round(surplus, 2),
+            "savings_rate": round(surplus / income * 100, 2) if income > 0 else 0.0,
+        },
+        "allocation": allocation(by_category),
+        "goals": goal_progress(user.get("financial_goals"), today),
+        "updated_at": datetime.utcnow(),
+    }
+
+
+def refresh_assets_stages(now: datetime) -> List[Dict[str, Any]]:
+    """Update pipeline stages that recompute the asset-derived parts of an existing ``summary``.
+
+    ``totals.assets`` and ``allocation`` come from the stored ``assets``,
+    ``net_worth`` from the resulting totals, and ``version`` is bumped so a
+    concurrent ``write_section`` retries. Users without a summary are left
+    without one.
+    """
+    value = {"$convert": {"input": "$$a.current_value", "to": "double", "onError": 0, "onNull": 0}}
+    by_category = {c: {"$sum": {"$map": {"input": {"$ifNull": ["$assets", []]}, "as": "a",
+                                         "in": {"$cond": [{"$eq": [asset_category_expr("$$a"), c]}, value, 0]}}}}
+                   for c in CATEGORIES}
+    total = {"$add": [f"$_summary_assets.{c}" for c in CATEGORIES]}
+    shares = [{"k": c, "v": {"value": {"$round": [f"$_summary_assets.{c}", 2]},
+                             "percentage": {"$cond": [{"$gt": [total, 0]},
+                                                      {"$round": [{"$multiply": [{"$divide": [f"$_summary_assets.{c}", total]}, 100]}, 2]},
+                                                      0]}}}
+              for c in CATEGORIES]
+    net_worth = {"$subtract": [{"$add": [total, {"$ifNull": ["$summary.totals.bank", 0]}]},
+                               {"$ifNull": ["$summary.totals.liabilities", 0]}]}
+    refreshed = {"$mergeObjects": ["$summary", {
+        "totals": {"$mergeObjects": ["$summary.totals", {"assets": {"$round": [total, 2]},
+                                                        "net_worth": {"$round": [net_worth, 2]}}]},
+        "allocation": {"$arrayToObject": {"$filter": {"input": shares, "cond": {"$ne": ["$$this.v.value", 0]}}}},
+        "updated_at": now,
+        "version": {"$add": ["$summary.version", 1]},
+    }]}
+    return [
+        {"$set": {"_summary_assets": by_category}},
+        {"$set": {"summary": {"$cond": [{"$eq": [{"$type": "$summary.version"}, "missing"]}, "$$REMOVE", refreshed]}}},
+        {"$unset": "_summary_assets"},
+    ]
+
+
+def write_section(email: str, fields: Dict[str, Any], users=None) -> Optional[Dict[str, Any]]:
+    """Set ``fields`` on a user and store the recomputed summary in the same update.
+
+    Returns the new summary, or None when the user does not exist. With no
+    ``fields`` this just refreshes the summary.
+    """
+    if users is None:
+        from database.mongo_manager import get_users_collection
+        users = get_users_collection()
+    for _ in range(WRITE_RETRIES):
+        user = users.find_one({"email": email}, PROJECTION)
+        if user is None:
+            return None
+        version = (user.get("summary") or {}).get("version")
+        user.update(fields)
+        summary = compute_summary(user)
+        summary["version"] = (version or 0) + 1
+        # A None version also matches users that have no summary yet.
+        res = users.update_one({"_id": user["_id"], "summary.version": version},
+                               {"$set": dict(fields, summary=summary)})
+        if res.matched_count:
+            return summary
+    raise SummaryConflictError(f"Summary for {email} changed during {WRITE_RETRIES} attempts, try again")
+
+
+def backfill(batch_size: int = BATCH_SIZE, users=None) -> int:
+    """Store a summary for every user that lacks one."""
+    if users is None:
+        from database.mongo_manager import get_users_collection
+        users = get_users_collection()
+    written = 0
+    query = {"summary.version": {"$exists": False}}
+    last_id = None
+    while True:
+        page = list(users.find(dict(query, **({"_id": {"$gt": last_id}} if last_id is not None else {})), PROJECTION)
+                    .sort("_id", 1).limit(batch_size))
+        if not page:
+            return written
+        last_id = page[-1]["_id"]
+        ops = [UpdateOne({"_id": u["_id"], "summary.version": {"$exists": False}},
+                         {"$set": {"summary": dict(compute_summary(u), version=1)}}) for u in page]
+        written += users.bulk_write(ops, ordered=False).modified_count
+
+
+if __name__ == "__main__":
+    started = time.perf_counter()
+    count = backfill()
+    print(f"✅ Stored summaries for {count} users in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,88 @@
+"""
+Rule-based fundamental analysis from the fields stored on ``stocks`` documents.
+
+Valuation is judged relative to the stock's sector, so sector medians are
+computed once over the whole catalogue and passed to every document build.
+"""
+
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+
+METRICS = ("pe_ratio", "pb_ratio", "roe", "dividend_yield", "debt_to_equity")
+
+
+def _num(value: Any) -> Optional[float]:
+    try:
+        f = float(value)
+    except (TypeError, ValueError):
+        return None
+    return f if np.isfinite(f) else None
+
+
+def sector_medians(stocks: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+    """{sector: {metric: median}} over every stock that reports the metric."""
+    values: Dict[str, Dict[str, list]] = defaultdict(lambda: defaultdict(list))
+    for stock in stocks:
+        sector = stock.get("sector") or "Other"
+        for metric in METRICS:
+            v = _num(stock.get(metric))
+            if v is not None:
+                values[sector][metric].append(v)
+    return {
+        sector: {metric: float(np.median(vs)) for metric, vs in metrics.items()}
+        for sector, metrics in values.items()
+    }
+
+
+def build_fundamental_document(stock: Dict[str, Any], medians: Dict[str, Dict[str, float]]) -> Dict[str, Any]:
+    """Fundamental ``stock_analysis`` document for one stock."""
+    sector = stock.get("sector") or "Other"
+    peer = medians.get(sector, {})
+    price = _num(stock.get("current_price"))
+    score, notes = 0, []
+
+    pe, peer_pe = _num(stock.get("pe_ratio")), peer.get("pe_ratio")
+    if pe is not None and peer_pe:
+        if pe < 0.85 * peer_pe:
+            score += 1
+            notes.append(f"P/E {pe:.1f} below sector median {peer_pe:.1f}")
+        elif pe > 1.2 * peer_pe:
+            score -= 1
+            notes.append(f"P/E {pe:.1f} above sector median {peer_pe:.1f}")
+        else:
+            notes.append(f"P/E {pe:.1f} in line with sector ({peer_pe:.1f})")
+
+    roe = _num(stock.get("roe"))
+    if roe is not None:
+        score += 1 if roe >= 15 else -1 if roe < 8 else 0
+        notes.append(f"ROE {roe:.1f}%")
+
+    de = _num(stock.get("debt_to_equity"))
+    if de is not None:
+        score += -1 if de > 1.5 else 1 if de < 0.5 else 0
+        notes.append(f"debt/equity {de:.2f}")
+
+    target = _num(stock.get("target_price"))
+    upside = (target / price - 1) * 100 if target and price else None
+    if upside is not None:
+        score += 1 if upside >= 10 else -1 if upside <= -5 else 0
+        notes.append(f"{upside:+.1f}% to target")
+
+    recommendation = "BUY" if score >= 2 else "SELL" if score <= -2 else "HOLD"
+    strength = "Strong" if score >= 2 else "Weak" if score <= -2 else "Fair"
+    return {
+        "symbol": stock["symbol"],
+        "type": "fundamental",
+        "title": "Fundamental Analysis",
+        "result": f"{strength} fundamentals: " + "; ".join(notes) if notes else "Insufficient fundamental data",
+        "chart_data": [v for v in (pe, peer_pe) if v is not None],
+        "confidence_score": round(min(0.5 + 0.1 * len(notes), 0.9), 2),
+        "recommendation": recommendation,
+        "target_price": target,
+        "metrics": {m: _num(stock.get(m)) for m in METRICS},
+        "sector_medians": peer,
+        "timestamp": datetime.utcnow(),
+    }
@@ -0,0 +1,87 @@
+"""
+Background-refreshed health snapshot for liveness and readiness probes.
+
+A daemon thread pings Mongo and reads ``estimated_document_count`` (collection
+metadata, no scan) every HEALTH_REFRESH_SECONDS; probes are answered from
+the last snapshot in memory, so load balancer traffic never reaches the
+database. A snapshot older than HEALTH_STALE_SECONDS counts as not ready.
+The app starts the monitor at import, so it has a snapshot before the first
+probe arrives.
+"""
+
+from datetime import datetime
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+REFRESH_SECONDS = float(os.getenv("HEALTH_REFRESH_SECONDS", "10"))
+STALE_SECONDS = float(os.getenv("HEALTH_STALE_SECONDS", str(REFRESH_SECONDS * 3)))
+
+_snapshot: Optional[Dict[str, Any]] = None
+_snapshot_at = 0.0
+_started = False
+_start_lock = threading.Lock()
+
+
+def _probe() -> Dict[str, Any]:
+    from database.mongo_manager import db
+
+    started = time.perf_counter()
+    try:
+        db.command("ping")
+        ping_ms = (time.perf_counter() - started) * 1000
+        return {
+            "status": "healthy",
+            "database": "connected",
+            "ping_ms": round(ping_ms, 2),
+            "demo_users": db["users"].estimated_document_count(),
+            "stocks_available": db["stocks"].estimated_document_count(),
+            "checked_at": datetime.utcnow().isoformat(),
+        }
+    except Exception as e:
+        return {
+            "status": "error",
+            "database": "unreachable",
+            "message": str(e),
+            "checked_at": datetime.utcnow().isoformat(),
+        }
+
+
+def refresh() -> Dict[str, Any]:
+    global _snapshot, _snapshot_at
+    snapshot = _probe()
+    _snapshot, _snapshot_at = snapshot, time.monotonic()
+    return snapshot
+
+
+def _refresh_loop() -> None:
+    while True:
+        refresh()
+        time.sleep(REFRESH_SECONDS)
+
+
+def start_health_monitor() -> None:
+    global _started
+    with _start_lock:
+        if _started:
+            return
+        threading.Thread(target=_refresh_loop, name="health-monitor", daemon=True).start()
+        _started = True
+
+
+def get_health_snapshot() -> Dict[str, Any]:
+    """Last snapshot plus its age; ``status`` is "starting" before the first probe completes."""
+    start_health_monitor()
+    snapshot, taken_at = _snapshot, _snapshot_at
+    if snapshot is None:
+        return {"status": "starting", "database": "unknown"}
+    age = time.monotonic() - taken_at
+    result = dict(snapshot, age_seconds=round(age, 2))
+    if age > STALE_SECONDS:
+        result["status"] = "stale"
+    return result
+
+
+def is_ready(snapshot: Dict[str, Any]) -> bool:
+    return snapshot.get("status") == "healthy"
@@ -0,0 +1,309 @@
+"""
+Vectorized technical indicator engine.
+
+SMA/EMA, RSI, MACD, Bollinger Bands and ATR are computed over ``symbols x
+bars`` arrays: the recursive indicators step through time once with every
+symbol updated in a single NumPy operation, and rolling windows use sliding
+views. All recursive state (EMAs, Wilder averages, the last closes needed by
+rolling windows) is returned with the results, so new bars can be folded in
+with ``advance`` without recomputing the full history.
+
+``refresh_technical_analysis`` ties this to the price store and writes
+``technical`` documents into ``stock_analysis``.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from services.price_store import CLOSE, DATE, HIGH, LOW, from_day, get_price_store
+
+SMA_FAST, SMA_SLOW = 20, 50
+EMA_FAST, EMA_SLOW, MACD_SIGNAL = 12, 26, 9
+RSI_PERIOD = 14
+BB_PERIOD, BB_WIDTH = 20, 2.0
+ATR_PERIOD = 14
+
+WINDOW = max(SMA_FAST, SMA_SLOW, BB_PERIOD)  # closes kept in state for rolling windows
+SERIES_POINTS = 90  # points of each indicator kept on the stock_analysis document
+
+_RECURSIVE = ("ema_fast", "ema_slow", "signal", "avg_gain", "avg_loss", "atr", "prev_close")
+SERIES_KEYS = ("close", "sma_fast", "sma_slow", "ema_fast", "ema_slow", "rsi",
+               "macd", "macd_signal", "macd_hist", "bb_upper", "bb_middle", "bb_lower", "atr")
+
+
+def empty_state(n_symbols: int) -> Dict[str, np.ndarray]:
+    state = {k: np.full(n_symbols, np.nan) for k in _RECURSIVE}
+    state["tail"] = np.full((n_symbols, WINDOW), np.nan)
+    state["bars"] = np.zeros(n_symbols, dtype=np.int64)
+    return state
+
+
+def _ema_step(prev: np.ndarray, x: np.ndarray, alpha: float) -> np.ndarray:
+    # Seed with the first observation, then the usual recursive update.
+    return np.where(np.isnan(prev), x, prev + alpha * (x - prev))
+
+
+def _running(values: np.ndarray) -> np.ndarray:
+    """Running totals with a leading zero column, so any window sum is one subtraction."""
+    return np.concatenate([np.zeros((values.shape[0], 1)), np.cumsum(values, axis=1)], axis=1)
+
+
+def _window_sum(running: np.ndarray, period: int, n_out: int) -> np.ndarray:
+    """Sums over the last ``n_out`` windows of ``period`` columns, from ``_running`` totals."""
+    end = running.shape[1]
+    return running[:, end - n_out:] - running[:, end - n_out - period:end - period]
+
+
+def advance(state: Dict[str, np.ndarray], close: np.ndarray, high: Optional[np.ndarray] = None,
+            low: Optional[np.ndarray] = None):
+    """Fold ``T`` new bars per symbol (``S x T`` arrays) into ``state``.
+
+    Returns ``(indicators, new_state)`` where every indicator is ``S x T``.
+    A full-history computation is just ``advance(empty_state(S), ...)``.
+    """
+    close = np.atleast_2d(np.asarray(close, dtype=np.float64))
+    high = close if high is None else np.atleast_2d(np.asarray(high, dtype=np.float64))
+    low = close if low is None else np.atleast_2d(np.asarray(low, dtype=np.float64))
+    n_symbols, n_bars = close.shape
+
+    ema_fast, ema_slow, signal = state["ema_fast"].copy(), state["ema_slow"].copy(), state["signal"].copy()
+    avg_gain, avg_loss, atr = state["avg_gain"].copy(), state["avg_loss"].copy(), state["atr"].copy()
+    prev_close = state["prev_close"].copy()
+
+    out = {k: np.empty((n_symbols, n_bars)) for k in
+           ("ema_fast", "ema_slow", "macd", "macd_signal", "avg_gain", "avg_loss", "atr")}
+    a_fast, a_slow, a_sig = 2 / (EMA_FAST + 1), 2 / (EMA_SLOW + 1), 2 / (MACD_SIGNAL + 1)
+    a_rsi, a_atr = 1 / RSI_PERIOD, 1 / ATR_PERIOD
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for t in range(n_bars):
+            c, h, l = close[:, t], high[:, t], low[:, t]
+            ema_fast = _ema_step(ema_fast, c, a_fast)
+            ema_slow = _ema_step(ema_slow, c, a_slow)
+            macd = ema_fast - ema_slow
+            signal = _ema_step(signal, macd, a_sig)
+
+            change = c - prev_close  # NaN on a symbol's first bar
+            has_prev = ~np.isnan(change)
+            gain, loss = np.maximum(change, 0.0), np.maximum(-change, 0.0)
+            avg_gain = np.where(has_prev, _ema_step(avg_gain, gain, a_rsi), avg_gain)
+            avg_loss = np.where(has_prev, _ema_step(avg_loss, loss, a_rsi), avg_loss)
+
+            true_range = np.where(
+                has_prev,
+                np.maximum(h - l, np.maximum(np.abs(h - prev_close), np.abs(l - prev_close))),
+                h - l,
+            )
+            atr = _ema_step(atr, true_range, a_atr)
+            prev_close = c
+
+            out["ema_fast"][:, t], out["ema_slow"][:, t] = ema_fast, ema_slow
+            out["macd"][:, t], out["macd_signal"][:, t] = macd, signal
+            out["avg_gain"][:, t], out["avg_loss"][:, t], out["atr"][:, t] = avg_gain, avg_loss, atr
+
+        # Rolling windows over the retained tail plus the new closes, from running
+        # sums (and sums of squares for the bands) of closes shifted by the latest
+        # one to keep precision. A window with a missing close is NaN.
+        history = np.concatenate([state["tail"], close], axis=1)
+        offset = close[:, -1:]
+        valid = ~np.isnan(history)
+        shifted = np.where(valid, history - offset, 0.0)
+        counts, sums = _running(valid.astype(np.float64)), _running(shifted)
+
+        def window_mean(period: int) -> np.ndarray:
+            full = _window_sum(counts, period, n_bars) > period - 0.5
+            return np.where(full, _window_sum(sums, period, n_bars) / period, np.nan)
+
+        sma_fast, sma_slow = window_mean(SMA_FAST) + offset, window_mean(SMA_SLOW) + offset
+        bb_shifted = window_mean(BB_PERIOD)
+        bb_var = _window_sum(_running(shifted * shifted), BB_PERIOD, n_bars) / BB_PERIOD - bb_shifted ** 2
+        bb_mid, bb_std = bb_shifted + offset, np.sqrt(np.maximum(bb_var, 0.0))
+
+        ag, al = out.pop("avg_gain"), out.pop("avg_loss")
+        rsi = np.where(al == 0, np.where(ag == 0, 50.0, 100.0), 100.0 - 100.0 / (1.0 + ag / al))
+
+    indicators = {
+        "close": close,
+        "sma_fast": sma_fast,
+        "sma_slow": sma_slow,
+        "ema_fast": out["ema_fast"],
+        "ema_slow": out["ema_slow"],
+        "rsi": rsi,
+        "macd": out["macd"],
+        "macd_signal": out["macd_signal"],
+        "macd_hist": out["macd"] - out["macd_signal"],
+        "bb_upper": bb_mid + BB_WIDTH * bb_std,
+        "bb_middle": bb_mid,
+        "bb_lower": bb_mid - BB_WIDTH * bb_std,
+        "atr": out["atr"],
+    }
+    new_state = {
+        "ema_fast": ema_fast, "ema_slow": ema_slow, "signal": signal,
+        "avg_gain": avg_gain, "avg_loss": avg_loss, "atr": atr, "prev_close": prev_close,
+        "tail": history[:, -WINDOW:],
+        "bars": state["bars"] + n_bars,
+    }
+    return indicators, new_state
+
+
+def compute(close: np.ndarray, high: Optional[np.ndarray] = None, low: Optional[np.ndarray] = None):
+    """Indicators over full histories (``S x T`` or a single 1-D series)."""
+    n_symbols = np.atleast_2d(close).shape[0]
+    return advance(empty_state(n_symbols), close, high, low)
+
+
+# -- persistence -------------------------------------------------------------
+
+def state_to_doc(state: Dict[str, np.ndarray], row: int = 0) -> Dict[str, Any]:
+    doc = {k: (None if np.isnan(state[k][row]) else float(state[k][row])) for k in _RECURSIVE}
+    doc["tail"] = [None if np.isnan(v) else float(v) for v in state["tail"][row]]
+    doc["bars"] = int(state["bars"][row])
+    return doc
+
+
+def state_from_doc(doc: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    state = empty_state(1)
+    for k in _RECURSIVE:
+        state[k][0] = np.nan if doc.get(k) is None else doc[k]
+    tail = [np.nan if v is None else v for v in (doc.get("tail") or [])][-WINDOW:]
+    if tail:
+        state["tail"][0, -len(tail):] = tail
+    state["bars"][0] = int(doc.get("bars") or 0)
+    return state
+
+
+def _clean(values: np.ndarray) -> List[Optional[float]]:
+    return [None if np.isnan(v) else round(float(v), 4) for v in values]
+
+
+def _latest(indicators: Dict[str, np.ndarray], row: int = 0) -> Dict[str, Optional[float]]:
+    return {k: _clean(indicators[k][row, -1:])[0] for k in SERIES_KEYS}
+
+
+def summarize(latest: Dict[str, Optional[float]]) -> Dict[str, Any]:
+    """Turn the latest indicator values into a recommendation, target and narrative."""
+    close = latest["close"]
+    votes, notes = [], []
+    if latest["sma_slow"] is not None:
+        votes.append(1 if close > latest["sma_slow"] else -1)
+        notes.append(f"price {'above' if close > latest['sma_slow'] else 'below'} {SMA_SLOW}-day SMA")
+    if latest["macd_hist"] is not None:
+        votes.append(1 if latest["macd_hist"] > 0 else -1)
+        notes.append(f"MACD {'above' if latest['macd_hist'] > 0 else 'below'} signal")
+    rsi = latest["rsi"]
+    if rsi is not None:
+        if rsi >= 70:
+            votes.append(-1)
+            notes.append(f"RSI {rsi:.0f} overbought")
+        elif rsi <= 30:
+            votes.append(1)
+            notes.append(f"RSI {rsi:.0f} oversold")
+        else:
+            notes.append(f"RSI {rsi:.0f} neutral")
+
+    score = sum(votes)
+    recommendation = "BUY" if score >= 2 else "SELL" if score <= -2 else "HOLD"
+    confidence = round(0.5 + 0.15 * min(abs(score), 3), 2)
+    atr = latest["atr"] or 0.0
+    if recommendation == "BUY":
+        target = max(latest["bb_upper"] or close, close + 2 * atr)
+    elif recommendation == "SELL":
+        target = min(latest["bb_lower"] or close, close - 2 * atr)
+    else:
+        target = latest["bb_middle"] or close
+    trend = {"BUY": "Bullish", "SELL": "Bearish", "HOLD": "Neutral"}[recommendation]
+    return {
+        "recommendation": recommendation,
+        "confidence_score": confidence,
+        "target_price": round(float(target), 2),
+        "result": f"{trend} setup: " + ", ".join(notes) if notes else "Not enough history for a signal",
+    }
+
+
+TECHNICAL_STATE_PROJECTION = {"_id": 0, "symbol": 1, "indicator_state": 1, "series": 1, "last_bar_date": 1,
+                              "last_bar": 1}
+
+
+def _last_bar(data: np.ndarray) -> List[float]:
+    return [float(data[CLOSE][-1]), float(data[HIGH][-1]), float(data[LOW][-1])]
+
+
+def build_technical_document(symbol: str, data: np.ndarray, existing: Optional[Dict[str, Any]] = None):
+    """Technical ``stock_analysis`` document for ``6 x n`` stored bars.
+
+    ``existing`` is the previous document (at least ``TECHNICAL_STATE_PROJECTION``).
+    Its ``indicator_state`` stops before the bar at ``last_bar_date``, whose
+    close/high/low are kept as ``last_bar``, so that bar is re-folded together
+    with any newer ones: a last bar patched in place by intraday ticks is
+    picked up too. A symbol without state, or whose history was rewritten, is
+    computed from scratch. Returns None when the existing document is already
+    current.
+    """
+    existing = existing or {}
+    state_doc = existing.get("indicator_state") if existing.get("last_bar") else None
+    last_day = existing.get("last_bar_date")
+    start = 0
+    if state_doc and last_day:
+        start = int(np.searchsorted(data[DATE], last_day, side="left"))
+        if start >= data.shape[1] or data[DATE][start] != last_day:
+            state_doc, start = None, 0  # history changed underneath us: rebuild
+    if state_doc and start == data.shape[1] - 1 and existing["last_bar"] == _last_bar(data):
+        return None
+
+    bars = np.asarray(data[:, start:])
+    state = state_from_doc(state_doc) if state_doc else empty_state(1)
+    parts = []
+    if bars.shape[1] > 1:
+        head, state = advance(state, bars[CLOSE, :-1], bars[HIGH, :-1], bars[LOW, :-1])
+        parts.append(head)
+    # The state is saved before the last bar, which may still be revised.
+    last, _ = advance(state, bars[CLOSE, -1:], bars[HIGH, -1:], bars[LOW, -1:])
+    parts.append(last)
+    indicators = {k: np.concatenate([p[k] for p in parts], axis=1) for k in SERIES_KEYS}
+
+    # The stored series ends with the bar at last_bar_date, which is recomputed here.
+    series = {k: [] for k in SERIES_KEYS + ("date",)} if not state_doc else \
+        {k: list(v)[:-1] for k, v in (existing.get("series") or {}).items()}
+    series["date"] = (list(series.get("date") or []) + [from_day(d) for d in bars[DATE]])[-SERIES_POINTS:]
+    for k in SERIES_KEYS:
+        series[k] = (list(series.get(k) or []) + _clean(indicators[k][0]))[-SERIES_POINTS:]
+
+    latest = _latest(indicators)
+    return {
+        "symbol": symbol,
+        "type": "technical",
+        "title": "Technical Analysis",
+        "chart_data": series["close"][-30:],
+        "indicators": latest,
+        "series": series,
+        "indicator_state": state_to_doc(state),
+        "last_bar_date": float(data[DATE][-1]),
+        "last_bar": _last_bar(data),
+        "as_of": from_day(data[DATE][-1]),
+        "timestamp": datetime.utcnow(),
+        **summarize(latest),
+    }
+
+
+def refresh_technical_analysis(symbol: str, collection=None, store=None) -> Optional[Dict[str, Any]]:
+    """Bring a symbol's ``technical`` stock_analysis document up to date.
+
+    Returns the up-to-date document, or None when no prices are stored.
+    """
+    if collection is None:
+        from database.mongo_manager import get_stock_analysis_collection
+        collection = get_stock_analysis_collection()
+    store = store or get_price_store()
+    symbol = symbol.upper()
+    data = store.load(symbol)
+    if data is None or data.shape[1] == 0:
+        return None
+
+    query = {"symbol": symbol, "type": "technical"}
+    doc = build_technical_document(symbol, data, collection.find_one(query, TECHNICAL_STATE_PROJECTION))
+    if doc is None:
+        return collection.find_one(query, {"_id": 0, "indicator_state": 0})
+    collection.update_one(query, {"$set": doc}, upsert=True)
+    return doc
@@ -0,0 +1,100 @@
+"""
+Flask JSON provider backed by orjson, with a stdlib fallback.
+
+orjson serializes datetimes, dates and numpy arrays natively and returns
+bytes, so responses skip the str round trip. BSON types (ObjectId,
+Decimal128) and Decimal go through ``_default``. When orjson is not
+installed the same conversions are applied on top of the stdlib encoder,
+so responses look the same either way: datetimes as ISO 8601 strings,
+ObjectId and decimals as strings, NaN/Infinity as null. pymongo returns
+naive datetimes that are in UTC, so those are written with a ``+00:00``
+offset; without one, browsers would read them as local time.
+"""
+
+from datetime import date, datetime, timezone
+from decimal import Decimal
+import json
+import math
+from typing import Any
+
+from bson import Decimal128, ObjectId
+from flask.json.provider import DefaultJSONProvider
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+
+def isoformat_utc(value: datetime) -> str:
+    """ISO 8601 with an offset, treating naive datetimes as UTC (what pymongo returns)."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.isoformat()
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, Decimal128):
+        return str(obj.to_decimal())
+    if isinstance(obj, Decimal):
+        return str(obj)
+    if isinstance(obj, datetime):
+        return isoformat_utc(obj)
+    if isinstance(obj, date):
+        return obj.isoformat()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _finite(obj: Any) -> Any:
+    """Replace NaN/Infinity with None, as orjson does, for the stdlib path."""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {k: _finite(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite(v) for v in obj]
+    return obj
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    ensure_ascii = False
+
+    def _options(self, pretty: bool = False) -> int:
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NAIVE_UTC
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if pretty:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if orjson is not None and not kwargs:
+            return orjson.dumps(obj, default=_default, option=self._options()).decode("utf-8")
+        kwargs.setdefault("default", _default)
+        kwargs.setdefault("ensure_ascii", self.ensure_ascii)
+        kwargs.setdefault("sort_keys", self.sort_keys)
+        return json.dumps(_finite(obj), **kwargs)
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = (self.compact is None and self._app.debug) or self.compact is False
+        if orjson is not None:
+            body = orjson.dumps(obj, default=_default, option=self._options(pretty))
+        else:
+            body = self.dumps(obj, indent=2 if pretty else None,
+                              separators=None if pretty else (",", ":")).encode("utf-8")
+        return self._app.response_class(body + b"\n" if pretty else body, mimetype=self.mimetype)
@@ -0,0 +1,156 @@
+"""
+In-process request metrics exposed in Prometheus text format.
+
+``init_metrics(app)`` installs request hooks that record, per route
+template and method, a latency histogram, status code counts and request /
+response payload sizes, plus an in-flight gauge. The hot path is a
+perf_counter call, a bisect and a few integer increments under one lock;
+cumulative buckets and the text format are only built when /metrics is
+scraped.
+"""
+
+from bisect import bisect_left
+import threading
+import time
+from typing import Dict, List, Tuple
+
+from flask import Flask, g, request
+
+from services.password_hashing import LATENCY_BUCKETS as HASH_BUCKETS, get_hash_metrics
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+_lock = threading.Lock()
+_latency: Dict[Tuple[str, str], List] = {}   # (method, route) -> [bucket counts..., sum, count]
+_response_size: Dict[Tuple[str, str], List] = {}
+_request_bytes: Dict[Tuple[str, str], int] = {}
+_status: Dict[Tuple[str, str, int], int] = {}
+_in_flight = {"current": 0}
+
+
+def _observe(table: Dict, key, bounds, value: float) -> None:
+    row = table.get(key)
+    if row is None:
+        row = table[key] = [0] * (len(bounds) + 1) + [0.0, 0]
+    row[bisect_left(bounds, value)] += 1  # last slot is +Inf
+    row[-2] += value
+    row[-1] += 1
+
+
+def _route_key() -> Tuple[str, str]:
+    rule = request.url_rule
+    return request.method, rule.rule if rule is not None else "<unmatched>"
+
+
+def _before_request():
+    g._metrics_started = time.perf_counter()
+    with _lock:
+        _in_flight["current"] += 1
+
+
+def _after_request(response):
+    started = g.get("_metrics_started")
+    if started is None:
+        return response
+    elapsed = time.perf_counter() - started
+    key = _route_key()
+    # Streamed bodies (NDJSON, SSE) have no length yet; measuring them would buffer the stream.
+    size = (response.content_length if response.is_streamed else response.calculate_content_length()) or 0
+    with _lock:
+        _observe(_latency, key, LATENCY_BUCKETS, elapsed)
+        _observe(_response_size, key, SIZE_BUCKETS, size)
+        _request_bytes[key] = _request_bytes.get(key, 0) + (request.content_length or 0)
+        status_key = key + (response.status_code,)
+        _status[status_key] = _status.get(status_key, 0) + 1
+    return response
+
+
+def _teardown_request(exc):
+    if g.pop("_metrics_started", None) is not None:
+        with _lock:
+            _in_flight["current"] -= 1
+
+
+def init_metrics(app: Flask) -> None:
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{k}="{str(v)}"' for k, v in labels.items()) + "}"
+
+
+def _histogram(lines: List[str], name: str, bounds, rows: Dict, label_names=("method", "route")) -> None:
+    for key, row in sorted(rows.items()):
+        labels = dict(zip(label_names, key))
+        cumulative = 0
+        for bound, count in zip(list(bounds) + ["+Inf"], row[:-2]):
+            cumulative += count
+            lines.append(f"{name}_bucket{_labels(**labels, le=bound)} {cumulative}")
+        lines.append(f"{name}_sum{_labels(**labels)} {row[-2]}")
+        lines.append(f"{name}_count{_labels(**labels)} {row[-1]}")
+
+
+def render_prometheus() -> str:
+    with _lock:
+        latency = {k: list(v) for k, v in _latency.items()}
+        sizes = {k: list(v) for k, v in _response_size.items()}
+        request_bytes = dict(_request_bytes)
+        status = dict(_status)
+        in_flight = _in_flight["current"]
+
+    lines = [
+        "# HELP wealthwise_http_request_duration_seconds Request latency by route.",
+        "# TYPE wealthwise_http_request_duration_seconds histogram",
+    ]
+    _histogram(lines, "wealthwise_http_request_duration_seconds", LATENCY_BUCKETS, latency)
+
+    lines += [
+        "# HELP wealthwise_http_response_size_bytes Response body size by route.",
+        "# TYPE wealthwise_http_response_size_bytes histogram",
+    ]
+    _histogram(lines, "wealthwise_http_response_size_bytes", SIZE_BUCKETS, sizes)
+
+    lines += [
+        "# HELP wealthwise_http_request_size_bytes_total Request body bytes received by route.",
+        "# TYPE wealthwise_http_request_size_bytes_total counter",
+    ]
+    for (method, route), total in sorted(request_bytes.items()):
+        lines.append(f"wealthwise_http_request_size_bytes_total{_labels(method=method, route=route)} {total}")
+
+    lines += [
+        "# HELP wealthwise_http_responses_total Responses by route and status code.",
+        "# TYPE wealthwise_http_responses_total counter",
+    ]
+    for (method, route, code), count in sorted(status.items()):
+        lines.append(f"wealthwise_http_responses_total{_labels(method=method, route=route, status=code)} {count}")
+
+    lines += [
+        "# HELP wealthwise_http_requests_in_flight Requests currently being served.",
+        "# TYPE wealthwise_http_requests_in_flight gauge",
+        f"wealthwise_http_requests_in_flight {in_flight}",
+    ]
+
+    hashing = get_hash_metrics()
+    lines += [
+        "# HELP wealthwise_password_hash_duration_seconds Password hash/verify time on the hashing pool.",
+        "# TYPE wealthwise_password_hash_duration_seconds histogram",
+    ]
+    for op in ("hash", "verify"):
+        m = hashing.get(op)
+        if not m:
+            continue
+        # Hash buckets are already cumulative.
+        for bound, count in zip(HASH_BUCKETS, m["buckets"]):
+            lines.append(f"wealthwise_password_hash_duration_seconds_bucket{_labels(operation=op, le=bound)} {count}")
+        lines.append(f"wealthwise_password_hash_duration_seconds_bucket{_labels(operation=op, le='+Inf')} {m['count']}")
+        lines.append(f"wealthwise_password_hash_duration_seconds_sum{_labels(operation=op)} {m['sum']}")
+        lines.append(f"wealthwise_password_hash_duration_seconds_count{_labels(operation=op)} {m['count']}")
+    lines += [
+        "# HELP wealthwise_password_hash_rejected_total Sign-ins turned away because the hashing pool was full.",
+        "# TYPE wealthwise_password_hash_rejected_total counter",
+        f"wealthwise_password_hash_rejected_total {hashing.get('rejected', {}).get('count', 0)}",
+    ]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,412 @@
+"""
+Local mutual fund NAV store.
+
+Daily NAV files in the AMFI text format (``NAVAll.txt`` and the NAV history
+download: ``;``-separated rows under a ``Scheme Code;...`` header, with fund
+house and category lines in between) are imported into one raw
+``dates x schemes`` float64 matrix, ``navs.f64``, NaN where a scheme has no
+NAV for a date. Rows are the distinct NAV dates in ``dates.npy`` and columns
+follow ``schemes.json`` (code, name, ISINs), so a lookup is a dict hit plus a
+binary search on a memory-mapped array. ``latest.npy`` keeps each scheme's
+most recent NAV and its date for valuation.
+
+A daily import only appends the new date's row to ``navs.f64`` (and patches
+rows of dates already stored in place); the matrix is rewritten only when
+new schemes appear or a date lands before the last stored one. The small
+files are replaced atomically, ``dates.npy`` last, so readers never map rows
+that are not complete.
+
+``resolve_scheme`` maps free-text fund names as users type them
+("Nippon India Large Cap Fund Direct Growth") to scheme codes by normalized
+token overlap. The API revalues mutual fund holdings when the store's latest
+NAVs change (``start_nav_watch_if_enabled``), whichever process imported them.
+
+Drops go in ``<store>/incoming`` (NAV_STORE_DIR, default ``data/navs``) and
+are moved to ``incoming/processed``:
+
+    python services/nav_store.py                    # import <store>/incoming/*.txt
+    python services/nav_store.py --file NAVAll.txt
+    python services/nav_store.py --resolve "axis bluechip direct growth"
+    NAV_WATCH_ENABLED=1 python app.py               # revalue holdings on NAV imports
+"""
+
+from collections import defaultdict
+from datetime import datetime
+import json
+import os
+from pathlib import Path
+import re
+import shutil
+import sys
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.price_store import from_day, to_day
+
+DEFAULT_STORE_DIR = Path(__file__).resolve().parents[1] / "data" / "navs"
+MIN_RESOLVE_SCORE = 0.6
+WATCH_SECONDS = float(os.getenv("NAV_WATCH_SECONDS", "60"))
+
+_WORD = re.compile(r"[a-z0-9]+")
+# Words that differ between how users and AMFI spell the same plan.
+_NOISE = {"fund", "plan", "option", "the", "of", "and", "scheme"}
+_ALIASES = {"dir": "direct", "gr": "growth", "g": "growth", "reg": "regular", "idcw": "dividend", "div": "dividend"}
+
+
+def get_store_dir() -> Path:
+    return Path(os.getenv("NAV_STORE_DIR") or DEFAULT_STORE_DIR)
+
+
+def name_tokens(name: str) -> frozenset:
+    words = (_ALIASES.get(w, w) for w in _WORD.findall((name or "").lower()))
+    return frozenset(w for w in words if w not in _NOISE)
+
+
+def _parse_date(text: str) -> Optional[int]:
+    text = text.strip()
+    for fmt in ("%d-%b-%Y", "%d-%m-%Y", "%Y-%m-%d"):
+        try:
+            return to_day(datetime.strptime(text, fmt))
+        except ValueError:
+            continue
+    return None
+
+
+def parse_amfi(lines: Iterable[str]) -> Tuple[Dict[str, Dict[str, Any]], List[Tuple[str, int, float]]]:
+    """AMFI text -> ({code: scheme info}, [(code, day, nav)]). Rows without a usable NAV are skipped."""
+    schemes: Dict[str, Dict[str, Any]] = {}
+    navs: List[Tuple[str, int, float]] = []
+    days: Dict[str, Optional[int]] = {}  # a file repeats a handful of dates
+    cols = None
+    for line in lines:
+        parts = line.strip().split(";")
+        if len(parts) < 4:
+            continue  # blank, fund house or category line
+        if parts[0].strip().lower() == "scheme code":
+            names = [p.strip().lower().replace("/ ", "/") for p in parts]
+            find = lambda key: names.index(key) if key in names else None
+            cols = (find("scheme name"), find("net asset value"), find("date"),
+                    find("isin div payout/isin growth"), find("isin div reinvestment"))
+            continue
+        if cols is None or not parts[0].isdigit():
+            continue
+        name_i, nav_i, date_i, growth_i, reinv_i = cols
+        try:
+            nav = float(parts[nav_i])
+            text = parts[date_i]
+        except (ValueError, IndexError):
+            continue  # "N.A." for suspended schemes
+        day = days[text] if text in days else days.setdefault(text, _parse_date(text))
+        if day is None or not nav > 0:
+            continue
+        code = parts[0]
+        if code not in schemes:
+            field = lambda i: parts[i].strip() if i is not None and i < len(parts) else ""
+            schemes[code] = {"code": code, "name": field(name_i),
+                             "isin_growth": field(growth_i).strip("-") or None,
+                             "isin_reinvestment": field(reinv_i).strip("-") or None}
+        navs.append((code, day, nav))
+    return schemes, navs
+
+
+class NavStore:
+    """Memory-mapped date x scheme NAV matrix with an mtime-checked handle cache."""
+
+    def __init__(self, store_dir: Optional[Path] = None):
+        self.store_dir = Path(store_dir) if store_dir else get_store_dir()
+        self._lock = threading.Lock()
+        self._loaded_mtime: Optional[float] = None
+        self.schemes: List[Dict[str, Any]] = []
+        self.row_of: Dict[str, int] = {}
+        self.dates = np.zeros(0, dtype=np.int64)
+        self.navs = np.zeros((0, 0))  # dates x schemes
+        self.latest = np.zeros((2, 0))  # [nav, day] per scheme
+        self._by_name: Dict[str, str] = {}
+        self._by_token: Dict[str, List[int]] = {}
+        self._token_sets: List[frozenset] = []
+        self._resolved: Dict[str, Optional[str]] = {}
+
+    # -- reading -----------------------------------------------------------
+
+    def _path(self, name: str) -> Path:
+        return self.store_dir / name
+
+    def _map_navs(self, rows: int, width: int, mode: str = "r") -> np.ndarray:
+        if not rows or not width:
+            return np.zeros((rows, width))
+        return np.memmap(self._path("navs.f64"), dtype=np.float64, mode=mode, shape=(rows, width))
+
+    def refresh(self) -> "NavStore":
+        """(Re)open the store files if an import replaced them."""
+        try:
+            mtime = self._path("dates.npy").stat().st_mtime  # written last by an import
+        except FileNotFoundError:
+            return self
+        if mtime == self._loaded_mtime:
+            return self
+        with self._lock:
+            schemes = json.loads(self._path("schemes.json").read_text(encoding="utf-8"))
+            self.schemes = schemes
+            self.row_of = {s["code"]: i for i, s in enumerate(schemes)}
+            self.dates = np.load(self._path("dates.npy"))
+            self.navs = self._map_navs(len(self.dates), len(schemes))
+            self.latest = np.load(self._path("latest.npy"))
+            self._index_names()
+            self._loaded_mtime = mtime
+        return self
+
+    def _index_names(self) -> None:
+        self._by_name = {" ".join(sorted(name_tokens(s["name"]))): s["code"] for s in self.schemes}
+        self._token_sets = [name_tokens(s["name"]) for s in self.schemes]
+        by_token: Dict[str, List[int]] = defaultdict(list)
+        for i, tokens in enumerate(self._token_sets):
+            for token in tokens:
+                by_token[token].append(i)
+        self._by_token = dict(by_token)
+        self._resolved = {}
+
+    def scheme(self, code: str) -> Optional[Dict[str, Any]]:
+        row = self.refresh().row_of.get(str(code))
+        return None if row is None else self.schemes[row]
+
+    def nav_on(self, code: str, day: Any = None) -> Optional[Tuple[str, float]]:
+        """(date, NAV) of the last NAV on or before ``day`` (latest when omitted)."""
+        row = self.refresh().row_of.get(str(code))
+        if row is None:
+            return None
+        if day is None:
+            nav, last = self.latest[:, row]
+            return (from_day(last), float(nav)) if nav > 0 else None
+        hi = int(np.searchsorted(self.dates, to_day(day), side="right"))
+        values = self.navs[:hi, row]
+        present = np.flatnonzero(~np.isnan(values))
+        if not len(present):
+            return None
+        col = int(present[-1])
+        return from_day(self.dates[col]), float(values[col])
+
+    def history(self, code: str, start: Any = None, end: Any = None) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """(days, navs) for a scheme between ``start`` and ``end``, gaps dropped."""
+        row = self.refresh().row_of.get(str(code))
+        if row is None:
+            return None
+        lo = 0 if start is None else int(np.searchsorted(self.dates, to_day(start), side="left"))
+        hi = len(self.dates) if end is None else int(np.searchsorted(self.dates, to_day(end), side="right"))
+        values = self.navs[lo:hi, row]
+        present = ~np.isnan(values)
+        return self.dates[lo:hi][present], np.asarray(values[present])
+
+    def resolve_scheme(self, name: str) -> Optional[str]:
+        """Scheme code for a fund name, or None when nothing matches well enough."""
+        self.refresh()
+        if name in self._resolved:
+            return self._resolved[name]
+        tokens = name_tokens(name)
+        code = self._by_name.get(" ".join(sorted(tokens)))
+        if code is None and tokens:
+            # Jaccard overlap against schemes sharing the rarest words of the query.
+            candidates = set()
+            for token in sorted(tokens, key=lambda t: len(self._by_token.get(t, ())))[:3]:
+                candidates.update(self._by_token.get(token, ()))
+            best, best_score = None, MIN_RESOLVE_SCORE
+            for i in candidates:
+                other = self._token_sets[i]
+                score = len(tokens & other) / len(tokens | other)
+                if score > best_score or (score == best_score and best is not None
+                                          and len(other) < len(self._token_sets[best])):
+                    best, best_score = i, score
+            code = None if best is None else self.schemes[best]["code"]
+        self._resolved[name] = code
+        return code
+
+    # -- writing -----------------------------------------------------------
+
+    def _replace(self, name: str, write) -> None:
+        """Write a store file through a temporary file and swap it in atomically."""
+        path = self._path(name)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as fh:
+            write(fh)
+        os.replace(tmp, path)
+
+    def _save(self, name: str, array: np.ndarray) -> None:
+        self._replace(name, lambda fh: np.save(fh, array))
+
+    def _write_rows(self, old_rows: int, width: int, patch: Tuple[np.ndarray, np.ndarray, np.ndarray],
+                    new_rows: np.ndarray) -> None:
+        """Patch cells of the stored rows in place and append ``new_rows`` after them."""
+        rows, cols, values = patch
+        if len(rows):
+            navs = self._map_navs(old_rows, width, mode="r+")
+            navs[rows, cols] = values
+            navs.flush()
+            del navs
+        with open(self._path("navs.f64"), "r+b" if self._path("navs.f64").exists() else "wb") as fh:
+            fh.truncate(old_rows * width * 8)  # drop rows an interrupted import left behind
+            fh.seek(0, os.SEEK_END)
+            fh.write(np.ascontiguousarray(new_rows, dtype=np.float64).tobytes())
+
+    def import_lines(self, lines: Iterable[str]) -> Dict[str, float]:
+        """Merge AMFI rows into the store; returns {code: latest NAV} for schemes whose latest NAV moved."""
+        parsed, rows = parse_amfi(lines)
+        if not rows:
+            return {}
+        self.refresh()
+        schemes = list(self.schemes)
+        row_of = dict(self.row_of)
+        for code, info in parsed.items():
+            if code in row_of:
+                schemes[row_of[code]].update({k: v for k, v in info.items() if v})
+            else:
+                row_of[code] = len(schemes)
+                schemes.append(info)
+
+        codes, days, values = zip(*rows)
+        cols = np.fromiter((row_of[c] for c in codes), dtype=np.int64, count=len(codes))
+        days = np.array(days, dtype=np.int64)
+        values = np.array(values, dtype=np.float64)
+        old_dates, width = self.dates, len(schemes)
+        new_days = np.setdiff1d(days, old_dates)
+        dates = np.union1d(old_dates, days)
+        appendable = width == len(self.schemes) and (not len(new_days) or not len(old_dates)
+                                                      or new_days[0] > old_dates[-1])
+
+        # Latest NAV per scheme: rows in date order, so the newest assignment wins.
+        prev = np.zeros((2, width))
+        prev[:, :self.latest.shape[1]] = self.latest
+        latest = prev.copy()
+        order = np.argsort(days, kind="stable")
+        newer = order[days[order] >= latest[1, cols[order]]]
+        latest[0, cols[newer]] = values[newer]
+        latest[1, cols[newer]] = days[newer]
+        moved = np.flatnonzero((latest != prev).any(axis=0))
+
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            if appendable:
+                stored = np.isin(days, old_dates)
+                block = np.full((len(new_days), width), np.nan)
+                block[np.searchsorted(new_days, days[~stored]), cols[~stored]] = values[~stored]
+                self._write_rows(len(old_dates), width,
+                                 (np.searchsorted(old_dates, days[stored]), cols[stored], values[stored]), block)
+            else:
+                navs = np.full((len(dates), width), np.nan)
+                navs[np.searchsorted(dates, old_dates), :self.navs.shape[1]] = self.navs
+                navs[np.searchsorted(dates, days), cols] = values  # later rows win on equal dates
+                self.navs = np.zeros((0, 0))  # release the mapping before the file is replaced
+                self._replace("navs.f64", lambda fh: fh.write(navs.tobytes()))
+            self._replace("schemes.json", lambda fh: fh.write(json.dumps(schemes).encode("utf-8")))
+            self._save("latest.npy", latest)
+            self._save("dates.npy", dates)  # written last: its mtime marks a complete import
+            self._loaded_mtime = None
+        self.refresh()
+        return {schemes[i]["code"]: float(latest[0, i]) for i in moved}
+
+    def import_file(self, path: Path) -> Dict[str, float]:
+        with open(path, encoding="utf-8", errors="replace") as fh:
+            return self.import_lines(fh)
+
+    def ingest_directory(self, incoming: Optional[Path] = None) -> Dict[str, float]:
+        incoming = Path(incoming) if incoming else self.store_dir / "incoming"
+        if not incoming.exists():
+            return {}
+        processed = incoming / "processed"
+        processed.mkdir(parents=True, exist_ok=True)
+        moved: Dict[str, float] = {}
+        for path in sorted(incoming.glob("*.txt")):
+            moved.update(self.import_file(path))
+            shutil.move(str(path), str(processed / path.name))
+        return moved
+
+
+def push_navs_to_valuation(changed: Dict[str, float], store: Optional[NavStore] = None) -> int:
+    """Revalue mutual fund holdings whose scheme's latest NAV changed."""
+    from services.valuation import get_valuation_engine
+
+    if not changed:
+        return 0
+    store = store or get_nav_store()
+    engine = get_valuation_engine()
+    prices = {}
+    for key in engine.index().rows_of:
+        if key.startswith("MF:"):
+            code = store.resolve_scheme(key[3:])
+            if code in changed:
+                prices[key] = changed[code]
+    return engine.apply_prices(prices)
+
+
+def changed_latest(store: NavStore, seen: np.ndarray) -> Dict[str, float]:
+    """{code: latest NAV} for schemes whose latest NAV differs from ``seen`` (an earlier ``store.latest``)."""
+    prev = np.zeros_like(store.latest)
+    prev[:, :seen.shape[1]] = seen
+    moved = np.flatnonzero((store.latest != prev).any(axis=0) & (store.latest[0] > 0))
+    return {store.schemes[i]["code"]: float(store.latest[0, i]) for i in moved}
+
+
+_store: Optional[NavStore] = None
+_watch_thread: Optional[threading.Thread] = None
+_watch_stop = threading.Event()
+
+
+def get_nav_store() -> NavStore:
+    global _store
+    if _store is None:
+        _store = NavStore()
+    return _store
+
+
+def _watch_forever(interval: float) -> None:
+    store = get_nav_store()
+    seen = np.array(store.refresh().latest)
+    while not _watch_stop.wait(interval):
+        try:
+            store.refresh()
+            changed = changed_latest(store, seen)
+            seen = np.array(store.latest)
+            if changed:
+                print(f"📈 {len(changed)} NAVs changed; revalued holdings for {push_navs_to_valuation(changed, store)} users")
+        except Exception as e:
+            print(f"⚠️ NAV revaluation error: {e}")
+
+
+def start_nav_watch_if_enabled() -> Optional[threading.Thread]:
+    """Revalue mutual fund holdings in this process whenever an import changes the store's latest NAVs."""
+    global _watch_thread
+    if os.getenv("NAV_WATCH_ENABLED", "").lower() not in ("1", "true", "yes"):
+        return None
+    if _watch_thread is None:
+        _watch_thread = threading.Thread(target=_watch_forever, args=(WATCH_SECONDS,), name="nav-watch", daemon=True)
+        _watch_thread.start()
+    return _watch_thread
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Import AMFI NAV files into the local NAV store")
+    parser.add_argument("--incoming", help="Directory of NAV text drops (defaults to <store>/incoming)")
+    parser.add_argument("--file", help="Single AMFI NAV file to import")
+    parser.add_argument("--resolve", help="Print the scheme a fund name resolves to and exit")
+    parser.add_argument("--revalue", action="store_true",
+                        help="Also revalue user holdings from this process (when no API runs with NAV_WATCH_ENABLED)")
+    args = parser.parse_args()
+
+    store = get_nav_store()
+    if args.resolve:
+        code = store.resolve_scheme(args.resolve)
+        scheme = store.scheme(code) if code else None
+        print(f"✅ {code}: {scheme['name']} NAV {store.nav_on(code)}" if scheme else "❌ No matching scheme")
+        sys.exit(0)
+
+    if args.file:
+        changed = store.import_file(Path(args.file))
+    else:
+        changed = store.ingest_directory(Path(args.incoming) if args.incoming else None)
+    print(f"✅ {len(store.schemes)} schemes x {len(store.dates)} dates in {store.store_dir}; "
+          f"{len(changed)} latest NAVs changed")
+    if changed and args.revalue:
+        print(f"📈 Revalued holdings for {push_navs_to_valuation(changed, store)} users")
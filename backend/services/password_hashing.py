@@ -0,0 +1,107 @@
+"""
+Password hashing off the request threads.
+
+Hashes run on a small dedicated thread pool (hashlib's scrypt and pbkdf2
+release the GIL), and the number of hashes waiting or running is capped so
+a login spike is turned away with ``HashingBusyError`` instead of queueing
+behind every other route. The algorithm and cost come from the environment:
+
+    PASSWORD_HASH_METHOD   werkzeug method string, e.g. "scrypt:32768:8:1"
+                           or "pbkdf2:sha256:600000" (default: werkzeug's)
+    PASSWORD_HASH_WORKERS  threads hashing concurrently (default 2)
+    PASSWORD_HASH_QUEUE    extra hashes allowed to wait (default 32)
+    PASSWORD_HASH_WAIT_SECONDS  how long a request waits for a slot (default 2)
+
+Stored hashes made with a different method are reported by ``needs_rehash``
+so login can upgrade them transparently.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "")
+HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+HASH_QUEUE = int(os.getenv("PASSWORD_HASH_QUEUE", "32"))
+HASH_WAIT_SECONDS = float(os.getenv("PASSWORD_HASH_WAIT_SECONDS", "2"))
+
+# Latency histogram bucket upper bounds, in seconds.
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="password-hash")
+_slots = threading.BoundedSemaphore(HASH_WORKERS + HASH_QUEUE)
+_method_prefix: Optional[str] = None
+
+_metrics_lock = threading.Lock()
+_metrics: Dict[str, Dict] = {}
+
+
+class HashingBusyError(RuntimeError):
+    """Raised when no hashing slot frees up within PASSWORD_HASH_WAIT_SECONDS."""
+
+
+def _record(operation: str, seconds: float, queued: float) -> None:
+    with _metrics_lock:
+        m = _metrics.get(operation)
+        if m is None:
+            m = _metrics[operation] = {"count": 0, "sum": 0.0, "max": 0.0, "queue_sum": 0.0,
+                                       "buckets": [0] * len(LATENCY_BUCKETS)}
+        m["count"] += 1
+        m["sum"] += seconds
+        m["max"] = max(m["max"], seconds)
+        m["queue_sum"] += queued
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                m["buckets"][i] += 1
+
+
+def _run(operation: str, fn: Callable, *args):
+    if not _slots.acquire(timeout=HASH_WAIT_SECONDS):
+        with _metrics_lock:
+            _metrics.setdefault("rejected", {"count": 0})["count"] += 1
+        raise HashingBusyError("Too many concurrent sign-ins, please retry shortly")
+    submitted = time.perf_counter()
+    try:
+        def timed():
+            started = time.perf_counter()
+            result = fn(*args)
+            _record(operation, time.perf_counter() - started, started - submitted)
+            return result
+        return _executor.submit(timed).result()
+    finally:
+        _slots.release()
+
+
+def hash_password(password: str) -> str:
+    if HASH_METHOD:
+        return _run("hash", generate_password_hash, password, HASH_METHOD)
+    return _run("hash", generate_password_hash, password)
+
+
+def verify_password(stored_hash: str, password: str) -> bool:
+    return _run("verify", check_password_hash, stored_hash, password)
+
+
+def configured_method() -> str:
+    """Method prefix (e.g. "scrypt:32768:8:1") that new hashes are stored with."""
+    global _method_prefix
+    if _method_prefix is None:
+        # Let werkzeug fill in default cost parameters, then keep the prefix.
+        sample = generate_password_hash("", HASH_METHOD) if HASH_METHOD else generate_password_hash("")
+        _method_prefix = sample.split("$", 1)[0]
+    return _method_prefix
+
+
+def needs_rehash(stored_hash: str) -> bool:
+    return bool(stored_hash) and stored_hash.split("$", 1)[0] != configured_method()
+
+
+def get_hash_metrics() -> Dict[str, Dict]:
+    """Snapshot of per-operation counts, latency sums and histogram buckets."""
+    with _metrics_lock:
+        return {op: {k: (list(v) if isinstance(v, list) else v) for k, v in m.items()}
+                for op, m in _metrics.items()}
@@ -0,0 +1,207 @@
+"""
+Portfolio performance: XIRR, CAGR and absolute return from dated cash flows.
+
+A holding's cash flows come from its ``transactions`` (``{"date", "amount"}``
+with positive amounts invested and negative amounts withdrawn, or a ``type``
+of sell/redeem/withdrawal) or, failing that, a single ``invested_amount`` on
+``purchase_date``. Its ``current_value`` is the closing inflow on the
+valuation date. Holdings without either are reported as untracked.
+
+Every holding plus the whole portfolio is padded into one
+``rows x flows`` matrix and solved together: vectorized Newton iterations on
+``sum(c * (1 + r) ** -t) = 0`` with a bisection pass for the rows Newton
+could not settle, so thousands of holdings cost a few dozen array operations.
+"""
+
+from datetime import date
+import os
+import sys
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.price_store import from_day, to_day
+
+NEWTON_STEPS = 50
+BISECT_STEPS = 100
+TOLERANCE = 1e-9
+RATE_FLOOR = -0.999999
+_OUTFLOW_TYPES = {"sell", "redeem", "redemption", "withdrawal", "withdraw", "dividend"}
+
+Flows = List[Tuple[int, float]]  # (day, amount) from the investor's side: invested < 0, received > 0
+
+
+def pad_flows(flows: Sequence[Flows]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Ragged cash flow lists -> (amounts, years since each row's first flow, mask)."""
+    width = max((len(f) for f in flows), default=0)
+    amounts = np.zeros((len(flows), width))
+    days = np.zeros((len(flows), width))
+    mask = np.zeros((len(flows), width), dtype=bool)
+    for i, row in enumerate(flows):
+        if row:
+            d, a = zip(*row)
+            days[i, :len(row)], amounts[i, :len(row)], mask[i, :len(row)] = d, a, True
+    first = np.where(mask, days, np.inf).min(axis=1, keepdims=True)
+    years = np.where(mask, (days - np.where(np.isfinite(first), first, 0)) / 365.0, 0.0)
+    return amounts, years, mask
+
+
+def _npv(rate: np.ndarray, amounts: np.ndarray, years: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """NPV and its derivative for each row at that row's rate."""
+    log_base = np.log1p(rate)[:, None]
+    discount = np.exp(-years * log_base)
+    value = (amounts * discount).sum(axis=1)
+    slope = (-years * amounts * discount).sum(axis=1) / (1.0 + rate)
+    return value, slope
+
+
+def _solve(a: np.ndarray, t: np.ndarray, paid: np.ndarray, got: np.ndarray, span: np.ndarray) -> np.ndarray:
+    """Newton from a CAGR guess; bisection for the rows that did not converge."""
+    scale = np.abs(a).sum(axis=1)
+    # Start from the lump-sum CAGR over the span, which is exact for one flow each way.
+    r = np.clip((got / paid) ** (1.0 / span) - 1.0, -0.9, 10.0)
+    done = np.zeros(len(r), dtype=bool)
+    for _ in range(NEWTON_STEPS):
+        value, slope = _npv(r, a, t)
+        step = np.where(slope != 0, value / slope, np.nan)
+        r_next = np.maximum(r - step, RATE_FLOOR)
+        ok = np.isfinite(r_next)
+        r = np.where(ok & ~done, r_next, r)
+        done |= ok & (np.abs(step) < TOLERANCE) & (np.abs(value) < 1e-6 * scale)
+        if done.all():
+            break
+
+    if not done.all():
+        # Bisection between a floor just above -100% and a ceiling grown until the sign flips.
+        todo = np.flatnonzero(~done)
+        at, tt = a[todo], t[todo]
+        lo = np.full(len(todo), RATE_FLOOR)
+        hi = np.full(len(todo), 1.0)
+        f_lo = _npv(lo, at, tt)[0]
+        f_hi = _npv(hi, at, tt)[0]
+        for _ in range(12):
+            grow = np.sign(f_hi) == np.sign(f_lo)
+            if not grow.any():
+                break
+            hi = np.where(grow, hi * 4.0, hi)
+            f_hi = np.where(grow, _npv(hi, at, tt)[0], f_hi)
+        bracketed = np.sign(f_hi) != np.sign(f_lo)
+        for _ in range(BISECT_STEPS):
+            mid = (lo + hi) / 2.0
+            f_mid = _npv(mid, at, tt)[0]
+            left = np.sign(f_mid) == np.sign(f_lo)
+            lo, f_lo = np.where(left, mid, lo), np.where(left, f_mid, f_lo)
+            hi = np.where(left, hi, mid)
+        r[todo] = np.where(bracketed, (lo + hi) / 2.0, np.nan)
+
+    return r
+
+
+def xirr(amounts: np.ndarray, years: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """Annualised internal rate of return per row; NaN where none exists."""
+    amounts = np.where(mask, amounts, 0.0)
+    n = amounts.shape[0]
+    rate = np.full(n, np.nan)
+    paid = -np.where(amounts < 0, amounts, 0).sum(axis=1)
+    got = np.where(amounts > 0, amounts, 0).sum(axis=1)
+    span = years.max(axis=1) if years.size else np.zeros(n)
+    solvable = (paid > 0) & (got > 0) & (span > 0)
+    if not solvable.any():
+        return rate
+
+    with np.errstate(over="ignore", divide="ignore", invalid="ignore"):
+        rate[solvable] = _solve(amounts[solvable], years[solvable], paid[solvable], got[solvable], span[solvable])
+    return rate
+
+
+def cagr(invested: np.ndarray, final: np.ndarray, years: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = (final / invested) ** (1.0 / years) - 1.0
+    return np.where((invested > 0) & (final >= 0) & (years > 0), out, np.nan)
+
+
+def cash_flows(asset: Dict[str, Any], as_of: int) -> Optional[Flows]:
+    """Investor-side cash flows of one holding, ending with its current value on ``as_of``."""
+    flows: Flows = []
+    for tx in asset.get("transactions") or []:
+        try:
+            day, amount = to_day(tx["date"]), float(tx["amount"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if str(tx.get("type") or "").lower() in _OUTFLOW_TYPES:
+            amount = -abs(amount)
+        if day <= as_of and amount:
+            flows.append((day, -amount))
+    if not flows and asset.get("invested_amount") and asset.get("purchase_date"):
+        try:
+            flows.append((to_day(asset["purchase_date"]), -float(asset["invested_amount"])))
+        except (TypeError, ValueError):
+            pass
+    if not flows:
+        return None
+    flows.sort()
+    flows.append((as_of, float(asset.get("current_value") or 0)))
+    return flows
+
+
+def _round(value: float, digits: int = 4) -> Optional[float]:
+    return round(float(value), digits) if np.isfinite(value) else None
+
+
+def performance_rows(flows: Sequence[Flows]) -> List[Dict[str, Any]]:
+    """Invested, received, current value, absolute return, CAGR and XIRR for each flow list."""
+    amounts, years, mask = pad_flows(flows)
+    rates = xirr(amounts, years, mask)
+    last = mask.sum(axis=1) - 1
+    rows = np.arange(len(flows))
+    final = amounts[rows, last]                     # closing value on the valuation date
+    body = mask.copy()
+    body[rows, last] = False
+    invested = -np.where(body & (amounts < 0), amounts, 0).sum(axis=1)
+    received = np.where(body & (amounts > 0), amounts, 0).sum(axis=1)
+    span = years[rows, last]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        absolute = np.where(invested > 0, (final + received - invested) / invested, np.nan)
+    growth = cagr(invested - received, final, span)
+    return [{
+        "invested": round(float(invested[i]), 2),
+        "withdrawn": round(float(received[i]), 2),
+        "current_value": round(float(final[i]), 2),
+        "gain": round(float(final[i] + received[i] - invested[i]), 2),
+        "absolute_return": _round(absolute[i]),
+        "cagr": _round(growth[i]),
+        "xirr": _round(rates[i]),
+        "years": round(float(span[i]), 2),
+    } for i in range(len(flows))]
+
+
+def portfolio_performance(assets: List[Dict[str, Any]], as_of: Any = None) -> Dict[str, Any]:
+    """Per-holding and whole-portfolio returns for a user's assets."""
+    as_of_day = to_day(as_of or date.today())
+    tracked, holding_flows, untracked = [], [], []
+    for asset in assets or []:
+        flows = cash_flows(asset, as_of_day)
+        if flows is None:
+            untracked.append(asset.get("name"))
+        else:
+            tracked.append(asset)
+            holding_flows.append(flows)
+
+    if not holding_flows:
+        return {"as_of": from_day(as_of_day), "portfolio": None, "holdings": [], "untracked": untracked}
+
+    # The portfolio row is every holding's flows merged; one solve covers all rows.
+    merged: Dict[int, float] = {}
+    for flows in holding_flows:
+        for day, amount in flows:
+            merged[day] = merged.get(day, 0.0) + amount
+    rows = performance_rows(holding_flows + [sorted(merged.items())])
+    holdings = [dict({"name": a.get("name"), "type": a.get("type")}, **row) for a, row in zip(tracked, rows)]
+    portfolio = rows[-1]
+    # Merged flows fold same-day transactions into the closing value; restate totals from the holdings.
+    for key in ("invested", "withdrawn", "current_value", "gain"):
+        portfolio[key] = round(sum(h[key] for h in holdings), 2)
+    portfolio["absolute_return"] = (_round(portfolio["gain"] / portfolio["invested"])
+                                    if portfolio["invested"] > 0 else None)
+    return {"as_of": from_day(as_of_day), "portfolio": portfolio, "holdings": holdings, "untracked": untracked}
@@ -0,0 +1,354 @@
+"""
+Price feed ingestion for the ``stocks`` collection and the local price store.
+
+A vendor feed is stood in for by CSV / NDJSON files dropped into
+PRICE_FEED_DIR (default ``<price store>/feed``). Each line is a tick with a
+symbol, a price (``price``, ``ltp``, ``last`` or ``close``) and optionally
+``volume`` and ``timestamp``. Files are tailed as they grow and moved to
+``feed/processed`` once idle and fully read.
+
+Ticks are coalesced per symbol: every PRICE_FLUSH_SECONDS (default 2) the
+latest price of each symbol that ticked is written to ``stocks`` with
+unordered ``bulk_write`` batches, so Mongo load is bounded by the number of
+active symbols per window, not the tick rate. Ticks are also folded into a
+daily OHLCV bar per symbol, which is patched into the price store every
+PRICE_BAR_FLUSH_SECONDS (default 60). Subscribers registered with
+``add_subscriber`` receive each window's updates after the write.
+
+A symbol's bar is seeded from the store's last bar when that is today's, so
+a restart keeps the day's open, high, low and volume. Ticks for a day older
+than the symbol's current bar are dropped, and ticks older than the latest
+one seen only extend high/low/volume. Windows that fail to write are kept
+and retried on the next flush.
+
+Each write also stamps ``last_updated``. An API process that does not run the
+ingester itself follows those stamps instead (``follow``, polled every
+PRICE_FOLLOW_SECONDS), so its subscribers (the live price stream) see the
+windows an ingester in another process wrote. Holdings are revalued only by
+the process that runs the ingester, so each window is written to ``users``
+once however many API processes follow it.
+
+    python services/price_ingest.py            # run the ingester on its own
+    PRICE_INGEST_ENABLED=1 python app.py       # or inside the API process
+"""
+
+import csv
+from datetime import datetime
+import io
+import json
+import os
+from pathlib import Path
+import shutil
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+from pymongo import UpdateOne
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.price_store import CLOSE, DATE, PriceStore, get_price_store, to_day
+from services.valuation import get_valuation_engine
+
+FLUSH_SECONDS = float(os.getenv("PRICE_FLUSH_SECONDS", "2"))
+BAR_FLUSH_SECONDS = float(os.getenv("PRICE_BAR_FLUSH_SECONDS", "60"))
+POLL_SECONDS = float(os.getenv("PRICE_FEED_POLL_SECONDS", "0.5"))
+FILE_IDLE_SECONDS = float(os.getenv("PRICE_FEED_IDLE_SECONDS", "10"))
+BATCH_SIZE = int(os.getenv("PRICE_BULK_BATCH_SIZE", "1000"))
+FOLLOW_SECONDS = float(os.getenv("PRICE_FOLLOW_SECONDS", "2"))
+FOLLOW_PROJECTION = {"_id": 0, "symbol": 1, "current_price": 1, "change_percent": 1,
+                     "price_updated_at": 1, "last_updated": 1}
+
+
+def _parse_tick(row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    row = {str(k).strip().lower(): v for k, v in row.items() if k is not None}
+    symbol = str(row.get("symbol") or "").strip().upper()
+    price = next((row[k] for k in ("price", "ltp", "last", "close") if row.get(k) not in (None, "")), None)
+    if not symbol or price is None:
+        return None
+    try:
+        price = float(price)
+        volume = float(row.get("volume") or 0)
+    except (TypeError, ValueError):
+        return None
+    if not price > 0:
+        return None
+    ts = row.get("timestamp") or row.get("time") or row.get("date")
+    try:
+        ts = datetime.fromisoformat(str(ts).replace("Z", "+00:00")).replace(tzinfo=None) if ts else None
+    except ValueError:
+        ts = None
+    return {"symbol": symbol, "price": price, "volume": volume, "ts": ts or datetime.utcnow()}
+
+
+class FeedTailer:
+    """Reads complete new lines from the CSV / NDJSON files in a directory."""
+
+    def __init__(self, feed_dir: Path):
+        self.feed_dir = Path(feed_dir)
+        self.processed = self.feed_dir / "processed"
+        self._offsets: Dict[Path, int] = {}
+        self._headers: Dict[Path, List[str]] = {}
+        self._seen_growth: Dict[Path, float] = {}
+
+    def _read_lines(self, path: Path) -> List[str]:
+        offset = self._offsets.get(path, 0)
+        with open(path, "rb") as fh:
+            fh.seek(offset)
+            chunk = fh.read()
+        end = chunk.rfind(b"\n")  # leave a partially written last line for next time
+        if end < 0:
+            return []
+        self._offsets[path] = offset + end + 1
+        self._seen_growth[path] = time.monotonic()
+        return chunk[:end + 1].decode("utf-8", errors="replace").splitlines()
+
+    def poll(self) -> List[Dict[str, Any]]:
+        ticks: List[Dict[str, Any]] = []
+        if not self.feed_dir.exists():
+            return ticks
+        files = sorted((p for p in self.feed_dir.iterdir() if p.suffix in (".csv", ".ndjson", ".jsonl")),
+                       key=lambda p: p.stat().st_mtime)
+        for path in files:
+            lines = self._read_lines(path)
+            if path.suffix == ".csv":
+                if lines and path not in self._headers:
+                    self._headers[path] = next(csv.reader([lines.pop(0)]))
+                rows = csv.DictReader(io.StringIO("\n".join(lines)), fieldnames=self._headers.get(path)) if lines else []
+            else:
+                rows = []
+                for line in lines:
+                    try:
+                        rows.append(json.loads(line))
+                    except ValueError:
+                        continue
+            ticks.extend(t for t in map(_parse_tick, rows) if t)
+
+            idle = time.monotonic() - self._seen_growth.setdefault(path, time.monotonic())
+            if idle >= FILE_IDLE_SECONDS and self._offsets.get(path, 0) >= path.stat().st_size:
+                self.processed.mkdir(parents=True, exist_ok=True)
+                shutil.move(str(path), str(self.processed / path.name))
+                for table in (self._offsets, self._headers, self._seen_growth):
+                    table.pop(path, None)
+        return ticks
+
+
+class PriceIngestService:
+    def __init__(self, feed_dir: Optional[Path] = None, store: Optional[PriceStore] = None, stocks=None):
+        self.store = store or get_price_store()
+        self.feed_dir = Path(feed_dir or os.getenv("PRICE_FEED_DIR") or self.store.store_dir / "feed")
+        self._stocks = stocks
+        self.tailer = FeedTailer(self.feed_dir)
+        self._pending: Dict[str, Dict[str, Any]] = {}  # symbol -> latest tick in this window
+        self._bars: Dict[str, List[float]] = {}         # symbol -> today's [date, o, h, l, c, v]
+        self._last_ts: Dict[str, datetime] = {}         # symbol -> timestamp of the tick that set the close
+        self._dirty_bars: set = set()
+        self._prev_close: Dict[str, Optional[float]] = {}
+        self._subscribers: List[Callable[[List[Dict[str, Any]]], None]] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"ticks": 0, "late_ticks": 0, "windows": 0, "stock_updates": 0, "bars_written": 0}
+
+    @property
+    def stocks(self):
+        if self._stocks is None:
+            from database.mongo_manager import get_stocks_collection
+            self._stocks = get_stocks_collection()
+        return self._stocks
+
+    def add_subscriber(self, fn: Callable[[List[Dict[str, Any]]], None]) -> None:
+        self._subscribers.append(fn)
+
+    def _previous_close(self, symbol: str, day: int) -> Optional[float]:
+        if symbol not in self._prev_close:
+            data = self.store.load(symbol)
+            prev = None
+            if data is not None and data.shape[1]:
+                before = int(np.searchsorted(data[DATE], day, side="left"))
+                prev = float(data[CLOSE, before - 1]) if before else None
+            self._prev_close[symbol] = prev
+        return self._prev_close[symbol]
+
+    def _stored_bar(self, symbol: str) -> Optional[List[float]]:
+        data = self.store.load(symbol)
+        if data is None or not data.shape[1]:
+            return None
+        return [float(v) for v in data[:, -1]]
+
+    def add_ticks(self, ticks: List[Dict[str, Any]]) -> None:
+        for tick in ticks:
+            symbol, price, day = tick["symbol"], tick["price"], to_day(tick["ts"])
+            bar = self._bars.get(symbol)
+            if bar is None:
+                # First tick since start-up: continue the stored bar if it is this day's.
+                bar = self._stored_bar(symbol)
+                if bar is not None and bar[0] == day:
+                    self._bars[symbol] = bar
+            if bar is not None and bar[0] > day:
+                self.stats["late_ticks"] += 1
+                continue
+            if bar is None or bar[0] != day:
+                if bar is not None:
+                    self._prev_close[symbol] = bar[4]  # the bar being replaced closed the prior day
+                bar = self._bars[symbol] = [day, price, price, price, price, 0.0]
+            bar[2], bar[3] = max(bar[2], price), min(bar[3], price)
+            bar[5] += tick["volume"]
+            self._dirty_bars.add(symbol)
+            last = self._last_ts.get(symbol)
+            if last is None or tick["ts"] >= last:
+                self._last_ts[symbol] = tick["ts"]
+                bar[4] = price
+                self._pending[symbol] = tick
+        self.stats["ticks"] += len(ticks)
+
+    def flush_prices(self) -> List[Dict[str, Any]]:
+        """Write the latest price of every symbol that ticked since the last flush."""
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return []
+        updates = []
+        for symbol, tick in pending.items():
+            prev = self._previous_close(symbol, self._bars[symbol][0])
+            updates.append({
+                "symbol": symbol,
+                "price": tick["price"],
+                "change_percent": round((tick["price"] / prev - 1) * 100, 2) if prev else None,
+                "ts": tick["ts"],
+            })
+        now = datetime.utcnow()
+        ops = [UpdateOne({"symbol": u["symbol"]}, {"$set": dict(
+            {"current_price": u["price"], "price_updated_at": u["ts"], "last_updated": now},
+            **({"change_percent": u["change_percent"]} if u["change_percent"] is not None else {}),
+        )}) for u in updates]
+        try:
+            for i in range(0, len(ops), BATCH_SIZE):
+                self.stocks.bulk_write(ops[i:i + BATCH_SIZE], ordered=False)
+        except Exception:
+            # Keep the window for the next flush unless a newer tick replaced it meanwhile.
+            for symbol, tick in pending.items():
+                self._pending.setdefault(symbol, tick)
+            raise
+        self.stats["windows"] += 1
+        self.stats["stock_updates"] += len(updates)
+        self._notify(updates)
+        return updates
+
+    def _notify(self, updates: List[Dict[str, Any]]) -> None:
+        for fn in list(self._subscribers):
+            try:
+                fn(updates)
+            except Exception as e:
+                print(f"⚠️ Price subscriber failed: {e}")
+
+    def follow(self) -> None:
+        """Hand price writes made by an ingester in another process to this process's subscribers."""
+        latest = self.stocks.find_one({"last_updated": {"$type": "date"}}, {"_id": 0, "last_updated": 1},
+                                      sort=[("last_updated", -1)])
+        since = latest["last_updated"] if latest else datetime.utcnow()
+        # Symbols already seen at ``since``: a window may still be mid-write when it is read.
+        seen = {r["symbol"] for r in self.stocks.find({"last_updated": since}, {"_id": 0, "symbol": 1})}
+        while not self._stop.wait(FOLLOW_SECONDS):
+            try:
+                rows = [r for r in self.stocks.find({"last_updated": {"$gte": since}}, FOLLOW_PROJECTION)
+                        .sort("last_updated", 1) if not (r["last_updated"] == since and r["symbol"] in seen)]
+                if not rows:
+                    continue
+                if rows[-1]["last_updated"] != since:
+                    since, seen = rows[-1]["last_updated"], set()
+                seen.update(r["symbol"] for r in rows if r["last_updated"] == since)
+                self._notify([{"symbol": r["symbol"], "price": r.get("current_price"),
+                               "change_percent": r.get("change_percent"),
+                               "ts": r.get("price_updated_at") or r["last_updated"]} for r in rows])
+            except Exception as e:
+                print(f"⚠️ Price follow error: {e}")
+
+    def flush_bars(self) -> int:
+        """Patch the current bar of every symbol that ticked into the price store."""
+        dirty, self._dirty_bars = self._dirty_bars, set()
+        written = 0
+        try:
+            for symbol in dirty:
+                self.store.put_bar(symbol, self._bars[symbol])
+                written += 1
+        except Exception:
+            self._dirty_bars |= dirty
+            raise
+        finally:
+            self.stats["bars_written"] += written
+        return written
+
+    def run(self) -> None:
+        next_flush = time.monotonic() + FLUSH_SECONDS
+        next_bars = time.monotonic() + BAR_FLUSH_SECONDS
+        while not self._stop.is_set():
+            try:
+                self.add_ticks(self.tailer.poll())
+                now = time.monotonic()
+                if now >= next_flush:
+                    self.flush_prices()
+                    next_flush = now + FLUSH_SECONDS
+                if now >= next_bars:
+                    self.flush_bars()
+                    next_bars = now + BAR_FLUSH_SECONDS
+            except Exception as e:
+                print(f"⚠️ Price ingest error: {e}")
+            self._stop.wait(POLL_SECONDS)
+        self.flush_prices()
+        self.flush_bars()
+
+    def start(self, follow: bool = False) -> None:
+        """Run the ingester, or with ``follow`` only relay another process's writes, in a background thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.follow if follow else self.run,
+                                            name="price-follow" if follow else "price-ingest", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+_service: Optional[PriceIngestService] = None
+
+
+def get_price_ingest() -> PriceIngestService:
+    global _service
+    if _service is None:
+        _service = PriceIngestService()
+    return _service
+
+
+def start_price_ingest_if_enabled() -> Optional[PriceIngestService]:
+    """Run the ingester in this process, or else follow the one running elsewhere (PRICE_FOLLOW_ENABLED=0 to skip)."""
+    service = get_price_ingest()
+    if os.getenv("PRICE_INGEST_ENABLED", "").lower() in ("1", "true", "yes"):
+        service.add_subscriber(get_valuation_engine().on_price_updates)
+        service.start()
+        print(f"📈 Price ingest watching {service.feed_dir}")
+        return service
+    if os.getenv("PRICE_FOLLOW_ENABLED", "1").lower() in ("1", "true", "yes"):
+        service.start(follow=True)
+        print(f"📈 Following price updates in stocks every {FOLLOW_SECONDS:g}s")
+    return None
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Tail a price feed directory into stocks and the price store")
+    parser.add_argument("--feed-dir", help="Directory of CSV / NDJSON tick files (default PRICE_FEED_DIR)")
+    args = parser.parse_args()
+
+    service = PriceIngestService(args.feed_dir)
+    service.add_subscriber(get_valuation_engine().on_price_updates)
+    print(f"📈 Watching {service.feed_dir} (flush every {FLUSH_SECONDS}s, bars every {BAR_FLUSH_SECONDS}s)")
+    service.start()
+    try:
+        while True:
+            time.sleep(10)
+            print(f"  - {service.stats}")
+    except KeyboardInterrupt:
+        service.stop()
+        print(f"✅ Stopped: {service.stats}")
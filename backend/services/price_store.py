@@ -0,0 +1,289 @@
+"""
+Local columnar OHLCV price store.
+
+One ``<SYMBOL>.npy`` file per symbol holding a ``6 x n`` float64 array whose
+rows are the columns date (days since epoch), open, high, low, close and
+volume. Files are opened memory-mapped, so range slicing is a binary search
+plus a view and return/CAGR/drawdown maths never leave NumPy.
+
+Prices arrive as CSV drops in ``<store>/incoming``; ``ingest_directory``
+merges them into the per-symbol files and moves them to ``incoming/processed``.
+"""
+
+import csv
+import os
+import re
+import shutil
+import threading
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_STORE_DIR = Path(__file__).resolve().parents[1] / "data" / "prices"
+
+COLUMNS = ("date", "open", "high", "low", "close", "volume")
+DATE, OPEN, HIGH, LOW, CLOSE, VOLUME = range(len(COLUMNS))
+EPOCH = date(1970, 1, 1)
+
+_SAFE_SYMBOL = re.compile(r"[^A-Z0-9._&-]")
+
+
+def get_store_dir() -> Path:
+    return Path(os.getenv("PRICE_STORE_DIR") or DEFAULT_STORE_DIR)
+
+
+def to_day(value: Any) -> int:
+    """Date / datetime / 'YYYY-MM-DD' -> days since 1970-01-01."""
+    if isinstance(value, datetime):
+        value = value.date()
+    if not isinstance(value, date):
+        value = datetime.strptime(str(value).strip()[:10], "%Y-%m-%d").date()
+    return (value - EPOCH).days
+
+
+def from_day(day: float) -> str:
+    return (EPOCH + timedelta(days=int(day))).isoformat()
+
+
+def _symbol_file(symbol: str, store_dir: Optional[Path] = None) -> Path:
+    safe = _SAFE_SYMBOL.sub("_", symbol.strip().upper())
+    return (store_dir or get_store_dir()) / f"{safe}.npy"
+
+
+class PriceStore:
+    """Memory-mapped per-symbol OHLCV arrays with an mtime-checked handle cache."""
+
+    def __init__(self, store_dir: Optional[Path] = None):
+        self.store_dir = Path(store_dir) if store_dir else get_store_dir()
+        self._handles: Dict[str, Tuple[float, np.ndarray]] = {}
+        self._lock = threading.Lock()
+
+    # -- reading -----------------------------------------------------------
+
+    def symbols(self) -> List[str]:
+        if not self.store_dir.exists():
+            return []
+        return sorted(p.stem for p in self.store_dir.glob("*.npy"))
+
+    def has(self, symbol: str) -> bool:
+        return _symbol_file(symbol, self.store_dir).exists()
+
+    def load(self, symbol: str) -> Optional[np.ndarray]:
+        """Full ``6 x n`` array for a symbol (memory-mapped, read-only)."""
+        path = _symbol_file(symbol, self.store_dir)
+        try:
+            mtime = path.stat().st_mtime
+        except FileNotFoundError:
+            return None
+        key = path.stem
+        cached = self._handles.get(key)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        data = np.load(path, mmap_mode="r")
+        with self._lock:
+            self._handles[key] = (mtime, data)
+        return data
+
+    def last_date(self, symbol: str) -> Optional[date]:
+        data = self.load(symbol)
+        if data is None or data.shape[1] == 0:
+            return None
+        return EPOCH + timedelta(days=int(data[DATE, -1]))
+
+    def get_range(self, symbol: str, start: Any = None, end: Any = None) -> Optional[np.ndarray]:
+        """Bars with ``start <= date <= end`` as a view of the stored columns."""
+        data = self.load(symbol)
+        if data is None:
+            return None
+        dates = data[DATE]
+        lo = 0 if start is None else int(np.searchsorted(dates, to_day(start), side="left"))
+        hi = len(dates) if end is None else int(np.searchsorted(dates, to_day(end), side="right"))
+        return data[:, lo:hi]
+
+    # -- writing -----------------------------------------------------------
+
+    def write(self, symbol: str, bars: np.ndarray) -> int:
+        """Merge ``6 x k`` bars into a symbol's file; later bars win on equal dates."""
+        bars = np.asarray(bars, dtype=np.float64)
+        if bars.ndim != 2 or bars.shape[0] != len(COLUMNS) or bars.shape[1] == 0:
+            return 0
+        path = _symbol_file(symbol, self.store_dir)
+        # Read the current bars into memory rather than through the cached
+        # memmap: a file that is still mapped cannot be replaced on Windows.
+        existing = np.load(path) if path.exists() else None
+        merged = bars if existing is None else np.concatenate([existing, bars], axis=1)
+        # Stable sort, then keep the last row of each date so newer drops override.
+        order = np.argsort(merged[DATE], kind="stable")
+        merged = merged[:, order]
+        keep = np.append(merged[DATE, 1:] != merged[DATE, :-1], True)
+        merged = np.ascontiguousarray(merged[:, keep])
+
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp.npy")
+        np.save(tmp, merged)
+        with self._lock:
+            self._handles.pop(path.stem, None)
+        os.replace(tmp, path)
+        return int(bars.shape[1])
+
+    def put_bar(self, symbol: str, bar: Any) -> int:
+        """Upsert one bar. A bar for the last stored date is patched into the
+        file in place through a writable memmap; any other date (a new day,
+        once per symbol) goes through ``write``, which rewrites the file."""
+        bar = np.asarray(bar, dtype=np.float64).reshape(len(COLUMNS))
+        path = _symbol_file(symbol, self.store_dir)
+        if path.exists():
+            data = np.load(path, mmap_mode="r+")
+            try:
+                if data.shape[1] and data[DATE, -1] == bar[DATE]:
+                    data[:, -1] = bar
+                    data.flush()
+                    return 1
+            finally:
+                del data
+        return self.write(symbol, bar.reshape(len(COLUMNS), 1))
+
+    def ingest_csv(self, path: Path, default_symbol: Optional[str] = None) -> Dict[str, int]:
+        """Load a CSV drop with columns date, open, high, low, close, volume and an
+        optional symbol column; files without one use their file name as the symbol."""
+        rows: Dict[str, List[List[float]]] = {}
+        default_symbol = default_symbol or Path(path).stem
+        with open(path, newline="", encoding="utf-8") as fh:
+            reader = csv.DictReader(fh)
+            for raw in reader:
+                row = {(k or "").strip().lower(): (v or "").strip() for k, v in raw.items()}
+                try:
+                    close = float(row.get("close") or row.get("adj close") or row.get("price"))
+                    bar = [
+                        to_day(row.get("date") or row.get("timestamp")),
+                        float(row.get("open") or close),
+                        float(row.get("high") or close),
+                        float(row.get("low") or close),
+                        close,
+                        float(row.get("volume") or 0),
+                    ]
+                except (TypeError, ValueError):
+                    continue
+                symbol = (row.get("symbol") or default_symbol).upper()
+                rows.setdefault(symbol, []).append(bar)
+        return {sym: self.write(sym, np.array(bars).T) for sym, bars in rows.items()}
+
+    def ingest_directory(self, incoming: Optional[Path] = None) -> Dict[str, int]:
+        incoming = Path(incoming) if incoming else self.store_dir / "incoming"
+        if not incoming.exists():
+            return {}
+        processed = incoming / "processed"
+        processed.mkdir(parents=True, exist_ok=True)
+        totals: Dict[str, int] = {}
+        for path in sorted(incoming.glob("*.csv")):
+            for symbol, count in self.ingest_csv(path).items():
+                totals[symbol] = totals.get(symbol, 0) + count
+            shutil.move(str(path), str(processed / path.name))
+        return totals
+
+
+# -- metrics -----------------------------------------------------------------
+
+def period_return(close: np.ndarray) -> float:
+    return float(close[-1] / close[0] - 1.0)
+
+
+def cagr(close: np.ndarray, dates: np.ndarray) -> Optional[float]:
+    years = (dates[-1] - dates[0]) / 365.25
+    if years <= 0 or close[0] <= 0:
+        return None
+    return float((close[-1] / close[0]) ** (1.0 / years) - 1.0)
+
+
+def max_drawdown(close: np.ndarray) -> Tuple[float, int, int]:
+    """Largest peak-to-trough fall as (fraction, peak index, trough index)."""
+    peaks = np.maximum.accumulate(close)
+    drawdowns = close / peaks - 1.0
+    trough = int(np.argmin(drawdowns))
+    peak = int(np.argmax(close[: trough + 1])) if trough else 0
+    return float(drawdowns[trough]), peak, trough
+
+
+def performance(symbol: str, start: Any = None, end: Any = None,
+                store: Optional["PriceStore"] = None) -> Optional[Dict[str, Any]]:
+    """Exact return, CAGR and max drawdown over ``[start, end]`` from stored closes."""
+    bars = (store or get_price_store()).get_range(symbol, start, end)
+    if bars is None or bars.shape[1] < 2:
+        return None
+    close, dates = bars[CLOSE], bars[DATE]
+    dd, peak, trough = max_drawdown(close)
+    return {
+        "symbol": symbol.upper(),
+        "start_date": from_day(dates[0]),
+        "end_date": from_day(dates[-1]),
+        "start_close": float(close[0]),
+        "end_close": float(close[-1]),
+        "high": float(bars[HIGH].max()),
+        "low": float(bars[LOW].min()),
+        "bars": int(bars.shape[1]),
+        "period_return": period_return(close),
+        "cagr": cagr(close, dates),
+        "max_drawdown": dd,
+        "drawdown_peak_date": from_day(dates[peak]),
+        "drawdown_trough_date": from_day(dates[trough]),
+    }
+
+
+_PERIOD = re.compile(r"(\d+)\s*(d|day|days|w|wk|week|weeks|m|mo|mon|month|months|y|yr|yrs|year|years)\b")
+
+
+def parse_period(text: str, end: Optional[date] = None) -> Tuple[Optional[date], date]:
+    """'6 months', '1y', 'ytd', 'max' -> (start, end). Unknown text means full history."""
+    end = end or date.today()
+    text = (text or "").strip().lower()
+    if text in ("ytd", "year to date"):
+        return date(end.year, 1, 1), end
+    match = _PERIOD.search(text)
+    if not match:
+        return None, end
+    n, unit = int(match.group(1)), match.group(2)[0]
+    days = {"d": 1, "w": 7, "m": 30.4375, "y": 365.25}[unit] * n
+    return end - timedelta(days=round(days)), end
+
+
+def resolve_symbol(name: str, store: Optional["PriceStore"] = None) -> Optional[str]:
+    """Find a stored symbol for a ticker, trying the NSE/BSE suffixes too."""
+    store = store or get_price_store()
+    base = (name or "").strip().upper()
+    if not base:
+        return None
+    for candidate in (base, f"{base}.NS", f"{base}.BO"):
+        if store.has(candidate):
+            return candidate
+    return None
+
+
+_store: Optional[PriceStore] = None
+
+
+def get_price_store() -> PriceStore:
+    global _store
+    if _store is None:
+        _store = PriceStore()
+    return _store
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Load CSV price drops into the local OHLCV store")
+    parser.add_argument("--incoming", help="Directory of CSV drops (defaults to <store>/incoming)")
+    parser.add_argument("--file", help="Single CSV file to ingest")
+    parser.add_argument("--symbol", help="Symbol for --file when the CSV has no symbol column")
+    args = parser.parse_args()
+
+    store = get_price_store()
+    if args.file:
+        result = store.ingest_csv(Path(args.file), args.symbol)
+    else:
+        result = store.ingest_directory(Path(args.incoming) if args.incoming else None)
+    print(f"✅ Ingested {sum(result.values())} bars for {len(result)} symbols into {store.store_dir}")
+    for symbol, count in sorted(result.items()):
+        print(f"  - {symbol}: {count}")
@@ -0,0 +1,180 @@
+"""
+Server-sent events fan-out of live prices.
+
+One in-process ``PriceBroadcaster`` receives each coalesced window from the
+price ingester and hands it to every subscribed client. Each update is
+JSON-encoded once per window, not per client, and routed through a
+symbol -> subscribers index, so the cost of a window is proportional to the
+deliveries it makes. Clients read from their own bounded queue
+(PRICE_STREAM_QUEUE, default 256 events): a slow consumer loses its oldest
+undelivered updates instead of holding up the producer, and the number
+dropped is reported to it. New subscribers get a snapshot of the last known
+prices from memory, so watchers never read from Mongo.
+
+A client's slot is released when its response is closed
+(``release_on_close``), which also covers HEAD requests and clients that
+disconnect before the stream generator ever runs.
+"""
+
+from collections import deque
+from datetime import datetime
+import json
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.json_provider import isoformat_utc
+
+QUEUE_SIZE = int(os.getenv("PRICE_STREAM_QUEUE", "256"))
+MAX_CLIENTS = int(os.getenv("PRICE_STREAM_MAX_CLIENTS", "5000"))
+HEARTBEAT_SECONDS = float(os.getenv("PRICE_STREAM_HEARTBEAT_SECONDS", "15"))
+MAX_SYMBOLS = 500
+
+
+class TooManySubscribersError(RuntimeError):
+    pass
+
+
+def _default(obj: Any) -> Any:
+    # Tick timestamps are naive UTC; write them like the API's JSON responses do.
+    return isoformat_utc(obj) if isinstance(obj, datetime) else str(obj)
+
+
+def _encode(update: Dict[str, Any]) -> str:
+    return json.dumps(update, default=_default, separators=(",", ":"))
+
+
+class Subscription:
+    def __init__(self, symbols: Optional[Set[str]]):
+        self.symbols = symbols  # None means every symbol
+        self.queue: deque = deque(maxlen=QUEUE_SIZE)
+        self.dropped = 0
+        self.ready = threading.Event()
+        self.closed = False
+
+    def put(self, encoded: str) -> None:
+        if len(self.queue) == self.queue.maxlen:
+            self.dropped += 1
+        self.queue.append(encoded)
+        self.ready.set()
+
+    def drain(self) -> List[str]:
+        self.ready.clear()
+        items = []
+        while self.queue:
+            items.append(self.queue.popleft())
+        return items
+
+
+class PriceBroadcaster:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_symbol: Dict[str, Set[Subscription]] = {}
+        self._all: Set[Subscription] = set()
+        self._count = 0
+        self._latest: Dict[str, str] = {}  # symbol -> last encoded update
+        self.published = 0
+
+    def subscribe(self, symbols: Optional[Set[str]] = None) -> Subscription:
+        sub = Subscription(symbols)
+        with self._lock:
+            if self._count >= MAX_CLIENTS:
+                raise TooManySubscribersError(f"Price stream is at its limit of {MAX_CLIENTS} clients")
+            self._count += 1
+            if symbols is None:
+                self._all.add(sub)
+                snapshot = list(self._latest.values())
+            else:
+                for symbol in symbols:
+                    self._by_symbol.setdefault(symbol, set()).add(sub)
+                snapshot = [self._latest[s] for s in symbols if s in self._latest]
+        for encoded in snapshot:
+            sub.put(encoded)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        """Release a client's slot; safe to call more than once."""
+        with self._lock:
+            if sub.closed:
+                return
+            sub.closed = True
+            self._count -= 1
+            if sub.symbols is None:
+                self._all.discard(sub)
+                return
+            for symbol in sub.symbols:
+                subs = self._by_symbol.get(symbol)
+                if subs is not None:
+                    subs.discard(sub)
+                    if not subs:
+                        del self._by_symbol[symbol]
+
+    def publish(self, updates: List[Dict[str, Any]]) -> None:
+        """Ingest subscriber: fan one window of price updates out to clients."""
+        encoded = {u["symbol"]: _encode(u) for u in updates}
+        with self._lock:
+            self._latest.update(encoded)
+            deliveries = [(sub, line) for symbol, line in encoded.items()
+                          for sub in self._by_symbol.get(symbol, ())]
+            everyone = list(self._all)
+        for sub, line in deliveries:
+            sub.put(line)
+        for sub in everyone:
+            for line in encoded.values():
+                sub.put(line)
+        self.published += len(updates)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"clients": self._count, "symbols_watched": len(self._by_symbol),
+                    "symbols_known": len(self._latest), "published": self.published}
+
+
+def parse_symbols(raw: Optional[str]) -> Optional[Set[str]]:
+    """``symbols`` query parameter -> set of symbols, or None to watch all."""
+    symbols = {s.strip().upper() for s in (raw or "").split(",") if s.strip()}
+    if len(symbols) > MAX_SYMBOLS:
+        raise ValueError(f"At most {MAX_SYMBOLS} symbols per stream")
+    return symbols or None
+
+
+def release_on_close(response, broadcaster: "PriceBroadcaster", sub: Subscription):
+    """Unsubscribe when the response is closed, whether or not the stream was ever iterated."""
+    response.call_on_close(lambda: broadcaster.unsubscribe(sub))
+    return response
+
+
+def event_stream(broadcaster: "PriceBroadcaster", sub: Subscription) -> Iterator[str]:
+    """SSE frames for one client: a ``prices`` event per wake-up, heartbeats while idle."""
+    try:
+        yield "retry: 3000\n\n"
+        last_sent = time.monotonic()
+        while True:
+            if sub.ready.wait(HEARTBEAT_SECONDS):
+                items = sub.drain()
+                dropped, sub.dropped = sub.dropped, 0
+                if items:
+                    yield f"event: prices\ndata: [{','.join(items)}]\n\n"
+                if dropped:
+                    yield f"event: dropped\ndata: {dropped}\n\n"
+                last_sent = time.monotonic()
+            elif time.monotonic() - last_sent >= HEARTBEAT_SECONDS:
+                yield ": keep-alive\n\n"
+                last_sent = time.monotonic()
+    finally:
+        broadcaster.unsubscribe(sub)
+
+
+_broadcaster: Optional[PriceBroadcaster] = None
+_broadcaster_lock = threading.Lock()
+
+
+def get_price_broadcaster() -> PriceBroadcaster:
+    global _broadcaster
+    with _broadcaster_lock:
+        if _broadcaster is None:
+            _broadcaster = PriceBroadcaster()
+    return _broadcaster
@@ -0,0 +1,263 @@
+"""
+Rebalancing against a user's stored ``portfolio_allocation`` targets.
+
+Assets are mapped to the five allocation buckets (equity, debt, gold,
+international, cash; bank balances count as cash, while real estate, vehicles
+and assets of unknown category are left out), giving a ``users x 5`` matrix of current weights next to the target
+weights. A bucket needs action when its weight is more than the drift band
+(REBALANCE_BAND, default 5 percentage points) away from target. The proposed
+trades are minimal: out-of-band buckets move only to the nearest band edge,
+and the difference is absorbed by the buckets with room left inside their
+band, so in-band buckets are touched no more than needed to balance.
+Trades are rounded to hundreds and those under REBALANCE_MIN_TRADE dropped
+unless a bucket would stay out of band without them; ``rebalanceable`` is
+False when no trade can bring a flagged portfolio back inside the band.
+
+``rebalance_users`` does all of this with array operations over any number
+of users; ``run_batch`` streams every user with targets through it and
+stores the result in each user's ``rebalancing`` field for instant display.
+
+    python services/rebalancing.py --batch-size 2000 --band 5
+"""
+
+from datetime import datetime
+import math
+import os
+import re
+import sys
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from pymongo import UpdateOne
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.financial_summary import asset_category
+
+BUCKETS = ("equity", "debt", "gold", "international", "cash")
+EQUITY, DEBT, GOLD, INTERNATIONAL, CASH = range(len(BUCKETS))
+BAND = float(os.getenv("REBALANCE_BAND", "5"))
+MAX_BAND = 50.0
+MIN_TRADE = float(os.getenv("REBALANCE_MIN_TRADE", "1000"))
+ROUND_TO = 100  # trades are proposed in whole hundreds
+PROJECTION = {"email": 1, "assets.name": 1, "assets.type": 1, "assets.category": 1, "assets.current_value": 1,
+              "bank_accounts.current_balance": 1, "portfolio_allocation": 1}
+
+
+def _rule(*words: str) -> "re.Pattern":
+    return re.compile(r"\b(?:" + "|".join(re.escape(w) for w in words) + r")\b")
+
+
+# The asset type decides first (a "Stock" named "Global Health" is equity);
+# mutual funds and untyped assets fall through to their name, then to the
+# summary's category (financial_summary.asset_category).
+_TYPE_RULES = [
+    (_rule("real estate", "property", "land", "vehicle", "vehicles"), None),
+    (_rule("stock", "stocks", "equity", "share", "shares"), EQUITY),
+    (_rule("ppf", "epf", "fd", "fixed deposit", "bond", "bonds", "nps", "debt"), DEBT),
+    (_rule("gold", "sgb"), GOLD),
+    (_rule("cash", "savings"), CASH),
+]
+_NAME_RULES = [
+    (_rule("international", "global", "overseas", "nasdaq", "s&p", "us equity", "fof"), INTERNATIONAL),
+    (_rule("gold", "silver"), GOLD),
+    (_rule("debt", "bond", "gilt", "liquid", "short term", "corporate", "money market", "overnight",
+           "ppf", "provident", "fixed deposit"), DEBT),
+    (_rule("apartment", "property", "real estate", "flat", "plot"), None),
+]
+# Gold is matched by the rules above; real estate and "other" stay outside the allocation.
+_CATEGORY_BUCKET = {"investments": EQUITY, "bank": DEBT}
+
+
+def asset_bucket(asset: Dict[str, Any]) -> Optional[int]:
+    """Allocation bucket of an asset, or None when it is outside the allocation (real estate, vehicles, unknown)."""
+    for text, rules in ((str(asset.get("type") or "").lower(), _TYPE_RULES),
+                        (str(asset.get("name") or "").lower(), _NAME_RULES)):
+        for pattern, bucket in rules:
+            if pattern.search(text):
+                return bucket
+    return _CATEGORY_BUCKET.get(asset_category(asset))
+
+
+def valid_band(band: float) -> bool:
+    """Drift bands are percentage points in (0, MAX_BAND]."""
+    return math.isfinite(band) and 0 < band <= MAX_BAND
+
+
+def _number(value: Any) -> float:
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def bucket_values(user: Dict[str, Any]) -> np.ndarray:
+    values = np.zeros(len(BUCKETS))
+    for asset in user.get("assets") or []:
+        bucket = asset_bucket(asset)
+        if bucket is not None:
+            values[bucket] += _number(asset.get("current_value"))
+    values[CASH] += sum(_number(a.get("current_balance")) for a in user.get("bank_accounts") or [])
+    return values
+
+
+def target_weights(allocation: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+    """Target weights summing to 1, or None when the user has no usable targets."""
+    if not allocation:
+        return None
+    targets = np.array([_number(allocation.get(f"{b}_percentage")) for b in BUCKETS])
+    total = targets.sum()
+    return targets / total if total > 0 else None
+
+
+def rebalance_users(values: np.ndarray, targets: np.ndarray, band: float = BAND) -> Dict[str, np.ndarray]:
+    """Drift and minimal in-band trades for ``users x buckets`` values and target weights."""
+    band = band / 100.0
+    totals = values.sum(axis=1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        weights = np.where(totals > 0, values / totals, 0.0)
+    drift = weights - targets
+    lower, upper = np.maximum(targets - band, 0.0), np.minimum(targets + band, 1.0)
+    out_of_band = (weights < lower - 1e-12) | (weights > upper + 1e-12)
+
+    # Move out-of-band buckets to the nearest band edge, then spread what that
+    # leaves over in-band room in the direction needed (always feasible since
+    # the lower edges sum to <= 1 <= the upper edges).
+    new = np.clip(weights, lower, upper)
+    residual = 1.0 - new.sum(axis=1, keepdims=True)
+    room = np.where(residual > 0, upper - new, new - lower)
+    room_total = room.sum(axis=1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        share = np.where(room_total > 0, room / room_total, 0.0)
+    new = new + residual * share
+
+    exact = (new - weights) * totals
+    trades = _rounded_trades(exact, MIN_TRADE)
+    # Rounding leaves up to half a step per bucket, all of it on the largest trade.
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slack = np.where(totals > 0, len(BUCKETS) * ROUND_TO / 2 / totals, 0.0) + 1e-9
+        still_out = _out_of_band(values + trades, totals, lower, upper, slack)
+        # Dropping a small trade must not leave a bucket out of band: keep the small ones there.
+        trades = np.where(still_out[:, None], _rounded_trades(exact, 0.0), trades)
+        still_out = _out_of_band(values + trades, totals, lower, upper, slack)
+    needs = out_of_band.any(axis=1) & (totals[:, 0] > 0)
+    rebalanceable = needs & ~still_out & (trades != 0).any(axis=1)
+    return {
+        "total": totals[:, 0], "weights": weights, "targets": targets, "drift": drift,
+        "max_drift": np.abs(drift).max(axis=1), "needs_rebalancing": needs, "rebalanceable": rebalanceable,
+        "trades": np.where(rebalanceable[:, None], trades, 0.0),
+    }
+
+
+def _rounded_trades(exact: np.ndarray, min_trade: float) -> np.ndarray:
+    rounded = np.round(exact / ROUND_TO) * ROUND_TO
+    # Compare after rounding (with a tolerance) so e.g. -999.99 counts as a 1000 trade.
+    trades = np.where(np.abs(rounded) >= min_trade - 1e-6, rounded, 0.0)
+    # Rounding and dropped small trades leave a remainder; the largest trade takes it so buys match sells.
+    largest = np.abs(trades).argmax(axis=1)
+    trades[np.arange(len(trades)), largest] -= trades.sum(axis=1)
+    return trades
+
+
+def _out_of_band(values: np.ndarray, totals: np.ndarray, lower: np.ndarray, upper: np.ndarray,
+                 slack: np.ndarray) -> np.ndarray:
+    weights = np.where(totals > 0, values / totals, 0.0)
+    return ((weights < lower - slack) | (weights > upper + slack)).any(axis=1)
+
+
+def result_document(result: Dict[str, np.ndarray], i: int, band: float = BAND) -> Dict[str, Any]:
+    """Stored ``rebalancing`` field for row ``i`` of ``rebalance_users`` output."""
+    return {
+        "as_of": datetime.utcnow(),
+        "band": band,
+        "total_value": round(float(result["total"][i]), 2),
+        "needs_rebalancing": bool(result["needs_rebalancing"][i]),
+        "rebalanceable": bool(result["rebalanceable"][i]),
+        "max_drift": round(float(result["max_drift"][i]) * 100, 2),
+        "buckets": {
+            bucket: {
+                "current_percentage": round(float(result["weights"][i, b]) * 100, 2),
+                "target_percentage": round(float(result["targets"][i, b]) * 100, 2),
+                "drift": round(float(result["drift"][i, b]) * 100, 2),
+                "trade": float(result["trades"][i, b]),
+            }
+            for b, bucket in enumerate(BUCKETS)
+        },
+    }
+
+
+def _matrices(users: Iterable[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], np.ndarray, np.ndarray]:
+    kept, values, targets = [], [], []
+    for user in users:
+        target = target_weights(user.get("portfolio_allocation"))
+        if target is not None:
+            kept.append(user)
+            values.append(bucket_values(user))
+            targets.append(target)
+    return kept, np.array(values).reshape(-1, len(BUCKETS)), np.array(targets).reshape(-1, len(BUCKETS))
+
+
+def rebalance_user(user: Dict[str, Any], band: float = BAND) -> Optional[Dict[str, Any]]:
+    kept, values, targets = _matrices([user])
+    if not kept:
+        return None
+    return result_document(rebalance_users(values, targets, band), 0, band)
+
+
+def compute_rebalancing(email: str, band: float = BAND) -> Optional[Dict[str, Any]]:
+    """One user's rebalancing result from their current document, without storing it."""
+    from database.mongo_manager import get_users_collection
+    user = get_users_collection().find_one({"email": email}, PROJECTION)
+    return rebalance_user(user, band) if user else None
+
+
+def store_rebalancing(email: str) -> Optional[Dict[str, Any]]:
+    """Compute and store one user's rebalancing result at the default band, as ``run_batch`` does."""
+    from database.mongo_manager import get_users_collection
+    users = get_users_collection()
+    user = users.find_one({"email": email}, PROJECTION)
+    doc = rebalance_user(user, BAND) if user else None
+    if doc is not None:
+        users.update_one({"_id": user["_id"]}, {"$set": {"rebalancing": doc}})
+    return doc
+
+
+def run_batch(batch_size: int = 2000, band: float = BAND, users=None) -> Dict[str, int]:
+    """Rebalance every user with targets, ``batch_size`` users per array pass and bulk write."""
+    if users is None:
+        from database.mongo_manager import get_users_collection
+        users = get_users_collection()
+    stats = {"users": 0, "flagged": 0, "batches": 0}
+    query = {"portfolio_allocation": {"$type": "object"}}
+    last_id = None
+    while True:
+        page = list(users.find(dict(query, **({"_id": {"$gt": last_id}} if last_id is not None else {})), PROJECTION)
+                    .sort("_id", 1).limit(batch_size))
+        if not page:
+            break
+        last_id = page[-1]["_id"]
+        kept, values, targets = _matrices(page)
+        if kept:
+            result = rebalance_users(values, targets, band)
+            users.bulk_write([UpdateOne({"_id": u["_id"]}, {"$set": {"rebalancing": result_document(result, i, band)}})
+                              for i, u in enumerate(kept)], ordered=False)
+            stats["users"] += len(kept)
+            stats["flagged"] += int(result["needs_rebalancing"].sum())
+        stats["batches"] += 1
+    return stats
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compute and store rebalancing proposals for all users")
+    parser.add_argument("--batch-size", type=int, default=2000)
+    parser.add_argument("--band", type=float, default=BAND, help="Drift band in percentage points")
+    args = parser.parse_args()
+    if not valid_band(args.band):
+        parser.error(f"--band must be greater than 0 and at most {MAX_BAND:g}")
+
+    started = time.perf_counter()
+    stats = run_batch(args.batch_size, args.band)
+    print(f"✅ Rebalanced {stats['users']} users in {stats['batches']} batches "
+          f"({time.perf_counter() - started:.1f}s); {stats['flagged']} need rebalancing")
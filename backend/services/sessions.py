@@ -0,0 +1,93 @@
+"""
+Signed, stateless session tokens and a per-process user summary cache.
+
+Tokens are itsdangerous timestamped signatures over the user's email, keyed
+by SECRET_KEY, so any process sharing the key can verify them without a
+session store. Authenticated reads take the user summary from a small TTL
+cache keyed by the token subject; the /user/* write endpoints invalidate it.
+
+    SECRET_KEY                  signing key (a random per-process key is used if unset)
+    SESSION_TTL_SECONDS         token lifetime (default 7 days)
+    USER_SUMMARY_TTL_SECONDS    how long a cached summary is served (default 60)
+    USER_SUMMARY_CACHE_SIZE     summaries kept per process (default 1024)
+"""
+
+from collections import OrderedDict
+import os
+import secrets
+import threading
+import time
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", str(7 * 24 * 3600)))
+SUMMARY_TTL_SECONDS = float(os.getenv("USER_SUMMARY_TTL_SECONDS", "60"))
+SUMMARY_CACHE_SIZE = int(os.getenv("USER_SUMMARY_CACHE_SIZE", "1024"))
+
+# The fields the dashboard's authenticated reads (/user-portfolio, /portfolio-performance,
+# /rebalancing, /auto-*-data) use from a user document; nothing else is cached.
+SUMMARY_PROJECTION = {"_id": 0, "email": 1, "name": 1, "assets": 1, "bank_accounts": 1, "liabilities": 1,
+                      "income_sources": 1, "income": 1, "expenses": 1, "financial_goals": 1, "goals": 1,
+                      "risk_profile": 1, "portfolio_allocation": 1, "rebalancing": 1, "summary": 1}
+
+_secret_key = os.getenv("SECRET_KEY")
+if not _secret_key:
+    print("⚠️ SECRET_KEY not set - session tokens will not survive a restart")
+    _secret_key = secrets.token_hex(32)
+_serializer = URLSafeTimedSerializer(_secret_key, salt="wealthwise-session")
+
+_cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+class InvalidSessionError(Exception):
+    """The bearer token is malformed, forged or expired."""
+
+
+def issue_session_token(email: str) -> str:
+    return _serializer.dumps({"sub": email})
+
+
+def read_session_token(token: str) -> str:
+    """Email the token was issued to."""
+    try:
+        payload = _serializer.loads(token, max_age=SESSION_TTL_SECONDS)
+    except SignatureExpired:
+        raise InvalidSessionError("Session expired, please sign in again")
+    except BadSignature:
+        raise InvalidSessionError("Invalid session token")
+    return payload["sub"]
+
+
+def bearer_token(headers: Mapping[str, str]) -> Optional[str]:
+    auth = headers.get("Authorization") or ""
+    scheme, _, token = auth.partition(" ")
+    if scheme.lower() != "bearer":
+        return None
+    return token.strip() or None
+
+
+def get_user_summary(email: str, loader: Callable[[str], Optional[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+    """Cached user summary, loading it with ``loader(email)`` on a miss or after the TTL."""
+    now = time.monotonic()
+    with _cache_lock:
+        entry = _cache.get(email)
+        if entry and entry[0] > now:
+            _cache.move_to_end(email)
+            return entry[1]
+
+    summary = loader(email)
+    if summary is None:
+        return None
+    with _cache_lock:
+        _cache[email] = (now + SUMMARY_TTL_SECONDS, summary)
+        _cache.move_to_end(email)
+        while len(_cache) > SUMMARY_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return summary
+
+
+def invalidate_user_summary(email: str) -> None:
+    with _cache_lock:
+        _cache.pop(email, None)
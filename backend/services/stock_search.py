@@ -0,0 +1,219 @@
+"""
+In-memory prefix index for stock search / autocomplete.
+
+Every searchable term (symbol, symbol without exchange suffix, company name,
+each name word, sector, each sector word) is stored lower-cased once in a
+sorted list, with its postings grouped by field weight. A prefix lookup is a
+bisect to the run of matching terms and a best-first walk over their groups,
+so the cost depends on the number of distinct matching terms and ``k``, not
+on how many stocks share a word. One- and two-character prefixes have their
+top hits computed when the index is built.
+
+The index is immutable and rebuilt from the ``stocks`` collection in a
+background thread, then swapped in with a single assignment: whenever a stock
+is added, removed or renamed when the deployment supports change streams
+(price updates are ignored), otherwise every STOCK_SEARCH_REFRESH_SECONDS
+(default 60). Change events are coalesced over STOCK_SEARCH_DEBOUNCE_SECONDS
+(default 2) so a bulk import costs one rebuild, and a lost change stream is
+re-opened after one polling interval.
+"""
+
+from bisect import bisect_left
+from collections import defaultdict
+import heapq
+from itertools import accumulate
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+REFRESH_SECONDS = float(os.getenv("STOCK_SEARCH_REFRESH_SECONDS", "60"))
+DEBOUNCE_SECONDS = float(os.getenv("STOCK_SEARCH_DEBOUNCE_SECONDS", "2"))
+SHORT_PREFIX = 2  # prefixes up to this length are answered from precomputed lists
+SHORT_PREFIX_TOP = 50
+FIELDS = ("symbol", "company_name", "sector")
+
+# Field weights; an exact term match scores double.
+W_SYMBOL, W_NAME, W_NAME_WORD, W_SECTOR = 100.0, 60.0, 40.0, 10.0
+
+
+def _terms(stock: Dict[str, Any]) -> Dict[str, float]:
+    weights: Dict[str, float] = {}
+
+    def add(term: str, weight: float):
+        term = term.strip().lower()
+        if term and weights.get(term, 0) < weight:
+            weights[term] = weight
+
+    symbol = stock.get("symbol") or ""
+    add(symbol, W_SYMBOL)
+    add(symbol.split(".")[0], W_SYMBOL)
+    name = stock.get("company_name") or ""
+    add(name, W_NAME)
+    for word in name.split()[1:]:
+        add(word, W_NAME_WORD)
+    sector = stock.get("sector") or ""
+    add(sector, W_SECTOR)
+    for word in sector.split():
+        add(word, W_SECTOR)
+    return weights
+
+
+class StockSearchIndex:
+    def __init__(self, stocks: List[Dict[str, Any]]):
+        self.stocks = [{k: s.get(k) for k in FIELDS} for s in stocks]
+        self.stock_terms = [_terms(stock) for stock in self.stocks]
+
+        postings: Dict[str, Dict[float, List[int]]] = defaultdict(lambda: defaultdict(list))
+        for i, terms in enumerate(self.stock_terms):
+            for term, w in terms.items():
+                postings[term][w].append(i)
+        self.terms = sorted(postings)
+        # Per term: (weight, stock ids) groups, heaviest first.
+        self.groups = [sorted(postings[t].items(), reverse=True) for t in self.terms]
+        self.stock_sets = [frozenset(i for _, ids in g for i in ids) for g in self.groups]
+        self.cumulative = list(accumulate((sum(len(ids) for _, ids in g) for g in self.groups), initial=0))
+
+        short: Dict[str, Dict[int, float]] = defaultdict(dict)
+        for term, groups in zip(self.terms, self.groups):
+            for n in range(1, min(SHORT_PREFIX, len(term)) + 1):
+                best = short[term[:n]]
+                for w, ids in groups:
+                    score = self._score(w, term, term[:n])
+                    for i in ids:
+                        if best.get(i, 0) < score:
+                            best[i] = score
+        self.short = {p: heapq.nlargest(SHORT_PREFIX_TOP, ((sc, -i) for i, sc in hits.items()))
+                      for p, hits in short.items()}
+
+    @staticmethod
+    def _score(weight: float, term: str, prefix: str) -> float:
+        # Exact matches first, then shorter completions of the prefix.
+        return weight * (2.0 if term == prefix else 1.0) + len(prefix) / len(term)
+
+    def _range(self, prefix: str) -> Tuple[int, int]:
+        lo = bisect_left(self.terms, prefix)
+        return lo, bisect_left(self.terms, prefix + "\uffff", lo)
+
+    def _top(self, prefix: str, k: int) -> List[Tuple[float, int]]:
+        """Best ``k`` (score, stock) for one prefix without visiting every posting.
+
+        All stocks in a (term, weight) group share a score, so groups are
+        popped from a heap best-first until ``k`` distinct stocks are found.
+        """
+        if len(prefix) <= SHORT_PREFIX:
+            return [(sc, -i) for sc, i in self.short.get(prefix, [])[:k]]
+        lo, hi = self._range(prefix)
+        heap = [(-self._score(self.groups[t][0][0], self.terms[t], prefix), t, 0) for t in range(lo, hi)]
+        heapq.heapify(heap)
+        found: Dict[int, float] = {}
+        while heap and len(found) < k:
+            neg, t, g = heapq.heappop(heap)
+            for i in self.groups[t][g][1]:
+                if i not in found:
+                    found[i] = -neg
+                    if len(found) == k:
+                        break
+            if g + 1 < len(self.groups[t]):
+                w = self.groups[t][g + 1][0]
+                heapq.heappush(heap, (-self._score(w, self.terms[t], prefix), t, g + 1))
+        return [(sc, i) for i, sc in found.items()]
+
+    def _best_term_score(self, i: int, prefix: str) -> float:
+        return max((self._score(w, t, prefix) for t, w in self.stock_terms[i].items() if t.startswith(prefix)),
+                   default=0.0)
+
+    def search(self, query: str, k: int = 10) -> List[Dict[str, Any]]:
+        """Top ``k`` stocks whose terms start with the query; multi-word queries
+        also match stocks where every word prefixes some term ("tata mot", "bank hdfc")."""
+        query = " ".join(query.lower().split())
+        if not query:
+            return []
+        scores = {i: sc for sc, i in self._top(query, k)}
+        words = query.split()
+        if len(words) > 1:
+            # Intersect the per-word candidate sets, smallest first, then score the survivors.
+            ranges = sorted(map(self._range, words), key=lambda r: self.cumulative[r[1]] - self.cumulative[r[0]])
+            candidates = None
+            for lo, hi in ranges:
+                matched = set().union(*self.stock_sets[lo:hi])
+                candidates = matched if candidates is None else candidates & matched
+                if not candidates:
+                    break
+            for i in candidates or ():
+                scores[i] = max(scores.get(i, 0.0), sum(self._best_term_score(i, w) for w in words))
+        top = heapq.nlargest(k, scores.items(), key=lambda item: (item[1], -item[0]))
+        return [dict(self.stocks[i], score=round(sc, 2)) for i, sc in top]
+
+
+_index: Optional[StockSearchIndex] = None
+_index_built_at = 0.0
+_build_lock = threading.Lock()
+_refresher_lock = threading.Lock()
+_refresher_started = False
+
+
+def _load_stocks() -> List[Dict[str, Any]]:
+    from database.mongo_manager import get_stocks_collection
+    projection = dict({f: 1 for f in FIELDS}, _id=0)
+    return list(get_stocks_collection().find({}, projection).sort("symbol", 1))
+
+
+def rebuild_index() -> StockSearchIndex:
+    global _index, _index_built_at
+    with _build_lock:
+        index = StockSearchIndex(_load_stocks())
+        _index, _index_built_at = index, time.time()
+    return index
+
+
+def _follow_changes() -> None:
+    """Rebuild on change events, once per burst: events arriving within DEBOUNCE_SECONDS of the first are folded in."""
+    from database.mongo_manager import get_stocks_collection
+
+    # Only changes to indexed fields matter; price ticks must not trigger rebuilds.
+    pipeline = [{"$match": {"$or": [{"operationType": {"$in": ["insert", "delete", "replace"]}}] + [
+        {f"updateDescription.updatedFields.{f}": {"$exists": True}} for f in FIELDS
+    ]}}]
+    with get_stocks_collection().watch(pipeline, max_await_time_ms=500) as stream:
+        rebuild_index()  # catch up on changes made while no stream was open
+        while stream.alive:
+            if stream.try_next() is None:
+                continue
+            deadline = time.monotonic() + DEBOUNCE_SECONDS
+            while time.monotonic() < deadline:
+                stream.try_next()
+            rebuild_index()
+
+
+def _refresh_loop() -> None:
+    reported = set()
+    while True:
+        try:
+            _follow_changes()
+        except Exception as e:
+            # No change streams (standalone server) or the stream was lost: poll, then try again.
+            # Each kind of failure is reported once so a persistent one does not flood the log.
+            kind = (type(e).__name__, getattr(e, "code", None))
+            if kind not in reported:
+                reported.add(kind)
+                print(f"⚠️ Stock search change stream failed, polling every {REFRESH_SECONDS:g}s: {e}")
+        time.sleep(REFRESH_SECONDS)
+        try:
+            rebuild_index()
+        except Exception as e:
+            print(f"⚠️ Stock search index refresh failed: {e}")
+
+
+def get_search_index() -> StockSearchIndex:
+    global _refresher_started
+    index = _index or rebuild_index()
+    with _refresher_lock:
+        if not _refresher_started:
+            _refresher_started = True
+            threading.Thread(target=_refresh_loop, name="stock-search-refresh", daemon=True).start()
+    return index
+
+
+def search_stocks(query: str, k: int = 10) -> List[Dict[str, Any]]:
+    return get_search_index().search(query, k)
@@ -0,0 +1,353 @@
+"""
+Incremental mark-to-market valuation of user assets.
+
+Assets that track a market price are tied to an instrument key: the
+``symbol`` field when set (a stock ticker), otherwise ``MF:<fund name>`` for
+mutual funds. ``HoldingsIndex`` keeps every such holding as a row of NumPy
+columns (user, instrument, quantity, value) plus an
+instrument -> rows map, so a batch of price changes touches only the rows of
+the instruments that moved: values are ``quantity * price`` over those rows
+and only the users whose holdings changed value are written back with one
+unordered ``bulk_write``.
+
+The index only decides whom to write. Each write is an update pipeline that
+matches holdings by their stored symbol (or fund name) rather than by array
+position, takes the quantity from the stored document and sums
+``assets_total_value`` on the server, so an ``assets`` array replaced or
+reordered since the index was built (by this process or another) is never
+written at stale positions. Each written user gets ``current_value`` /
+``date_updated`` on the holdings of the repriced instruments plus
+``assets_total_value`` and ``valued_at``; users with a stored ``summary``
+also get its asset total, net worth and allocation recomputed in the same
+update (``financial_summary.refresh_assets_stages``).
+Prices arrive from the price ingester (and NAV updates); ``reindex_user``
+must be called when a user's assets are replaced.
+
+    python services/valuation.py      # revalue everyone from stocks.current_price
+"""
+
+from datetime import date, datetime
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from pymongo import UpdateOne
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.financial_summary import refresh_assets_stages
+
+BATCH_SIZE = int(os.getenv("VALUATION_BATCH_SIZE", "1000"))
+COMPACT_DEAD_FRACTION = float(os.getenv("VALUATION_COMPACT_DEAD_FRACTION", "0.25"))
+HOLDINGS_PROJECTION = {"email": 1, "assets.name": 1, "assets.type": 1, "assets.symbol": 1,
+                       "assets.quantity": 1, "assets.current_value": 1}
+
+
+def instrument_key(asset: Dict[str, Any]) -> Optional[str]:
+    """Price key for an asset, or None when it has no market price."""
+    symbol = str(asset.get("symbol") or "").strip().upper()
+    if symbol:
+        return symbol
+    if asset.get("type") == "Mutual Fund" and asset.get("name"):
+        return "MF:" + " ".join(str(asset["name"]).lower().split())
+    return None
+
+
+def holding_identity(asset: Dict[str, Any]) -> Tuple[str, Any]:
+    """(field, stored value) that identifies a priced holding inside ``assets``."""
+    return ("symbol", asset["symbol"]) if str(asset.get("symbol") or "").strip() else ("name", asset.get("name"))
+
+
+def revalue_pipeline(prices: Dict[Tuple[str, Any], float], today: str, now: datetime) -> List[Dict[str, Any]]:
+    """Update pipeline pricing one user's holdings and re-deriving the totals that depend on them.
+
+    ``prices`` maps ``holding_identity`` -> price; holdings whose stored symbol
+    or fund name no longer matches are left alone.
+    """
+    quantity = {"$convert": {"input": "$$a.quantity", "to": "double", "onError": 0, "onNull": 0}}
+    branches = []
+    for (field, value), p in prices.items():
+        case = {"$eq": [f"$$a.{field}", value]}
+        if field == "name":
+            case = {"$and": [case, {"$eq": ["$$a.type", "Mutual Fund"]}]}
+        branches.append({"case": case, "then": float(p)})
+    price = {"$switch": {"branches": branches, "default": None}}
+    revalued = {"$mergeObjects": ["$$a", {"current_value": {"$round": [{"$multiply": ["$$qty", "$$price"]}, 2]},
+                                          "date_updated": today}]}
+    holding = {"$let": {"vars": {"qty": quantity},
+                        "in": {"$let": {"vars": {"price": price},
+                                        "in": {"$cond": [{"$and": [{"$ne": ["$$price", None]}, {"$gt": ["$$qty", 0]}]},
+                                                         revalued, "$$a"]}}}}}
+    return [
+        {"$set": {"assets": {"$map": {"input": "$assets", "as": "a", "in": holding}}}},
+        {"$set": {"assets_total_value": {"$round": [{"$sum": "$assets.current_value"}, 2]}, "valued_at": now}},
+    ] + refresh_assets_stages(now)
+
+
+def _number(value: Any) -> float:
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _holdings(user: Dict[str, Any]) -> List[Tuple[str, float, float, Tuple[str, Any]]]:
+    """(instrument, quantity, value, identity) for each priced holding of a user."""
+    rows = []
+    for asset in user.get("assets") or []:
+        key, quantity = instrument_key(asset), _number(asset.get("quantity"))
+        if key is not None and quantity > 0:
+            rows.append((key, quantity, _number(asset.get("current_value")), holding_identity(asset)))
+    return rows
+
+
+class HoldingsIndex:
+    def __init__(self):
+        self.user_ids: List[Any] = []
+        self.user_of: Dict[str, int] = {}            # email -> user number
+        self.row_user = np.zeros(0, dtype=np.int64)
+        self.row_key = np.zeros(0, dtype=object)
+        self.row_identity = np.zeros(0, dtype=object)  # holding_identity, to match the holding when writing
+        self.quantity = np.zeros(0)
+        self.value = np.zeros(0)
+        self.alive = np.zeros(0, dtype=bool)
+        self.rows_of_user: Dict[int, np.ndarray] = {}
+        self.rows_of: Dict[str, np.ndarray] = {}     # instrument -> row numbers
+        self.dead = 0
+
+    def __len__(self) -> int:
+        return len(self.alive) - self.dead
+
+    @classmethod
+    def build(cls, users: Iterable[Dict[str, Any]]) -> "HoldingsIndex":
+        index = cls()
+        index.add_users(users)
+        return index
+
+    def _user_number(self, user: Dict[str, Any]) -> int:
+        u = self.user_of.get(user["email"])
+        if u is None:
+            u = self.user_of[user["email"]] = len(self.user_ids)
+            self.user_ids.append(user["_id"])
+        return u
+
+    def add_users(self, users: Iterable[Dict[str, Any]]) -> None:
+        row_user, qty, val, keys, identities = [], [], [], [], []
+        for user in users:
+            u = self._user_number(user)
+            for key, quantity, value, identity in _holdings(user):
+                row_user.append(u); qty.append(quantity); val.append(value)
+                keys.append(key); identities.append(identity)
+
+        first = len(self.quantity)
+        rows = np.arange(first, first + len(keys))
+        self.row_user = np.concatenate([self.row_user, np.array(row_user, dtype=np.int64)])
+        self.row_key = np.concatenate([self.row_key, np.array(keys, dtype=object)])
+        identity_col = np.empty(len(identities), dtype=object)
+        identity_col[:] = identities
+        self.row_identity = np.concatenate([self.row_identity, identity_col])
+        self.quantity = np.concatenate([self.quantity, qty])
+        self.value = np.concatenate([self.value, val])
+        self.alive = np.concatenate([self.alive, np.ones(len(keys), dtype=bool)])
+        if not len(keys):
+            return
+
+        users_new = self.row_user[rows]
+        order = np.argsort(users_new, kind="stable")
+        bounds = np.flatnonzero(np.diff(users_new[order])) + 1
+        for chunk in np.split(rows[order], bounds):
+            self.rows_of_user[int(self.row_user[chunk[0]])] = chunk
+
+        keys_arr = np.array(keys, dtype=object)
+        order = np.argsort(keys_arr, kind="stable")
+        bounds = np.flatnonzero(keys_arr[order][1:] != keys_arr[order][:-1]) + 1
+        for chunk in np.split(order, bounds):
+            key = keys_arr[chunk[0]]
+            existing = self.rows_of.get(key)
+            self.rows_of[key] = rows[chunk] if existing is None else np.concatenate([existing, rows[chunk]])
+
+    def remove_user(self, email: str) -> None:
+        u = self.user_of.get(email)
+        if u is None:
+            return
+        rows = self.rows_of_user.pop(u, None)
+        if rows is not None:
+            self.alive[rows] = False  # dead rows are skipped until the next compact
+            self.dead += len(rows)
+
+    def replace_user(self, user: Dict[str, Any]) -> None:
+        """Re-read one user's holdings after their assets were replaced.
+
+        The new holdings are written into the user's existing rows when they
+        fit, so a typical asset save copies nothing but that user's rows;
+        otherwise the old rows die and new ones are appended. The columns are
+        compacted once dead rows pass COMPACT_DEAD_FRACTION.
+        """
+        u = self._user_number(user)
+        old = self.rows_of_user.get(u)
+        holdings = _holdings(user)
+        if old is None or len(holdings) > len(old):
+            self.remove_user(user["email"])
+            self.add_users([user])
+        else:
+            self._detach(old)
+            slots, freed = old[:len(holdings)], old[len(holdings):]
+            for row, (key, quantity, value, identity) in zip(slots, holdings):
+                self.row_key[row], self.row_identity[row] = key, identity
+                self.quantity[row], self.value[row] = quantity, value
+            self.alive[freed] = False
+            self.dead += len(freed)
+            if len(slots):
+                self.rows_of_user[u] = slots
+                self._attach(slots)
+            else:
+                del self.rows_of_user[u]
+        if self.dead > COMPACT_DEAD_FRACTION * len(self.alive):
+            self.compact()
+
+    def _detach(self, rows: np.ndarray) -> None:
+        for key in set(self.row_key[rows]):
+            remaining = self.rows_of[key][~np.isin(self.rows_of[key], rows)]
+            if len(remaining):
+                self.rows_of[key] = remaining
+            else:
+                del self.rows_of[key]
+
+    def _attach(self, rows: np.ndarray) -> None:
+        for row in rows:
+            key = self.row_key[row]
+            existing = self.rows_of.get(key)
+            self.rows_of[key] = np.array([row]) if existing is None else np.append(existing, row)
+
+    def compact(self) -> None:
+        """Drop dead rows and renumber the live ones."""
+        keep = np.flatnonzero(self.alive)
+        renumber = np.full(len(self.alive), -1, dtype=np.int64)
+        renumber[keep] = np.arange(len(keep))
+        self.row_user, self.row_key = self.row_user[keep], self.row_key[keep]
+        self.row_identity, self.quantity, self.value = self.row_identity[keep], self.quantity[keep], self.value[keep]
+        self.alive = np.ones(len(keep), dtype=bool)
+        self.rows_of_user = {u: renumber[rows] for u, rows in self.rows_of_user.items()}
+        rows_of = {}
+        for key, rows in self.rows_of.items():
+            rows = renumber[rows]
+            rows = rows[rows >= 0]
+            if len(rows):
+                rows_of[key] = rows
+        self.rows_of = rows_of
+        self.dead = 0
+
+    def reprice(self, prices: Dict[str, float]):
+        """Revalue the holdings of the given instruments.
+
+        Returns (rows, users) that changed, with ``value`` already updated.
+        """
+        chunks, row_prices = [], []
+        for key, price in prices.items():
+            rows = self.rows_of.get(key)
+            if rows is not None and price and price > 0:
+                chunks.append(rows)
+                row_prices.append(np.full(len(rows), float(price)))
+        if not chunks:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0)
+        rows, price = np.concatenate(chunks), np.concatenate(row_prices)
+        keep = self.alive[rows]
+        rows, price = rows[keep], price[keep]
+        new_value = np.round(self.quantity[rows] * price, 2)
+        changed = new_value != self.value[rows]
+        rows, new_value = rows[changed], new_value[changed]
+        self.value[rows] = new_value
+        return rows, np.unique(self.row_user[rows])
+
+
+class ValuationEngine:
+    def __init__(self, users=None):
+        self._users = users
+        self._index: Optional[HoldingsIndex] = None
+        self._lock = threading.Lock()
+        self.stats = {"batches": 0, "holdings_revalued": 0, "users_written": 0}
+
+    @property
+    def users(self):
+        if self._users is None:
+            from database.mongo_manager import get_users_collection
+            self._users = get_users_collection()
+        return self._users
+
+    def rebuild(self) -> HoldingsIndex:
+        index = HoldingsIndex.build(self.users.find({"assets.0": {"$exists": True}}, HOLDINGS_PROJECTION))
+        with self._lock:
+            self._index = index
+        return index
+
+    def index(self) -> HoldingsIndex:
+        return self._index or self.rebuild()
+
+    def reindex_user(self, email: str) -> None:
+        """Re-read one user's assets after they were replaced."""
+        if self._index is None:
+            return
+        user = self.users.find_one({"email": email}, HOLDINGS_PROJECTION)
+        with self._lock:
+            if user is None:
+                self._index.remove_user(email)
+            else:
+                self._index.replace_user(user)
+
+    def apply_prices(self, prices: Dict[str, float]) -> int:
+        """Revalue holdings of the instruments in ``prices`` and persist the affected users."""
+        index = self.index()
+        with self._lock:
+            rows, users = index.reprice(prices)
+            if not len(rows):
+                return 0
+            order = np.argsort(index.row_user[rows], kind="stable")
+            rows = rows[order]
+            bounds = np.flatnonzero(np.diff(index.row_user[rows])) + 1
+            today, now = date.today().isoformat(), datetime.utcnow()
+            ops = []
+            for chunk in np.split(rows, bounds):
+                u = int(index.row_user[chunk[0]])
+                user_prices = {ident: prices[key] for ident, key in zip(index.row_identity[chunk], index.row_key[chunk])}
+                ops.append(UpdateOne({"_id": index.user_ids[u], "assets": {"$type": "array"}},
+                                     revalue_pipeline(user_prices, today, now)))
+        for i in range(0, len(ops), BATCH_SIZE):
+            self.users.bulk_write(ops[i:i + BATCH_SIZE], ordered=False)
+        self.stats["batches"] += 1
+        self.stats["holdings_revalued"] += len(rows)
+        self.stats["users_written"] += len(users)
+        return len(users)
+
+    def on_price_updates(self, updates: List[Dict[str, Any]]) -> None:
+        """Price ingest subscriber."""
+        self.apply_prices({u["symbol"]: u["price"] for u in updates})
+
+    def revalue_all(self) -> int:
+        """Revalue every holding from the current ``stocks`` prices."""
+        from database.mongo_manager import get_stocks_collection
+        self.rebuild()
+        prices = {s["symbol"].upper(): s.get("current_price")
+                  for s in get_stocks_collection().find({}, {"_id": 0, "symbol": 1, "current_price": 1})}
+        return self.apply_prices(prices)
+
+
+_engine: Optional[ValuationEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_valuation_engine() -> ValuationEngine:
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = ValuationEngine()
+    return _engine
+
+
+if __name__ == "__main__":
+    engine = get_valuation_engine()
+    started = time.perf_counter()
+    written = engine.revalue_all()
+    print(f"✅ Revalued {engine.stats['holdings_revalued']} holdings across {len(engine.index())} priced positions; "
+          f"{written} users updated in {time.perf_counter() - started:.2f}s")
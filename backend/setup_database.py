@@ -1,8 +1,10 @@
 from dotenv import load_dotenv
 import os
-from pymongo import MongoClient, ASCENDING
+from pymongo import MongoClient, ASCENDING, DESCENDING, UpdateOne
 from datetime import datetime
 
+from services.password_hashing import hash_password
+
 def setup_database():
     print("🚀 Setting up WealthWise Database...")
     
@@ -21,16 +23,19 @@ def setup_database():
         # Users collection
         users = db["users"]
         users.create_index([("email", ASCENDING)], unique=True)
+        users.create_index([("is_demo_user", ASCENDING), ("email", ASCENDING)])  # /demo-users keyset pages
         print("  ✅ Users collection created")
         
         # Stocks collection
         stocks = db["stocks"]
         stocks.create_index([("symbol", ASCENDING)], unique=True)
+        stocks.create_index([("last_updated", ASCENDING)])  # followed by API processes for live prices
         print("  ✅ Stocks collection created")
         
         # Stock analysis collection
         stock_analysis = db["stock_analysis"]
         stock_analysis.create_index([("symbol", ASCENDING)])
+        stock_analysis.create_index([("symbol", ASCENDING), ("type", ASCENDING)])
         print("  ✅ Stock analysis collection created")
         
         # Analysis types collection
@@ -47,6 +52,16 @@ def setup_database():
         chatbot_conversations = db["chatbot_conversations"]
         chatbot_conversations.create_index([("timestamp", ASCENDING)])
         print("  ✅ Chatbot conversations collection created")
+
+        # Analysis regeneration job checkpoints
+        db["analysis_jobs"].create_index([("status", ASCENDING), ("started_at", ASCENDING)])
+        print("  ✅ Analysis jobs collection created")
+
+        # Admin dashboard rollups (unique key used by the $merge in services/analytics.py)
+        db["analytics_rollups"].create_index(
+            [("dimension", ASCENDING), ("value", ASCENDING), ("day", DESCENDING)], unique=True
+        )
+        print("  ✅ Analytics rollups collection created")
         
         # Insert demo data
         print("\n2. Adding demo data...")
@@ -87,6 +102,9 @@ def setup_database():
             }
         }
         users.update_one({"email": demo_user["email"]}, {"$set": demo_user}, upsert=True)
+        # The demo sign-in button logs in with DEMO_USER_PASSWORD; keep a password the user already set.
+        users.update_one({"email": demo_user["email"], "password_hash": {"$exists": False}},
+                         {"$set": {"password_hash": hash_password(os.getenv("DEMO_USER_PASSWORD", "12345678"))}})
         print("  ✅ Demo user created")
         
         # Demo stocks
@@ -110,8 +128,10 @@ def setup_database():
                 "sector": "Conglomerate"
             }
         ]
-        for stock in demo_stocks:
-            stocks.update_one({"symbol": stock["symbol"]}, {"$set": stock}, upsert=True)
+        stocks.bulk_write(
+            [UpdateOne({"symbol": stock["symbol"]}, {"$set": stock}, upsert=True) for stock in demo_stocks],
+            ordered=False
+        )
         print("  ✅ Demo stocks created")
         
         # Demo analysis types
@@ -131,12 +151,13 @@ def setup_database():
                 "color": "green"
             }
         ]
-        for analysis_type in demo_analysis_types:
-            analysis_types.update_one(
-                {"type_name": analysis_type["type_name"]}, 
-                {"$set": analysis_type}, 
-                upsert=True
-            )
+        analysis_types.bulk_write(
+            [
+                UpdateOne({"type_name": analysis_type["type_name"]}, {"$set": analysis_type}, upsert=True)
+                for analysis_type in demo_analysis_types
+            ],
+            ordered=False
+        )
         print("  ✅ Demo analysis types created")
         
         # Demo stock analysis
@@ -152,12 +173,13 @@ def setup_database():
                 "timestamp": datetime.utcnow()
             }
         ]
-        for analysis in demo_stock_analysis:
-            stock_analysis.update_one(
-                {"symbol": analysis["symbol"], "type": analysis["type"]},
-                {"$set": analysis},
-                upsert=True
-            )
+        stock_analysis.bulk_write(
+            [
+                UpdateOne({"symbol": analysis["symbol"], "type": analysis["type"]}, {"$set": analysis}, upsert=True)
+                for analysis in demo_stock_analysis
+            ],
+            ordered=False
+        )
         print("  ✅ Demo stock analysis created")
         
         # Popular stocks
@@ -175,12 +197,13 @@ def setup_database():
                 "category": "Technology"
             }
         ]
-        for pop_stock in demo_popular_stocks:
-            popular_stocks.update_one(
-                {"symbol": pop_stock["symbol"]},
-                {"$set": pop_stock},
-                upsert=True
-            )
+        popular_stocks.bulk_write(
+            [
+                UpdateOne({"symbol": pop_stock["symbol"]}, {"$set": pop_stock}, upsert=True)
+                for pop_stock in demo_popular_stocks
+            ],
+            ordered=False
+        )
         print("  ✅ Demo popular stocks created")
         
         print("\n✅ Database setup completed successfully!")
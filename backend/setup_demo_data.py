@@ -1,9 +1,11 @@
 from dotenv import load_dotenv
 import os
-from pymongo import MongoClient, ASCENDING
+from pymongo import MongoClient, ASCENDING, UpdateOne
 from datetime import datetime
 
-def setup_demo_data():
+from services.password_hashing import hash_password
+
+def setup_demo_data(synthetic_users=0, synthetic_stocks=0, history_days=30, workers=None):
     print("🚀 Setting up WealthWise Demo Data...")
     
     load_dotenv()
@@ -63,6 +65,9 @@ def setup_demo_data():
             ]
         }
         users.update_one({"email": demo_user["email"]}, {"$set": demo_user}, upsert=True)
+        # The demo sign-in button logs in with DEMO_USER_PASSWORD; keep a password the user already set.
+        users.update_one({"email": demo_user["email"], "password_hash": {"$exists": False}},
+                         {"$set": {"password_hash": hash_password(os.getenv("DEMO_USER_PASSWORD", "12345678"))}})
         print("  ✅ Demo user created")
 
         # Demo Stocks
@@ -99,8 +104,10 @@ def setup_demo_data():
                 "target_price": 2600
             }
         ]
-        for stock in demo_stocks:
-            stocks.update_one({"symbol": stock["symbol"]}, {"$set": stock}, upsert=True)
+        stocks.bulk_write(
+            [UpdateOne({"symbol": stock["symbol"]}, {"$set": stock}, upsert=True) for stock in demo_stocks],
+            ordered=False
+        )
         print("  ✅ Demo stocks created")
 
         # Demo Stock Analysis
@@ -140,12 +147,13 @@ def setup_demo_data():
                 "timestamp": datetime.utcnow()
             }
         ]
-        for analysis in demo_analyses:
-            stock_analysis.update_one(
-                {"symbol": analysis["symbol"], "type": analysis["type"]},
-                {"$set": analysis},
-                upsert=True
-            )
+        stock_analysis.bulk_write(
+            [
+                UpdateOne({"symbol": analysis["symbol"], "type": analysis["type"]}, {"$set": analysis}, upsert=True)
+                for analysis in demo_analyses
+            ],
+            ordered=False
+        )
         print("  ✅ Demo stock analyses created")
 
         # Print collection statistics
@@ -155,6 +163,14 @@ def setup_demo_data():
             print(f"  - {collection_name}: {count} documents")
 
         print("\n✅ Demo data setup completed successfully!")
+
+        if synthetic_users or synthetic_stocks:
+            # Scale-testing mode: bulk generate synthetic users and stocks in parallel
+            from database.seed_synthetic import seed_synthetic
+            print(f"\n6. Seeding {synthetic_users} synthetic users and {synthetic_stocks} synthetic stocks...")
+            result = seed_synthetic(users=synthetic_users, stocks=synthetic_stocks,
+                                    history_days=history_days, workers=workers or os.cpu_count() or 4)
+            print(f"  ✅ {result['documents_written']} documents written in {result['seconds']}s")
         
     except Exception as e:
         print(f"\n❌ Error setting up demo data: {str(e)}")
@@ -163,4 +179,12 @@ def setup_demo_data():
     return True
 
 if __name__ == "__main__":
-    setup_demo_data()
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Seed WealthWise demo data")
+    parser.add_argument("--synthetic-users", type=int, default=0, help="Also generate N synthetic users")
+    parser.add_argument("--synthetic-stocks", type=int, default=0, help="Also generate M synthetic stocks")
+    parser.add_argument("--history-days", type=int, default=30, help="Analysis snapshots per synthetic stock")
+    parser.add_argument("--workers", type=int, default=None, help="Parallel seeding processes")
+    args = parser.parse_args()
+    setup_demo_data(args.synthetic_users, args.synthetic_stocks, args.history_days, args.workers)
\ No newline at end of file
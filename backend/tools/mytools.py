@@ -2,7 +2,14 @@ import datetime
 from langchain.agents import tool
 from dotenv import load_dotenv
 import os
+import sys
 import json
+import re
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tools.sandbox import run_sandboxed
+from services.price_store import get_price_store, parse_period, performance, resolve_symbol
+from services.indicators import refresh_technical_analysis
 
 load_dotenv()
 
@@ -34,14 +41,30 @@ def power(a: int, b: int) -> int:
     """Raises the first number to the power of the second number"""
     return a ** b
 
+def _monthly_cash_flow(data: dict) -> tuple:
+    """(monthly income, monthly expenses), from the stored summary when the payload carries one."""
+    monthly = (data.get('summary') or {}).get('monthly')
+    if monthly:
+        return monthly.get('income', 0), monthly.get('expenses', 0)
+    monthly_income = sum(income.get('amount', 0) for income in data.get('incomes', []) if income.get('frequency') == 'monthly')
+    annual_income = sum(income.get('amount', 0) for income in data.get('incomes', []) if income.get('frequency') == 'yearly')
+    monthly_income += annual_income / 12
+    monthly_expenses = sum(expense.get('amount', 0) for expense in data.get('expenses', []))
+    return monthly_income, monthly_expenses
+
 @tool
 def calculate_net_worth(financial_data: str) -> str:
     """Calculate user's net worth from their financial data."""
     try:
         data = json.loads(financial_data)
+        totals = (data.get('summary') or {}).get('totals')
         
-        total_assets = sum(asset.get('value', 0) for asset in data.get('assets', []))
-        total_liabilities = sum(liability.get('value', 0) for liability in data.get('liabilities', []))
+        if totals:
+            total_assets = totals.get('assets', 0) + totals.get('bank', 0)
+            total_liabilities = totals.get('liabilities', 0)
+        else:
+            total_assets = sum(asset.get('value', 0) for asset in data.get('assets', []))
+            total_liabilities = sum(liability.get('value', 0) for liability in data.get('liabilities', []))
         
         net_worth = total_assets - total_liabilities
         
@@ -54,12 +77,7 @@ def analyze_cash_flow(financial_data: str) -> str:
     """Analyze monthly cash flow from income and expenses."""
     try:
         data = json.loads(financial_data)
-        
-        monthly_income = sum(income.get('amount', 0) for income in data.get('incomes', []) if income.get('frequency') == 'monthly')
-        annual_income = sum(income.get('amount', 0) for income in data.get('incomes', []) if income.get('frequency') == 'yearly')
-        monthly_income += annual_income / 12
-        
-        monthly_expenses = sum(expense.get('amount', 0) for expense in data.get('expenses', []))
+        monthly_income, monthly_expenses = _monthly_cash_flow(data)
         
         cash_flow = monthly_income - monthly_expenses
         savings_rate = (cash_flow / monthly_income * 100) if monthly_income > 0 else 0
@@ -116,10 +134,7 @@ def goal_progress_analysis(financial_data: str) -> str:
         goals = data.get('goals', [])
         
         # Calculate available surplus from cash flow
-        monthly_income = sum(income.get('amount', 0) for income in data.get('incomes', []) if income.get('frequency') == 'monthly')
-        annual_income = sum(income.get('amount', 0) for income in data.get('incomes', []) if income.get('frequency') == 'yearly')
-        monthly_income += annual_income / 12
-        monthly_expenses = sum(expense.get('amount', 0) for expense in data.get('expenses', []))
+        monthly_income, monthly_expenses = _monthly_cash_flow(data)
         monthly_surplus = monthly_income - monthly_expenses
         
         result = f"Goal Progress Analysis:\nAvailable Monthly Surplus: ₹{monthly_surplus:,.0f}\n\n"
@@ -234,21 +249,11 @@ def search(query: str) -> str:
 def repl_tool(code: str) -> str:
     """Execute Python code and return the result."""
     try:
-        # Handle multiple statements by using exec and capturing output
-        import io
-        import sys
-        
-        # Capture output
-        old_stdout = sys.stdout
-        sys.stdout = buffer = io.StringIO()
-        
-        # Execute the code
-        exec(code)
-        
-        # Get the output
-        output = buffer.getvalue()
-        sys.stdout = old_stdout
-        
+        # Runs in a pre-warmed sandbox process with CPU, memory and time limits
+        result = run_sandboxed(code)
+        output = result.get("stdout") or ""
+        if not result.get("ok"):
+            return f"{output}Error: {result.get('error')}"
         return output if output else "Code executed successfully (no output)"
     except Exception as e:
         return f"Error: {str(e)}"
@@ -340,9 +345,45 @@ def get_company_info(company_name: str) -> str:
     except Exception as e:
         return f"Unable to fetch company info for {company_name}. Error: {str(e)}"
 
+def _format_performance(company_name: str, perf: dict) -> str:
+    cagr = f"{perf['cagr'] * 100:.2f}%" if perf.get('cagr') is not None else "n/a"
+    return (
+        f"Performance for {company_name} ({perf['symbol']}) {perf['start_date']} → {perf['end_date']}:\n"
+        f"• Start close: ₹{perf['start_close']:,.2f}\n"
+        f"• End close: ₹{perf['end_close']:,.2f}\n"
+        f"• Range: ₹{perf['low']:,.2f} - ₹{perf['high']:,.2f} over {perf['bars']} sessions\n"
+        f"• Period return: {perf['period_return'] * 100:.2f}%\n"
+        f"• CAGR: {cagr}\n"
+        f"• Max drawdown: {perf['max_drawdown'] * 100:.2f}% ({perf['drawdown_peak_date']} → {perf['drawdown_trough_date']})"
+    )
+
+_TRAILING_PERIOD = re.compile(r"\s+(?:(?:over|for)\s+)?(?:the\s+)?(?:(?:last|past)\s+)?(\d+\s*[a-z]+|ytd|max)\s*$", re.IGNORECASE)
+
+def _split_duration(text: str):
+    """'Reliance 1 year' -> ('Reliance', '1 year'); text without a trailing period -> (text, None)."""
+    match = _TRAILING_PERIOD.search(text)
+    if not match:
+        return text.strip(), None
+    return text[:match.start()].strip(), match.group(1)
+
+def _stored_performance(company_name: str, start_date: str = None, duration: str = None):
+    """Compute performance from the local price store; None if the symbol isn't stored."""
+    symbol = resolve_symbol(get_ticker_from_company(company_name))
+    if not symbol:
+        return None
+    if start_date:
+        # 'company, start_date, duration': the window runs forward from start_date
+        start = datetime.datetime.strptime(start_date[:10], '%Y-%m-%d').date()
+        back, _ = parse_period(duration or '', end=start)
+        end = start + (start - back) if back else None
+    else:
+        # Relative periods ('1y', '6 months') end at the latest stored session
+        start, end = parse_period(duration or '', end=get_price_store().last_date(symbol))
+    return performance(symbol, start, end)
+
 @tool
 def get_historical_price(query: str) -> str:
-    """Fetch historical stock prices using web search. Query can be 'company_name, start_date, duration' or just 'company_name duration'."""
+    """Fetch historical stock prices. Query can be 'company_name, start_date, duration' or just 'company_name duration'."""
     try:
         # Handle both formats: "company, date, duration" or "company duration"
         parts = query.split(",")
@@ -350,12 +391,18 @@ def get_historical_price(query: str) -> str:
             company_name, start_date, duration = parts[0].strip(), parts[1].strip(), parts[2].strip()
             search_query = f"{company_name} stock price history {start_date} {duration}"
         elif len(parts) == 2:
-            company_name, duration = parts[0].strip(), parts[1].strip()
+            company_name, start_date, duration = parts[0].strip(), None, parts[1].strip()
             search_query = f"{company_name} stock price {duration} performance"
         else:
-            # Single input - assume it contains company name and time period
+            # Single input - company name followed by an optional time period
+            (company_name, duration), start_date = _split_duration(query), None
             search_query = f"{query} stock price history"
-        
+
+        # Prefer exact figures from the local price store
+        perf = _stored_performance(company_name, start_date, duration)
+        if perf:
+            return _format_performance(company_name, perf)
+
         search_results = search(search_query)
         return f"Historical stock data search results:\n{search_results}"
     except Exception as e:
@@ -363,9 +410,13 @@ def get_historical_price(query: str) -> str:
 
 @tool
 def evaluate_returns(inputs: str) -> str:
-    """Calculate stock performance using web search."""
+    """Calculate stock performance (return, CAGR, max drawdown). Input format: 'company_name, duration'."""
     try:
         company_name, duration = inputs.split(",")
+        perf = _stored_performance(company_name.strip(), None, duration.strip())
+        if perf:
+            return _format_performance(company_name.strip(), perf)
+
         ticker = get_ticker_from_company(company_name.strip())
         search_query = f"{company_name} {ticker} stock performance {duration}"
         search_results = search(search_query)
@@ -375,9 +426,27 @@ def evaluate_returns(inputs: str) -> str:
 
 @tool
 def technical_analysis(company_name: str) -> str:
-    """Perform technical analysis using web search."""
+    """Perform technical analysis (SMA/EMA, RSI, MACD, Bollinger Bands, ATR) from stored prices, falling back to web search."""
     try:
         ticker = get_ticker_from_company(company_name)
+        symbol = resolve_symbol(ticker)
+        doc = refresh_technical_analysis(symbol) if symbol else None
+        if doc:
+            ind = doc.get('indicators', {})
+            fmt = lambda v: f"{v:,.2f}" if v is not None else "n/a"
+            return (
+                f"📊 Technical Analysis for {company_name} ({symbol}) as of {doc.get('as_of')}:\n"
+                f"• Close: ₹{fmt(ind.get('close'))}\n"
+                f"• SMA20 / SMA50: ₹{fmt(ind.get('sma_fast'))} / ₹{fmt(ind.get('sma_slow'))}\n"
+                f"• EMA12 / EMA26: ₹{fmt(ind.get('ema_fast'))} / ₹{fmt(ind.get('ema_slow'))}\n"
+                f"• RSI(14): {fmt(ind.get('rsi'))}\n"
+                f"• MACD: {fmt(ind.get('macd'))} (signal {fmt(ind.get('macd_signal'))})\n"
+                f"• Bollinger Bands: ₹{fmt(ind.get('bb_lower'))} - ₹{fmt(ind.get('bb_upper'))}\n"
+                f"• ATR(14): ₹{fmt(ind.get('atr'))}\n"
+                f"• Signal: {doc.get('recommendation')} | Target: ₹{fmt(doc.get('target_price'))}\n"
+                f"{doc.get('result')}"
+            )
+
         search_query = f"{company_name} {ticker} technical analysis RSI MACD"
         search_results = search(search_query)
         return f"📊 Technical Analysis for {company_name} ({ticker}):\n{search_results}"
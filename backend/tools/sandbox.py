@@ -0,0 +1,189 @@
+"""
+Pre-warmed pool of sandboxed interpreter processes for repl_tool.
+
+Each worker is a separate, isolated Python process (see sandbox_worker.py)
+with CPU and memory rlimits. Calls are dispatched to an idle worker over a
+pipe, so there is no interpreter start-up on the request path and agent code
+never runs inside (or writes to the stdout of) the API process. A worker that
+times out is killed and replaced in the background.
+
+Workers start in an empty temporary directory with a minimal environment, so
+the API's working directory (and its .env) is not next to them, and agent
+code gets builtins without ``open`` (see sandbox_worker.py).
+"""
+
+import json
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, Optional
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sandbox_worker.py")
+RESPAWN_RETRIES = 5
+
+
+class SandboxError(RuntimeError):
+    pass
+
+
+class _Worker:
+    def __init__(self, env: Dict[str, str]):
+        self.workdir = tempfile.mkdtemp(prefix="sandbox-")
+        try:
+            self.proc = subprocess.Popen(
+                [sys.executable, "-I", WORKER_SCRIPT],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                cwd=self.workdir,
+                env=env,
+                text=True,
+                encoding="utf-8",
+                bufsize=1,
+            )
+        except Exception:
+            shutil.rmtree(self.workdir, ignore_errors=True)
+            raise
+        self.replies: "queue.Queue[Optional[str]]" = queue.Queue()
+        self.calls = 0
+        self.ready = False
+        threading.Thread(target=self._pump, daemon=True).start()
+
+    def _pump(self) -> None:
+        # Pipes can't be polled portably (Windows), so a reader thread feeds a queue.
+        for line in self.proc.stdout:
+            self.replies.put(line)
+        self.replies.put(None)
+
+    def _read(self, timeout: float) -> Dict:
+        line = self.replies.get(timeout=timeout)
+        if line is None:
+            raise SandboxError("Sandbox worker exited (CPU or memory limit exceeded)")
+        return json.loads(line)
+
+    def wait_ready(self, timeout: float) -> None:
+        if not self.ready:
+            self._read(timeout)
+            self.ready = True
+
+    def call(self, code: str, timeout: float) -> Dict:
+        self.proc.stdin.write(json.dumps({"code": code}) + "\n")
+        self.proc.stdin.flush()
+        self.calls += 1
+        return self._read(timeout)
+
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def kill(self) -> None:
+        try:
+            self.proc.kill()
+            self.proc.wait(timeout=1)
+        except Exception:
+            pass
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+class SandboxPool:
+    """Fixed-size pool of sandbox workers.
+
+    ``run`` blocks for at most ``queue_timeout`` waiting for a free worker and
+    ``timeout`` seconds of wall-clock time for the code itself.
+    """
+
+    def __init__(self, size: int = 2, timeout: float = 5.0, cpu_seconds: int = 5,
+                 memory_mb: int = 256, max_calls: int = 50, queue_timeout: float = 10.0):
+        self.size = size
+        self.timeout = timeout
+        self.max_calls = max_calls
+        self.queue_timeout = queue_timeout
+        self._env = {
+            "SANDBOX_CPU_SECONDS": str(cpu_seconds),
+            "SANDBOX_MEMORY_MB": str(memory_mb),
+            "SANDBOX_USER": os.environ.get("SANDBOX_USER", "nobody"),
+            "PATH": os.environ.get("PATH", ""),
+        }
+        if os.name == "nt":
+            self._env["SYSTEMROOT"] = os.environ.get("SYSTEMROOT", "")
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._closed = False
+        for _ in range(size):
+            self._idle.put(_Worker(self._env))
+
+    def _replace(self, worker: _Worker) -> None:
+        def spawn():
+            worker.kill()
+            for attempt in range(RESPAWN_RETRIES):
+                if self._closed:
+                    return
+                try:
+                    self._idle.put(_Worker(self._env))
+                    return
+                except Exception as e:
+                    print(f"⚠️ Sandbox worker respawn failed (attempt {attempt + 1}/{RESPAWN_RETRIES}): {e}")
+                    time.sleep(2 ** attempt)
+            print(f"❌ Sandbox pool lost a worker after {RESPAWN_RETRIES} respawn attempts")
+        threading.Thread(target=spawn, daemon=True).start()
+
+    def run(self, code: str, timeout: Optional[float] = None) -> Dict:
+        timeout = timeout or self.timeout
+        try:
+            worker = self._idle.get(timeout=self.queue_timeout)
+        except queue.Empty:
+            raise SandboxError("All sandbox workers are busy, try again shortly")
+
+        started = time.perf_counter()
+        try:
+            worker.wait_ready(self.queue_timeout)
+            result = worker.call(code, timeout)
+        except queue.Empty:
+            self._replace(worker)
+            raise SandboxError(f"Execution timed out after {timeout:g}s")
+        except (SandboxError, OSError, ValueError) as e:
+            self._replace(worker)
+            raise SandboxError(str(e))
+
+        result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        if worker.calls >= self.max_calls or not worker.alive():
+            # Recycle periodically so state leaked through modules can't accumulate.
+            self._replace(worker)
+        else:
+            self._idle.put(worker)
+        return result
+
+    def close(self) -> None:
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().kill()
+            except queue.Empty:
+                break
+
+
+_pool: Optional[SandboxPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_sandbox_pool() -> SandboxPool:
+    """Process-wide pool, configured from SANDBOX_* environment variables."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = SandboxPool(
+                    size=int(os.getenv("SANDBOX_WORKERS", "2")),
+                    timeout=float(os.getenv("SANDBOX_TIMEOUT_SECONDS", "5")),
+                    cpu_seconds=int(os.getenv("SANDBOX_CPU_SECONDS", "5")),
+                    memory_mb=int(os.getenv("SANDBOX_MEMORY_MB", "256")),
+                    max_calls=int(os.getenv("SANDBOX_MAX_CALLS", "50")),
+                )
+    return _pool
+
+
+def run_sandboxed(code: str, timeout: Optional[float] = None) -> Dict:
+    return get_sandbox_pool().run(code, timeout)
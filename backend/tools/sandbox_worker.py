@@ -0,0 +1,143 @@
+"""
+Sandboxed interpreter process used by the repl_tool worker pool.
+
+Protocol: one JSON request per line on stdin ({"code": ...}), one JSON reply
+per line on the original stdout ({"ok": bool, "stdout": str, "error": str}).
+The real fd 1 is pointed at /dev/null so stray writes from agent code or C
+extensions can never corrupt the reply stream.
+
+Agent code runs with builtins that lack ``open`` and an ``__import__`` that
+refuses file, process and network modules. That only raises the bar: the
+process boundary is what isolates it (empty working directory, minimal
+environment, rlimits). RLIMIT_NPROC does not apply to root, so a worker
+started as root first switches to the unprivileged ``SANDBOX_USER``
+(default ``nobody``).
+"""
+
+import builtins
+import contextlib
+import io
+import json
+import os
+import sys
+import traceback
+
+try:
+    import resource
+except ImportError:  # Windows: rely on the parent's wall-clock timeout only
+    resource = None
+
+try:
+    import pwd
+except ImportError:
+    pwd = None
+
+# Modules agent code commonly uses; importing them here keeps calls fast.
+PRELOAD = ("math", "json", "statistics", "datetime", "decimal", "fractions", "random", "re")
+# Modules agent code may not import: file, process and network access.
+BLOCKED_MODULES = frozenset((
+    "io", "_io", "os", "posix", "nt", "pathlib", "shutil", "glob", "tempfile", "fileinput", "linecache",
+    "subprocess", "multiprocessing", "socket", "ssl", "ctypes", "mmap", "pickle", "marshal", "importlib",
+    "builtins", "sys", "signal", "resource", "pwd", "urllib", "http", "sqlite3", "zipfile", "tarfile", "gc",
+))
+
+
+def _guarded_import(name, globals=None, locals=None, fromlist=(), level=0):
+    if name.split(".")[0] in BLOCKED_MODULES:
+        raise ImportError(f"import of '{name}' is not allowed in the sandbox")
+    return builtins.__import__(name, globals, locals, fromlist, level)
+
+
+SANDBOX_BUILTINS = {k: v for k, v in vars(builtins).items() if k not in ("open", "input", "breakpoint", "exit", "quit")}
+SANDBOX_BUILTINS["__import__"] = _guarded_import
+
+
+def _drop_privileges(user: str) -> None:
+    """Switch to ``user`` when started as root; RLIMIT_NPROC is not enforced for root."""
+    if pwd is None or not hasattr(os, "geteuid") or os.geteuid() != 0:
+        return
+    try:
+        entry = pwd.getpwnam(user)
+    except KeyError:
+        return
+    os.setgroups([])
+    os.setgid(entry.pw_gid)
+    os.setuid(entry.pw_uid)
+
+
+def _apply_limits(memory_mb: int) -> None:
+    if resource is None:
+        return
+    if memory_mb > 0:
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+    if hasattr(resource, "RLIMIT_NPROC"):
+        # Agent code may not spawn processes of its own.
+        try:
+            resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))
+        except (ValueError, OSError):
+            pass
+
+
+def _set_cpu_budget(seconds: int) -> None:
+    """RLIMIT_CPU is cumulative, so each call gets 'time used so far + budget'."""
+    if resource is None or seconds <= 0:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    used = int(usage.ru_utime + usage.ru_stime) + 1
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    soft = used + seconds
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _execute(code: str, max_output: int) -> dict:
+    buffer = io.StringIO()
+    scope = {"__name__": "__sandbox__", "__builtins__": SANDBOX_BUILTINS}
+    try:
+        with contextlib.redirect_stdout(buffer), contextlib.redirect_stderr(buffer):
+            exec(compile(code, "<agent>", "exec"), scope)
+        return {"ok": True, "stdout": buffer.getvalue()[:max_output], "error": ""}
+    except MemoryError:
+        return {"ok": False, "stdout": buffer.getvalue()[:max_output], "error": "MemoryError: memory limit exceeded"}
+    except BaseException as e:  # SystemExit / KeyboardInterrupt from agent code included
+        tb = traceback.format_exception_only(type(e), e)
+        return {"ok": False, "stdout": buffer.getvalue()[:max_output], "error": "".join(tb).strip()}
+
+
+def main() -> None:
+    cpu_seconds = int(os.getenv("SANDBOX_CPU_SECONDS", "5"))
+    memory_mb = int(os.getenv("SANDBOX_MEMORY_MB", "256"))
+    max_output = int(os.getenv("SANDBOX_MAX_OUTPUT", "20000"))
+
+    for name in PRELOAD:
+        __import__(name)
+
+    # Keep a private handle on the reply pipe, then detach fd 1 from it.
+    reply = os.fdopen(os.dup(1), "w", encoding="utf-8", buffering=1)
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    os.close(devnull)
+    sys.stdout = sys.__stdout__ = io.TextIOWrapper(open(1, "wb", closefd=False), encoding="utf-8")
+
+    _drop_privileges(os.getenv("SANDBOX_USER", "nobody"))
+    _apply_limits(memory_mb)
+    reply.write(json.dumps({"ready": True, "pid": os.getpid()}) + "\n")
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        try:
+            request = json.loads(line)
+        except ValueError:
+            reply.write(json.dumps({"ok": False, "stdout": "", "error": "Malformed request"}) + "\n")
+            continue
+        _set_cpu_budget(cpu_seconds)
+        result = _execute(request.get("code") or "", max_output)
+        reply.write(json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@
 import { useLocation, useNavigate, Link } from 'react-router-dom';
 import { useState } from 'react';
 import { Mail, Lock, User, BarChart2, Eye, EyeOff, AlertCircle } from 'lucide-react';
+import { setSessionToken } from '../utils';
 
 const AuthComponent = () => {
   const { pathname } = useLocation();
@@ -36,6 +37,7 @@ const AuthComponent = () => {
         // Save the current user
         localStorage.setItem('userData', JSON.stringify(data.user));
         localStorage.setItem('currentUserEmail', data.user?.email || '');
+        setSessionToken(data.token);
         // Notify consumers to reload from the new user context immediately
         try {
           window.dispatchEvent(new Event('user-data-updated'));
@@ -70,6 +72,7 @@ const AuthComponent = () => {
       if (res.ok) {
         localStorage.setItem('userData', JSON.stringify(data.user));
         localStorage.setItem('currentUserEmail', data.user?.email || '');
+        setSessionToken(data.token);
         try {
           window.dispatchEvent(new Event('user-data-updated'));
         } catch (_) {}
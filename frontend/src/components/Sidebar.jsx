@@ -1,5 +1,6 @@
 import { Link, useLocation } from 'react-router-dom';
 import { BarChart2, BookOpen, TrendingUp, User, LineChart, LayoutDashboard, Database, MessageSquare, Calculator, LogOut } from 'lucide-react';
+import { setSessionToken } from '../utils';
 // Clerk removed
 
 const Sidebar = ({ isOpen = false, onClose }) => {
@@ -12,6 +13,7 @@ const Sidebar = ({ isOpen = false, onClose }) => {
   const handleLogout = () => {
     localStorage.removeItem('userData');
     localStorage.removeItem('currentUserEmail');
+    setSessionToken(null);
     window.location.href = '/'; // Redirect to home page
   };
 
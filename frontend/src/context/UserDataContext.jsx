@@ -1,7 +1,26 @@
 import { createContext, useContext, useState, useEffect } from 'react';
+import { SERVER_URL, authHeaders } from '../utils';
 
 const UserDataContext = createContext();
 
+// Same normalization as the backend summary (services/financial_summary.py); unknown frequencies count as monthly
+const MONTHLY_FACTOR = {
+  weekly: 52 / 12,
+  monthly: 1,
+  quarterly: 1 / 3,
+  'half-yearly': 1 / 6,
+  yearly: 1 / 12,
+  annual: 1 / 12,
+  'one-time': 0,
+};
+
+const monthlyAmount = (item) => {
+  const factor = MONTHLY_FACTOR[(item.frequency || 'monthly').toLowerCase()];
+  return (Number(item.amount) || 0) * (factor ?? 1);
+};
+
+const round2 = (value) => Math.round(value * 100) / 100;
+
 export const useUserData = () => {
   const context = useContext(UserDataContext);
   if (!context) {
@@ -33,10 +52,10 @@ export const UserDataProvider = ({ children }) => {
         const currentUser = rawUser ? JSON.parse(rawUser) : null;
         const currentEmail = currentUser?.email;
         if (!currentEmail) {
-          setUserData(prev => ({ ...prev, assets: [], liabilities: [], incomes: [], expenses: [], goals: [] }));
+          setUserData(prev => ({ ...prev, assets: [], liabilities: [], incomes: [], expenses: [], goals: [], bankBalance: 0, summary: null }));
           return;
         }
-        const res = await fetch(`http://127.0.0.1:5000/user-portfolio?email=${encodeURIComponent(currentEmail)}`);
+        const res = await fetch(`${SERVER_URL}/user-portfolio?email=${encodeURIComponent(currentEmail)}`, { headers: authHeaders() });
         const payload = await res.json();
 
         // Map backend payload to frontend shapes
@@ -45,10 +64,11 @@ export const UserDataProvider = ({ children }) => {
           const n = (asset.name || '').toLowerCase();
           if (t.includes('mutual') || n.includes('fund')) return 'investments';
           if (t.includes('stock') || t.includes('equity')) return 'investments';
-          if (t.includes('ppf') || t.includes('fd') || n.includes('ppf')) return 'bank';
+          if (t.includes('ppf') || t.includes('fd') || t.includes('fixed') || n.includes('ppf')) return 'bank';
           if (t.includes('gold') || n.includes('gold')) return 'other';
           if (t.includes('real') || n.includes('apartment') || n.includes('property')) return 'realestate';
-          return asset.category || 'investments';
+          const stored = asset.category || 'investments';
+          return ['investments', 'bank', 'realestate', 'other'].includes(stored) ? stored : 'other';
         };
 
         const mappedAssets = (payload.assets || []).map((a, idx) => ({
@@ -57,6 +77,7 @@ export const UserDataProvider = ({ children }) => {
           category: deriveCategory(a),
           value: Number(a.current_value || 0),
           quantity: a.quantity || 0,
+          symbol: a.symbol || null,
         }));
 
         const mapLiabilityCategory = (liab) => {
@@ -144,10 +165,12 @@ export const UserDataProvider = ({ children }) => {
           expenses: mappedExpenses,
           goals: mappedGoals,
           riskTolerance: mappedRisk,
+          bankBalance: (payload.bank_accounts || []).reduce((sum, b) => sum + (Number(b.current_balance) || 0), 0),
+          summary: payload.summary || null,
         });
       } catch (error) {
         console.error('Error fetching portfolio:', error);
-        setUserData(prev => ({ ...prev, assets: [], liabilities: [], incomes: [], expenses: [], goals: [] }));
+        setUserData(prev => ({ ...prev, assets: [], liabilities: [], incomes: [], expenses: [], goals: [], bankBalance: 0, summary: null }));
       }
     };
 
@@ -165,49 +188,54 @@ export const UserDataProvider = ({ children }) => {
     console.log('getPortfolioSummary: Assets structure:', userData.assets);
     
     try {
-      const totalAssets = userData.assets.reduce((sum, asset) => {
-        console.log('Processing asset:', asset, 'Value:', asset.value);
-        return sum + (asset.value || 0);
-      }, 0);
-      
-      const totalLiabilities = userData.liabilities.reduce((sum, liability) => sum + (liability.amount - (liability.paid || 0)), 0);
+      // Prefer the summary the backend maintains on every write
+      const summary = userData.summary;
+      if (summary && summary.totals) {
+        const monthlySavings = summary.monthly.surplus;
+        return {
+          totalValue: summary.totals.net_worth,
+          totalAssets: summary.totals.assets + summary.totals.bank,
+          totalLiabilities: summary.totals.liabilities,
+          monthlyIncome: summary.monthly.income,
+          monthlyExpenses: summary.monthly.expenses,
+          monthlyReturns: monthlySavings,
+          monthlySavings,
+          savingsRate: summary.monthly.savings_rate,
+          goalProgress: summary.goals.progress,
+          monthlyChange: monthlySavings > 0 ? 8.5 : -2.3, // Mock calculation
+          returnsChange: 12.4 // Mock calculation
+        };
+      }
+
+      // Until the backend summary is refetched after an edit, compute it the same way from local data
+      const bankBalance = userData.bankBalance || 0;
+      const totalAssets = userData.assets.reduce((sum, asset) => sum + (Number(asset.value) || 0), 0) + bankBalance;
+      const totalLiabilities = userData.liabilities.reduce((sum, liability) => sum + (Number(liability.amount) || 0), 0);
       const netWorth = totalAssets - totalLiabilities;
-      
-      console.log('getPortfolioSummary: Total assets calculated:', totalAssets);
-      
-      const monthlyIncome = userData.incomes
-        .filter(income => income.frequency === 'monthly')
-        .reduce((sum, income) => sum + income.amount, 0);
-    
-    console.log('getPortfolioSummary: Monthly income calculated:', monthlyIncome, 'from incomes:', userData.incomes);
-    
-    const monthlyExpenses = userData.expenses
-      .filter(expense => expense.frequency === 'monthly')
-      .reduce((sum, expense) => sum + expense.amount, 0);
-    
-    const monthlySavings = monthlyIncome - monthlyExpenses;
-    
-    // Calculate goal progress (average)
-    const goalProgress = userData.goals.length > 0 
-      ? userData.goals.reduce((sum, goal) => {
-          const progress = (goal.currentAmount || 0) / goal.targetAmount * 100;
-          return sum + Math.min(progress, 100);
-        }, 0) / userData.goals.length
-      : 0;
-
-    return {
-      totalValue: netWorth,
-      totalAssets,
-      totalLiabilities,
-      monthlyIncome,
-      monthlyExpenses,
-      monthlyReturns: monthlySavings,
-      monthlySavings,
-      goalProgress: parseFloat(goalProgress.toFixed(1)),
-      monthlyChange: monthlySavings > 0 ? 8.5 : -2.3, // Mock calculation
-      returnsChange: 12.4 // Mock calculation
-    };
-    
+
+      const monthlyIncome = userData.incomes.reduce((sum, income) => sum + monthlyAmount(income), 0);
+      const monthlyExpenses = userData.expenses.reduce((sum, expense) => sum + monthlyAmount(expense), 0);
+      const monthlySavings = monthlyIncome - monthlyExpenses;
+
+      // Goal progress weighted by target amount: total saved (capped per goal) over total target
+      const goalTarget = userData.goals.reduce((sum, goal) => sum + (Number(goal.targetAmount) || 0), 0);
+      const goalSaved = userData.goals.reduce(
+        (sum, goal) => sum + Math.min(Number(goal.currentAmount) || 0, Number(goal.targetAmount) || 0), 0);
+
+      return {
+        totalValue: round2(netWorth),
+        totalAssets: round2(totalAssets),
+        totalLiabilities: round2(totalLiabilities),
+        monthlyIncome: round2(monthlyIncome),
+        monthlyExpenses: round2(monthlyExpenses),
+        monthlyReturns: round2(monthlySavings),
+        monthlySavings: round2(monthlySavings),
+        savingsRate: monthlyIncome > 0 ? round2(monthlySavings / monthlyIncome * 100) : 0,
+        goalProgress: goalTarget > 0 ? round2(goalSaved / goalTarget * 100) : 0,
+        monthlyChange: monthlySavings > 0 ? 8.5 : -2.3, // Mock calculation
+        returnsChange: 12.4 // Mock calculation
+      };
+
     } catch (error) {
       console.error('Error in getPortfolioSummary:', error);
       return {
@@ -218,6 +246,7 @@ export const UserDataProvider = ({ children }) => {
         monthlyExpenses: 0,
         monthlyReturns: 0,
         monthlySavings: 0,
+        savingsRate: 0,
         goalProgress: 0,
         monthlyChange: 0,
         returnsChange: 0
@@ -296,13 +325,8 @@ export const UserDataProvider = ({ children }) => {
 
   // Get monthly data for charts
   const getMonthlyData = () => {
-    const baseMonthlyIncome = userData.incomes
-      .filter(income => income.frequency === 'monthly')
-      .reduce((sum, income) => sum + income.amount, 0);
-    
-    const baseMonthlyExpenses = userData.expenses
-      .filter(expense => expense.frequency === 'monthly')
-      .reduce((sum, expense) => sum + expense.amount, 0);
+    const baseMonthlyIncome = userData.incomes.reduce((sum, income) => sum + monthlyAmount(income), 0);
+    const baseMonthlyExpenses = userData.expenses.reduce((sum, expense) => sum + monthlyAmount(expense), 0);
 
     // Generate 6 months of data with some variation
     const months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun'];
@@ -344,12 +368,12 @@ export const UserDataProvider = ({ children }) => {
 
   // Update methods for each data type
   const updateAssets = (assets) => {
-    setUserData(prev => ({ ...prev, assets: [...assets] }));
+    setUserData(prev => ({ ...prev, assets: [...assets], summary: null }));
     localStorage.setItem('userAssets', JSON.stringify(assets));
   };
 
   const updateLiabilities = (liabilities) => {
-    setUserData(prev => ({ ...prev, liabilities: [...liabilities] }));
+    setUserData(prev => ({ ...prev, liabilities: [...liabilities], summary: null }));
     localStorage.setItem('userLiabilities', JSON.stringify(liabilities));
   };
 
@@ -361,7 +385,8 @@ export const UserDataProvider = ({ children }) => {
     setUserData(prev => {
       const newData = { 
         ...prev, 
-        incomes: [...incomes] // Create new array reference
+        incomes: [...incomes], // Create new array reference
+        summary: null // stale until the next fetch
       };
       console.log('UserDataContext: New user data after update:', newData);
       return newData;
@@ -377,12 +402,12 @@ export const UserDataProvider = ({ children }) => {
   };
 
   const updateExpenses = (expenses) => {
-    setUserData(prev => ({ ...prev, expenses: [...expenses] }));
+    setUserData(prev => ({ ...prev, expenses: [...expenses], summary: null }));
     localStorage.setItem('userExpenses', JSON.stringify(expenses));
   };
 
   const updateGoals = (goals) => {
-    setUserData(prev => ({ ...prev, goals: [...goals] }));
+    setUserData(prev => ({ ...prev, goals: [...goals], summary: null }));
     localStorage.setItem('userGoals', JSON.stringify(goals));
   };
 
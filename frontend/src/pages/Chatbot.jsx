@@ -2,7 +2,7 @@ import { useState, useEffect, useRef } from 'react';
 import { motion } from 'framer-motion';
 import { Send, Bot, User, MessageSquare } from 'lucide-react';
 import axios from 'axios';
-import { SERVER_URL } from '../utils';
+import { SERVER_URL, authHeaders } from '../utils';
 import { useUserData } from '../context/UserDataContext';
 import PageHeader from '../components/PageHeader';
 
@@ -87,10 +87,12 @@ const Chatbot = () => {
         assetAllocation: assetAllocation
       };
 
+      const rawUser = localStorage.getItem('userData');
       const response = await axios.post(`${SERVER_URL}/agent`, {
         user_input: input,
+        email: rawUser ? JSON.parse(rawUser)?.email : undefined,
         financial_data: financialContext
-      });
+      }, { headers: authHeaders() });
 
       setIsTyping(false);
       
@@ -17,6 +17,7 @@ import {
 import { motion } from 'framer-motion';
 import { useState, useEffect } from 'react';
 import PageHeader from '../components/PageHeader';
+import { SERVER_URL, authHeaders, subscribePrices } from '../utils';
 
 const Portfolio = () => {
   // Get dynamic data from UserDataContext
@@ -36,6 +37,35 @@ const Portfolio = () => {
   const [investmentGoals, setInvestmentGoals] = useState(() => getInvestmentGoals());
   const [liabilities, setLiabilities] = useState(() => getLiabilities());
   const recentActivity = recentActivityData;
+  const [performance, setPerformance] = useState(null);
+
+  // XIRR / CAGR / absolute return computed by the backend from dated cash flows
+  useEffect(() => {
+    const rawUser = localStorage.getItem('userData');
+    const email = rawUser ? JSON.parse(rawUser)?.email : null;
+    if (!email) return;
+    fetch(`${SERVER_URL}/portfolio-performance?email=${encodeURIComponent(email)}`, { headers: authHeaders() })
+      .then(res => (res.ok ? res.json() : null))
+      .then(data => setPerformance(data?.portfolio || null))
+      .catch(() => setPerformance(null));
+  }, [userData]);
+
+  // Live prices for the holdings that track a listed symbol
+  const [livePrices, setLivePrices] = useState({});
+  const symbolKey = [...new Set(userData.assets.map(a => a.symbol).filter(Boolean))].sort().join(',');
+  useEffect(() => {
+    if (!symbolKey) return undefined;
+    return subscribePrices(symbolKey.split(','), (updates) => {
+      setLivePrices(prev => ({ ...prev, ...Object.fromEntries(updates.map(u => [u.symbol, u.price])) }));
+    });
+  }, [symbolKey]);
+  const liveChange = userData.assets.reduce((sum, asset) => {
+    const price = asset.symbol ? livePrices[asset.symbol] : undefined;
+    return price && asset.quantity ? sum + Number(asset.quantity) * price - (asset.value || 0) : sum;
+  }, 0);
+  const hasLivePrices = userData.assets.some(asset => asset.symbol && livePrices[asset.symbol]);
+
+  const formatPercent = (value) => (value == null ? '—' : `${value >= 0 ? '+' : ''}${(value * 100).toFixed(1)}%`);
 
   // Debug log to see userData changes
   console.log('Portfolio render: Current userData.incomes.length:', userData.incomes.length);
@@ -167,6 +197,11 @@ const Portfolio = () => {
             </div>
           </div>
           <div className="text-xs text-gray-500 mb-2">Income sources: {userData.incomes.length}</div>
+          {hasLivePrices && (
+            <div className={`text-xs mb-2 ${liveChange >= 0 ? 'text-green-600' : 'text-red-600'}`}>
+              Live market value: {formatCurrency(portfolioSummary.totalValue + liveChange)} ({liveChange >= 0 ? '+' : ''}{formatCurrency(liveChange)} since last valuation)
+            </div>
+          )}
           <div className="mb-6">
             <motion.h1 
               className="text-5xl font-bold text-gray-900 dark:text-white mb-4"
@@ -358,11 +393,23 @@ const Portfolio = () => {
               <TrendingUp className="h-6 w-6 text-blue-600 dark:text-blue-400" />
             </div>
           </div>
-          <div className="flex items-center mt-4">
-            <ArrowUpRight className="h-4 w-4 text-green-500" />
-            <span className="text-green-500 text-sm ml-1">+{portfolioSummary.returnsChange}%</span>
-            <span className="text-gray-500 dark:text-gray-400 text-sm ml-2">vs last month</span>
-          </div>
+          {performance ? (
+            <div className="flex items-center mt-4">
+              <ArrowUpRight className={`h-4 w-4 ${performance.xirr >= 0 ? 'text-green-500' : 'text-red-500'}`} />
+              <span className={`text-sm ml-1 ${performance.xirr >= 0 ? 'text-green-500' : 'text-red-500'}`}>
+                {formatPercent(performance.xirr)} XIRR
+              </span>
+              <span className="text-gray-500 dark:text-gray-400 text-sm ml-2">
+                CAGR {formatPercent(performance.cagr)} · Total {formatPercent(performance.absolute_return)}
+              </span>
+            </div>
+          ) : (
+            <div className="flex items-center mt-4">
+              <ArrowUpRight className="h-4 w-4 text-green-500" />
+              <span className="text-green-500 text-sm ml-1">+{portfolioSummary.returnsChange}%</span>
+              <span className="text-gray-500 dark:text-gray-400 text-sm ml-2">vs last month</span>
+            </div>
+          )}
         </motion.div>
 
         {/* Risk Score */}
@@ -3,6 +3,7 @@ import { useNavigate } from 'react-router-dom';
 import { motion } from 'framer-motion';
 import { LogOut, Settings, Shield, User as UserIcon, Camera, Mail, Phone, MapPin, Calendar } from 'lucide-react';
 import { toast, Toaster } from 'sonner';
+import { setSessionToken } from '../utils';
 
 const Profile = () => {
   const navigate = useNavigate();
@@ -218,7 +219,7 @@ const Profile = () => {
                   </button>
                 ))}
 
-              <button onClick={() => { localStorage.removeItem('userData'); navigate('/sign-in'); }} className="w-full mt-6 bg-red-50 dark:bg-red-900/20 text-red-600 dark:text-red-400 px-4 py-3 rounded-lg flex items-center justify-center hover:bg-red-100 dark:hover:bg-red-900/30 transition-all duration-300">
+              <button onClick={() => { localStorage.removeItem('userData'); setSessionToken(null); navigate('/sign-in'); }} className="w-full mt-6 bg-red-50 dark:bg-red-900/20 text-red-600 dark:text-red-400 px-4 py-3 rounded-lg flex items-center justify-center hover:bg-red-100 dark:hover:bg-red-900/30 transition-all duration-300">
                 <LogOut className="h-5 w-5 mr-2" />
                 Sign Out
               </button>
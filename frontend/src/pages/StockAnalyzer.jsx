@@ -2,6 +2,21 @@ import { useState, useRef, useEffect } from 'react';
 import { motion } from 'framer-motion';
 import { Search, TrendingUp, BarChart3, Brain, Loader2, AlertCircle, DollarSign, Copy, ChevronDown, ChevronUp, LineChart } from 'lucide-react';
 import PageHeader from '../components/PageHeader';
+import { subscribePrices } from '../utils';
+
+// NSE symbols of the quick-select stocks, for live prices
+const POPULAR_SYMBOLS = {
+  'Reliance Industries': 'RELIANCE.NS',
+  'TCS': 'TCS.NS',
+  'Infosys': 'INFY.NS',
+  'HDFC Bank': 'HDFCBANK.NS',
+  'ICICI Bank': 'ICICIBANK.NS',
+  'Adani Green': 'ADANIGREEN.NS',
+  'Wipro': 'WIPRO.NS',
+  'HCL Technologies': 'HCLTECH.NS',
+  'Axis Bank': 'AXISBANK.NS',
+  'Maruti Suzuki': 'MARUTI.NS'
+};
 
 const StockAnalyzer = () => {
   const [stockSymbol, setStockSymbol] = useState('');
@@ -14,6 +29,15 @@ const StockAnalyzer = () => {
     'Adani Green', 'Wipro', 'HCL Technologies', 'Axis Bank', 'Maruti Suzuki'
   ]);
   const resultsRef = useRef(null);
+  const [livePrices, setLivePrices] = useState({});
+
+  useEffect(() => {
+    const symbols = popularStocks.map(stock => POPULAR_SYMBOLS[stock]).filter(Boolean);
+    if (!symbols.length) return undefined;
+    return subscribePrices(symbols, (updates) => {
+      setLivePrices(prev => ({ ...prev, ...Object.fromEntries(updates.map(u => [u.symbol, u])) }));
+    });
+  }, [popularStocks]);
 
   // Do not auto-restore previous results; show results only after explicit Analyze
 
@@ -534,6 +558,11 @@ const StockAnalyzer = () => {
                   className="px-4 py-2 text-sm bg-gray-50 dark:bg-gray-700 text-gray-700 dark:text-gray-300 rounded-lg hover:bg-indigo-50 dark:hover:bg-indigo-900/30 hover:text-indigo-600 dark:hover:text-indigo-400 transition-all border border-gray-200 dark:border-gray-600"
                 >
                   {stock}
+                  {livePrices[POPULAR_SYMBOLS[stock]] && (
+                    <span className={`ml-2 font-mono ${(livePrices[POPULAR_SYMBOLS[stock]].change_percent ?? 0) >= 0 ? 'text-green-600' : 'text-red-600'}`}>
+                      ₹{livePrices[POPULAR_SYMBOLS[stock]].price.toLocaleString('en-IN')}
+                    </span>
+                  )}
                 </button>
               ))}
             </div>
@@ -1,2 +1,21 @@
 // Use a single SERVER_URL export. Change to your backend URL when needed.
 export const SERVER_URL = "http://127.0.0.1:5000";
+
+// Session token from /login, sent as a bearer header on per-user reads.
+export function setSessionToken(token) {
+  if (token) localStorage.setItem('sessionToken', token);
+  else localStorage.removeItem('sessionToken');
+}
+
+export function authHeaders() {
+  const token = localStorage.getItem('sessionToken');
+  return token ? { Authorization: `Bearer ${token}` } : {};
+}
+
+// Live prices over server-sent events. Returns a function that closes the stream.
+export function subscribePrices(symbols, onPrices) {
+  const query = symbols && symbols.length ? `?symbols=${encodeURIComponent(symbols.join(','))}` : '';
+  const source = new EventSource(`${SERVER_URL}/stream/prices${query}`);
+  source.addEventListener('prices', (event) => onPrices(JSON.parse(event.data)));
+  return () => source.close();
+}